@@ -1,27 +1,60 @@
 import os
-from flask import Flask, request
+import importlib
+from flask import Flask
 from config import Config
 from dotenv import load_dotenv
 from flask_pymongo import PyMongo
-from flask_restful import Api
 from flask_cors import CORS
 
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, '.env'))
 
-#Initialise Flask
-app = Flask(__name__, static_folder='../static', template_folder='templates')
-app.config.from_object(Config)
-
-# Instantiate the cors library
-cors = CORS(app, resources={r"/*": {"origins": "*"}}, methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"], allow_headers='*')
-
-# Create a flask restful api instance
-api = Api(app, catch_all_404s=True)
-
-# Mongodb setup
-mongo = PyMongo(app=app, uri=Config.MONGO_URI)
-
-
-from app import code
\ No newline at end of file
+# Mongodb setup (bound to an app in create_app)
+mongo = PyMongo()
+
+# Resource modules; each one exposes a `bp` blueprint with its routes
+BLUEPRINT_MODULES = (
+    "app.code.student",
+    "app.code.lecturers",
+    "app.code.general_function",
+    "app.code.health",
+    "app.code.admin",
+    "app.code.archive",
+)
+
+
+def create_app(config=Config) -> Flask:
+    """Application factory."""
+    #Initialise Flask
+    app = Flask(__name__, static_folder='../static', template_folder='templates')
+    app.config.from_object(config)
+
+    # Instantiate the cors library
+    CORS(app, resources={r"/*": {"origins": "*"}}, methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"], allow_headers='*')
+
+    # connect=False: don't open sockets until first use, so the client is safe to
+    # create in the gunicorn master before workers are forked (preload_app)
+    write_concern = app.config["MONGO_WRITE_CONCERN"]
+    mongo.init_app(
+        app,
+        uri=app.config["MONGO_URI"],
+        connect=False,
+        maxPoolSize=app.config["MONGO_MAX_POOL_SIZE"],
+        minPoolSize=app.config["MONGO_MIN_POOL_SIZE"],
+        serverSelectionTimeoutMS=app.config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        connectTimeoutMS=app.config["MONGO_CONNECT_TIMEOUT_MS"],
+        socketTimeoutMS=app.config["MONGO_SOCKET_TIMEOUT_MS"],
+        w=int(write_concern) if str(write_concern).isdigit() else write_concern,
+        readPreference=app.config["MONGO_READ_PREFERENCE"],
+    )
+
+    # Blueprints are imported here rather than at package import time
+    for module_name in BLUEPRINT_MODULES:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(module.bp)
+
+    from app.commands import register_commands
+    register_commands(app)
+
+    return app
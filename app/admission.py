@@ -0,0 +1,134 @@
+"""
+Admission control: per-route-class concurrency limits.
+
+Every request is put in one route class:
+
+- auth:   login / password routes (AUTH_ROUTE_PREFIXES), latency sensitive
+- report: PDF exports (REPORT_ROUTE_PREFIXES), slow and CPU heavy
+- write:  any other POST / PUT / PATCH / DELETE
+- read:   everything else
+
+Each class has its own slots (ADMISSION_<CLASS>_LIMIT per worker), so a burst
+of report downloads can hold at most the report slots and logins keep
+running. A request waits up to ADMISSION_MAX_WAIT for a slot; when every slot
+is busy and the queue ahead is not expected to drain within that budget it is
+turned away at once. Either way the answer is 503 with a Retry-After estimated
+from the class's recent request times.
+
+A slot is held until the response body has been sent, so streamed PDFs count
+for as long as they are being written out. Wait times, rejections and slots
+in use are reported in /metrics under admission.<class>.
+"""
+import math
+import time
+import threading
+from werkzeug.wsgi import ClosingIterator
+from config import Config
+from app.metrics import metrics
+
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+BUSY_BODY = b'{"error": "Server is busy, please retry shortly"}'
+
+
+class RouteClass(object):
+    def __init__(self, name: str, limit: int, max_wait: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_seconds = 0.5   # moving average of request time
+        self._slots = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+
+    def expected_wait(self) -> float:
+        """Rough time until a slot frees up for a request joining the queue now."""
+        return self.avg_seconds * (self.waiting + 1) / self.limit
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait()))
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting up to max_wait; False when the request should be rejected."""
+        with self._lock:
+            if self.in_flight >= self.limit and self.expected_wait() > self.max_wait:
+                metrics.incr(f"admission.{self.name}.rejected")
+                return False
+            self.waiting += 1
+
+        started = time.perf_counter()
+        try:
+            admitted = self._slots.acquire(timeout=self.max_wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        metrics.observe(f"admission.{self.name}.wait", time.perf_counter() - started)
+
+        if not admitted:
+            metrics.incr(f"admission.{self.name}.rejected")
+            return False
+
+        with self._lock:
+            self.in_flight += 1
+            metrics.set_gauge(f"admission.{self.name}.in_flight", self.in_flight)
+        return True
+
+    def release(self, seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+            metrics.set_gauge(f"admission.{self.name}.in_flight", self.in_flight)
+        self._slots.release()
+
+
+class AdmissionControlMiddleware(object):
+    def __init__(self, wsgi_app, config=Config):
+        self.wsgi_app = wsgi_app
+        self.auth_prefixes = tuple(config.AUTH_ROUTE_PREFIXES)
+        self.report_prefixes = tuple(config.REPORT_ROUTE_PREFIXES)
+        self.exempt_prefixes = tuple(config.ADMISSION_EXEMPT_PREFIXES)
+        self.classes = {
+            name: RouteClass(name, limit, config.ADMISSION_MAX_WAIT)
+            for name, limit in (
+                ("auth", config.ADMISSION_AUTH_LIMIT),
+                ("read", config.ADMISSION_READ_LIMIT),
+                ("write", config.ADMISSION_WRITE_LIMIT),
+                ("report", config.ADMISSION_REPORT_LIMIT),
+            )
+        }
+
+    def classify(self, method: str, path: str):
+        """Route class name for a request, or None when it is never limited."""
+        if method == "OPTIONS" or path.startswith(self.exempt_prefixes):
+            return None
+        if path.startswith(self.auth_prefixes):
+            return "auth"
+        if path.startswith(self.report_prefixes):
+            return "report"
+        if method in WRITE_METHODS:
+            return "write"
+        return "read"
+
+    def __call__(self, environ, start_response):
+        name = self.classify(environ.get("REQUEST_METHOD", "GET"), environ.get("PATH_INFO", ""))
+        if name is None:
+            return self.wsgi_app(environ, start_response)
+
+        route_class = self.classes[name]
+        if not route_class.acquire():
+            start_response(
+                "503 Service Unavailable",
+                [("Content-Type", "application/json"), ("Retry-After", str(route_class.retry_after()))]
+            )
+            return [BUSY_BODY]
+
+        started = time.perf_counter()
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            route_class.release(time.perf_counter() - started)
+            raise
+
+        # Released once the server has finished sending the body
+        return ClosingIterator(app_iter, lambda: route_class.release(time.perf_counter() - started))
@@ -0,0 +1,66 @@
+"""
+Archive of graduated cohorts (Students_archive).
+
+archive_cohort() moves a cohort's members out of the student repository
+(Students_name) in batches of ARCHIVE_BATCH_SIZE, so the hot collection, its
+indexes and every full scan only cover current students. Each batch is first copied (public fields only:
+passwords and OTPs are dropped, so archived members can no longer log in)
+and then deleted. The copy is an upsert by _id, so a run that stops half way
+is finished by running it again. Member stats are recounted at the end.
+
+The archive is read-only; it is served by the endpoints in app/code/archive.py.
+"""
+from datetime import datetime
+from pymongo import ReplaceOne
+from config import Config
+from app.metrics import metrics
+from app.stats import rebuild_member_stats
+from app.utils import members_archive, members_archive_listing
+from app.repositories import student_repo
+from app.projections import ARCHIVE_LISTING
+
+
+def archive_cohort(cohort: str, batch_size: int = None, force: bool = False) -> int:
+    """
+    Move every member of `cohort` into the archive; returns how many moved.
+    Raises ValueError for a cohort still open for registration unless `force`.
+    """
+    if cohort in Config.STUDENT_COHORTS and not force:
+        raise ValueError(f"Cohort {cohort} is still open for registration")
+
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    archived_at = datetime.utcnow()
+    moved = 0
+    while True:
+        batch = student_repo.cohort_batch(cohort, batch_size)
+        if not batch:
+            break
+
+        members_archive.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, dict(doc, archived_at=archived_at), upsert=True) for doc in batch],
+            ordered=False
+        )
+        moved += student_repo.delete_ids([doc["_id"] for doc in batch])
+        metrics.incr("archive.moved", len(batch))
+
+    if moved:
+        rebuild_member_stats()
+    return moved
+
+
+def archived_cohorts() -> list:
+    """[{"cohort", "total"}] for every archived cohort, oldest first."""
+    rows = members_archive_listing.aggregate([
+        {"$group": {"_id": "$cohort", "total": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ])
+    return [{"cohort": row["_id"], "total": row["total"]} for row in rows]
+
+
+def archived_members(cohort: str) -> list:
+    """Archived members of `cohort`, sorted by surname."""
+    return list(members_archive_listing.find({"cohort": cohort}, ARCHIVE_LISTING).sort("surname_key", 1))
+
+
+def archived_member(reg_no: str):
+    return members_archive_listing.find_one({"reg_no": reg_no}, ARCHIVE_LISTING)
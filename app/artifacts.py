@@ -0,0 +1,291 @@
+"""
+Artifact store for generated files (pre-rendered PDF reports).
+
+Two backends, chosen with ARTIFACT_STORE:
+
+    local    - <DOWNLOADS_DIR>/<name>, written to a temp file and renamed into
+               place, so readers never see a half-written file
+    content  - content-addressed: <DOWNLOADS_DIR>/objects/<sha256> holds the
+               bytes, <DOWNLOADS_DIR>/refs/<name> points at the current object
+
+Both skip rewriting bytes that are already stored (same sha256); only the
+"stored at" time is refreshed. stored_at is the time the bytes were produced
+(passed in by the caller), not the time the write finished, so a background
+write can't make a PDF look newer than the data it was rendered from.
+Writes are handed to a small thread pool by put_async(), so request handlers
+respond straight from the rendered output. Data can be bytes or an open
+binary file (e.g. a spooled PDF), which is copied in chunks.
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from app.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _chunks(data):
+    if isinstance(data, bytes):
+        yield data
+        return
+    data.seek(0)
+    while True:
+        chunk = data.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def sha256(data) -> str:
+    digest = hashlib.sha256()
+    for chunk in _chunks(data):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: str, data) -> None:
+    """Write to a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in _chunks(data):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _touch(path: str, timestamp: float) -> None:
+    os.utime(path, (timestamp, timestamp))
+
+
+def _is_newer(path: str, timestamp: float) -> bool:
+    """True if `path` already holds something produced after `timestamp`."""
+    try:
+        return os.path.getmtime(path) > timestamp
+    except OSError:
+        return False
+
+
+def _mtime(path: str):
+    try:
+        return datetime.utcfromtimestamp(os.path.getmtime(path))
+    except OSError:
+        return None
+
+
+def _open(path: str):
+    try:
+        return open(path, "rb")
+    except OSError:
+        return None
+
+
+def _read(path: str):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class LocalArtifactStore(object):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _digest_path(self, name: str) -> str:
+        return os.path.join(self.root, ".digests", name + ".sha256")
+
+    def put(self, name: str, data, produced_at: float = None) -> str:
+        digest = sha256(data)
+        path = self._path(name)
+        produced_at = produced_at or time.time()
+        if _is_newer(path, produced_at):
+            metrics.incr("artifacts.superseded")
+            return digest
+
+        if os.path.exists(path) and _read(self._digest_path(name)) == digest.encode():
+            # Same bytes already stored: just mark them current
+            metrics.incr("artifacts.deduplicated")
+        else:
+            _atomic_write(path, data)
+            _atomic_write(self._digest_path(name), digest.encode())
+            metrics.incr("artifacts.written")
+
+        _touch(path, produced_at)
+        return digest
+
+    def get(self, name: str):
+        return _read(self._path(name))
+
+    def open(self, name: str):
+        return _open(self._path(name))
+
+    def stored_at(self, name: str):
+        return _mtime(self._path(name))
+
+    def purge(self, older_than: float) -> int:
+        """Delete stored files last written before the `older_than` timestamp."""
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.stat().st_mtime < older_than:
+                try:
+                    os.remove(entry.path)
+                    os.remove(self._digest_path(entry.name))
+                except OSError:
+                    pass
+                removed += 1
+        return removed
+
+
+class ContentAddressedArtifactStore(object):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest)
+
+    def _ref_path(self, name: str) -> str:
+        return os.path.join(self.root, "refs", name)
+
+    def put(self, name: str, data, produced_at: float = None) -> str:
+        digest = sha256(data)
+        object_path = self._object_path(digest)
+        produced_at = produced_at or time.time()
+        if _is_newer(self._ref_path(name), produced_at):
+            metrics.incr("artifacts.superseded")
+            return digest
+
+        if os.path.exists(object_path):
+            metrics.incr("artifacts.deduplicated")
+        else:
+            _atomic_write(object_path, data)
+            metrics.incr("artifacts.written")
+
+        # The ref's mtime records when the current bytes were produced
+        _atomic_write(self._ref_path(name), digest.encode())
+        _touch(self._ref_path(name), produced_at)
+        _touch(object_path, produced_at)
+        return digest
+
+    def _digest(self, name: str):
+        digest = _read(self._ref_path(name))
+        return digest.decode() if digest else None
+
+    def get(self, name: str):
+        digest = self._digest(name)
+        return _read(self._object_path(digest)) if digest else None
+
+    def open(self, name: str):
+        digest = self._digest(name)
+        return _open(self._object_path(digest)) if digest else None
+
+    def stored_at(self, name: str):
+        return _mtime(self._ref_path(name))
+
+    def purge(self, older_than: float) -> int:
+        """Delete refs written before `older_than`, then objects no ref points at."""
+        removed = 0
+        refs_dir = os.path.join(self.root, "refs")
+        objects_dir = os.path.join(self.root, "objects")
+        if os.path.isdir(refs_dir):
+            for entry in os.scandir(refs_dir):
+                if entry.is_file() and entry.stat().st_mtime < older_than:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                    removed += 1
+
+        if os.path.isdir(objects_dir):
+            live = {self._digest(entry.name) for entry in os.scandir(refs_dir)} if os.path.isdir(refs_dir) else set()
+            for entry in os.scandir(objects_dir):
+                if entry.is_file() and entry.name not in live and entry.stat().st_mtime < older_than:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        return removed
+
+
+STORES = {
+    "local": LocalArtifactStore,
+    "content": ContentAddressedArtifactStore,
+}
+
+_store = None
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        root = os.path.join(os.getcwd(), Config.DOWNLOADS_DIR)
+        _store = STORES[Config.ARTIFACT_STORE](root)
+    return _store
+
+
+def _close(data) -> None:
+    if not isinstance(data, bytes):
+        data.close()
+
+
+def _write(name: str, data, produced_at: float, key: tuple) -> None:
+    try:
+        get_store().put(name, data, produced_at)
+    except Exception:
+        metrics.incr("artifacts.failed")
+        logger.exception("Failed to store artifact %s", name)
+    finally:
+        _close(data)
+        with _pending_lock:
+            _pending.discard(key)
+
+
+def put_async(name: str, data, produced_at: float = None) -> None:
+    """
+    Store `data` under `name` in the background (identical pending writes are
+    dropped). A file passed as `data` is closed once it has been stored.
+    """
+    global _executor
+    key = (name, sha256(data))
+    with _pending_lock:
+        if key in _pending:
+            _close(data)
+            return
+        _pending.add(key)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.ARTIFACT_WRITE_WORKERS, thread_name_prefix="artifacts")
+    _executor.submit(_write, name, data, produced_at or time.time(), key)
+
+
+def shutdown() -> None:
+    """Finish pending background writes (called when a worker exits)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
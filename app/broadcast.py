@@ -0,0 +1,289 @@
+"""
+Announcement broadcasts: email one announcement to every member (or a
+role / gender / cohort audience).
+
+A broadcast is a document in the Broadcasts collection holding the message,
+the audience and its progress. Recipients are read in _id order and sent in
+batches of BROADCAST_BATCH_SIZE; each batch goes over one SMTP connection,
+BROADCAST_CONCURRENCY batches run at once, and a shared limiter keeps the
+overall rate under BROADCAST_RATE_PER_MINUTE.
+
+After every round of batches the broadcast records its counts and the last
+_id up to which every recipient was handled, and renews its lease. If the
+mail server's circuit breaker opens mid-round, each batch stops where it is,
+that progress is recorded, and only the recipients not yet handled are sent
+once the breaker lets mail through again. If the worker dies, the lease runs
+out and the scheduler's resume_broadcasts job (or the next broadcast
+started) picks it up from that _id, so at most one round is sent twice.
+"""
+import time
+import logging
+import threading
+import itertools
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from app.metrics import metrics
+from app.circuit import CircuitOpenError
+from app.utils import broadcasts, EmailSender
+from app.repositories import student_repo
+from app.validation import parse_cohort
+
+logger = logging.getLogger(__name__)
+
+
+# field -> accepted values (None: any well-formed cohort)
+AUDIENCE_FILTERS = {
+    "role": ("exco", "student"),
+    "gender": ("male", "female"),
+    "cohort": None,
+}
+
+RECIPIENT_FIELDS = {"_id": 1, "email": 1, "surname": 1, "first_name": 1}
+
+# Failed addresses kept on the broadcast document for inspection
+MAX_RECORDED_FAILURES = 100
+
+
+def parse_audience(data) -> dict:
+    """
+    Validate an audience filter such as {"role": "exco"}; {} or None means
+    every member. Raises ValueError on an unknown filter or value.
+    """
+    audience = {}
+    for field, value in (data or {}).items():
+        if field not in AUDIENCE_FILTERS:
+            raise ValueError(f"Audience can filter on {list(AUDIENCE_FILTERS)} only")
+        if field == "cohort":
+            audience[field] = parse_cohort(value)
+            continue
+        value = str(value).strip().lower()
+        if value not in AUDIENCE_FILTERS[field]:
+            raise ValueError(f"Audience {field} must be one of {list(AUDIENCE_FILTERS[field])}")
+        audience[field] = value
+    return audience
+
+
+def create_broadcast(announcement_id, author: str, text: str, audience: dict):
+    """Queue a broadcast of an announcement; returns its id."""
+    now = datetime.utcnow()
+    doc = {
+        "announcement_id": announcement_id,
+        "author": author,
+        "text": text,
+        "audience": audience,
+        "state": "queued",
+        "total": student_repo.count(**audience),
+        "sent": 0,
+        "failed": 0,
+        "failures": [],
+        "last_id": None,
+        "lease_until": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return broadcasts.insert_one(doc).inserted_id
+
+
+def claim(broadcast_id=None):
+    """Lease a queued or abandoned broadcast (a given one, or any); None if there is none."""
+    now = datetime.utcnow()
+    query = {"state": {"$in": ["queued", "sending"]}, "lease_until": {"$lte": now}}
+    if broadcast_id is not None:
+        query["_id"] = broadcast_id
+
+    return broadcasts.find_one_and_update(
+        query,
+        {"$set": {
+            "state": "sending",
+            "lease_until": now + timedelta(seconds=Config.BROADCAST_LEASE_SECONDS),
+            "updated_at": now,
+        }},
+        sort=[("created_at", 1)],
+        return_document=True
+    )
+
+
+class RateLimiter(object):
+    """Spaces calls at least 60 / per_minute seconds apart across threads."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0
+        self.next_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            start = max(self.next_at, now)
+            self.next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def send_batch(broadcast: dict, recipients: list, limiter: RateLimiter) -> tuple:
+    """
+    Send to `recipients` (in _id order) over one connection; returns
+    (sent, failed addresses, _id of the last recipient handled). Stops early,
+    without raising, when the mail server's circuit breaker is open.
+    """
+    sent, failed, last_id = 0, [], None
+    server = None
+    try:
+        for recipient in recipients:
+            limiter.wait()
+            email = recipient["email"]
+            name = f"{recipient.get('surname', '')} {recipient.get('first_name', '')}".strip()
+            message = EmailSender.announcement_message(email, name, broadcast["author"], broadcast["text"])
+            try:
+                if server is None:
+                    server = EmailSender.open_connection()
+                server.sendmail(message["From"], email, message.as_string())
+                sent += 1
+            except CircuitOpenError:
+                # Not attempted; the caller sends the rest once the breaker closes
+                break
+            except Exception as e:
+                failed.append({"email": email, "error": str(e)[:200]})
+                # Start the next recipient on a fresh connection
+                if server is not None:
+                    server.close()
+                    server = None
+            last_id = recipient["_id"]
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    metrics.incr("broadcast.sent", sent)
+    metrics.incr("broadcast.failed", len(failed))
+    return sent, failed, last_id
+
+
+def _batches(cursor, size: int):
+    cursor = iter(cursor)
+    while True:
+        batch = list(itertools.islice(cursor, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _handled_through(progress: list, resume_id):
+    """
+    The _id up to which every recipient of the round has been handled.
+    `progress` is [unsent recipients, last _id handled] per batch, and the
+    batches are consecutive _id ranges.
+    """
+    for unsent, last_id in progress:
+        if last_id is None:
+            break
+        resume_id = last_id
+        if unsent:
+            break
+    return resume_id
+
+
+def run_broadcast(broadcast: dict) -> None:
+    """Deliver a claimed broadcast from where it left off."""
+    from app.delivery import smtp_breaker
+    cursor = student_repo.recipients(
+        after_id=broadcast.get("last_id"), projection=RECIPIENT_FIELDS,
+        batch_size=Config.BROADCAST_BATCH_SIZE, **broadcast["audience"]
+    )
+    limiter = RateLimiter(Config.BROADCAST_RATE_PER_MINUTE)
+    concurrency = Config.BROADCAST_CONCURRENCY
+    batches = _batches(cursor, Config.BROADCAST_BATCH_SIZE)
+    resume_id = broadcast.get("last_id")
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="broadcast") as pool:
+        while True:
+            round_batches = list(itertools.islice(batches, concurrency))
+            if not round_batches:
+                break
+
+            progress = [[batch, None] for batch in round_batches]
+            while True:
+                pending = [entry for entry in progress if entry[0]]
+                results = list(pool.map(lambda entry: send_batch(broadcast, entry[0], limiter), pending))
+                for entry, (_, _, last_id) in zip(pending, results):
+                    if last_id is not None:
+                        entry[0] = [recipient for recipient in entry[0] if recipient["_id"] > last_id]
+                        entry[1] = last_id
+                sent = sum(result[0] for result in results)
+                failures = [failure for result in results for failure in result[1]]
+                resume_id = _handled_through(progress, resume_id)
+
+                now = datetime.utcnow()
+                broadcasts.update_one(
+                    {"_id": broadcast["_id"]},
+                    {
+                        "$inc": {"sent": sent, "failed": len(failures)},
+                        "$push": {"failures": {"$each": failures, "$slice": -MAX_RECORDED_FAILURES}},
+                        "$set": {
+                            "last_id": resume_id,
+                            "lease_until": now + timedelta(seconds=Config.BROADCAST_LEASE_SECONDS),
+                            "updated_at": now,
+                        },
+                    }
+                )
+                if not any(entry[0] for entry in progress):
+                    break
+
+                # Mail server down: progress is saved and the lease renewed;
+                # wait for the breaker's probe, then send only what is left
+                metrics.incr("broadcast.paused")
+                time.sleep(max(smtp_breaker.retry_after(), 1))
+
+    now = datetime.utcnow()
+    broadcasts.update_one(
+        {"_id": broadcast["_id"]},
+        {"$set": {"state": "done", "finished_at": now, "updated_at": now, "lease_until": now}}
+    )
+    metrics.incr("broadcast.completed")
+
+
+def resume_broadcasts() -> int:
+    """Run every broadcast that is queued or whose sender died; returns how many ran."""
+    count = 0
+    while True:
+        broadcast = claim()
+        if broadcast is None:
+            return count
+        run_broadcast(broadcast)
+        count += 1
+
+
+def start_broadcast(app, broadcast_id) -> threading.Thread:
+    """Deliver a new broadcast in the background of this worker."""
+    def target():
+        with app.app_context():
+            try:
+                broadcast = claim(broadcast_id)
+                if broadcast is not None:
+                    run_broadcast(broadcast)
+            except Exception:
+                # The lease expires and resume_broadcasts picks it up again
+                metrics.incr("broadcast.crashed")
+                logger.exception("Broadcast %s stopped", broadcast_id)
+
+    thread = threading.Thread(target=target, name=f"broadcast-{broadcast_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+def broadcast_progress(doc: dict) -> dict:
+    """JSON-safe progress view of a broadcast."""
+    return {
+        "broadcast_id": str(doc["_id"]),
+        "state": doc["state"],
+        "audience": doc["audience"],
+        "total": doc["total"],
+        "sent": doc["sent"],
+        "failed": doc["failed"],
+        "remaining": max(doc["total"] - doc["sent"] - doc["failed"], 0),
+        "created_at": doc["created_at"].isoformat(),
+        "finished_at": doc["finished_at"].isoformat() if doc.get("finished_at") else None,
+    }
@@ -0,0 +1,85 @@
+"""
+In-process read-through caches.
+
+Entries expire after `ttl` seconds (an expired entry is dropped when it is
+next looked up) and can be dropped explicitly with invalidate(). A cache
+given `max_entries` also evicts its least recently used entry when full.
+Invalidation only reaches the worker that made the change; other gunicorn
+workers pick the change up when their entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from app.metrics import metrics
+
+
+_MISSING = object()
+
+
+class TTLCache(object):
+    def __init__(self, name: str, ttl: int, max_entries: int = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    metrics.incr(f"cache.{self.name}.evicted")
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            metrics.incr(f"cache.{self.name}.hit")
+            return value
+
+        # Only one thread rebuilds an expired entry; the others wait and reuse it
+        with self._load_lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                metrics.incr(f"cache.{self.name}.hit")
+                return value
+
+            metrics.incr(f"cache.{self.name}.miss")
+            value = loader()
+            self.set(key, value)
+            return value
+
+    def invalidate(self, key=None) -> None:
+        """Drop one entry, or everything when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        metrics.incr(f"cache.{self.name}.invalidate")
+
+
+# Student-facing lecturer directory (serialized JSON bytes, already sorted)
+lecturer_directory_cache = TTLCache("lecturer_directory", ttl=Config.LECTURER_DIRECTORY_CACHE_TTL)
+
+# Rendered group PDFs, keyed by (grouping _id, cohort, created_at); a
+# regenerated grouping gets a new key, so the number kept is bounded
+grouping_pdf_cache = TTLCache(
+    "grouping_pdf", ttl=Config.GROUPING_PDF_CACHE_TTL, max_entries=Config.GROUPING_PDF_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,100 @@
+"""
+Circuit breaker for calls to an external service (the SMTP server).
+
+After `failure_threshold` consecutive failures the breaker opens: calls fail
+at once with CircuitOpenError for `cooldown` seconds instead of each waiting
+on a dead host. The first call after the cool-down is let through as a probe
+(half-open); its success closes the breaker, its failure opens it again.
+
+    with smtp_breaker.guard():
+        ...talk to the server...
+
+State is per process (each gunicorn worker trips its own breaker) and is
+published as the gauge `circuit.<name>.state`, with `circuit.<name>.opened`
+and `circuit.<name>.rejected` counters.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from app.metrics import metrics
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker(object):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock    # seconds, monotonic (injectable for tests)
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = 0.0
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set_gauge(f"circuit.{self.name}.state", state)
+
+    def retry_after(self) -> float:
+        """Seconds until a call may go through (0 when closed or ready to probe)."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            return max(self.opened_at + self.cooldown - self.clock(), 0.0)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless the call may go ahead."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            wait = self.opened_at + self.cooldown - self.clock()
+            if self.state == self.OPEN and wait <= 0:
+                # This call is the probe; others keep failing fast until it reports back
+                self._set_state(self.HALF_OPEN)
+                return
+        metrics.incr(f"circuit.{self.name}.rejected")
+        raise CircuitOpenError(self.name, max(wait, 0.0))
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    metrics.incr(f"circuit.{self.name}.opened")
+                self.opened_at = self.clock()
+                self._set_state(self.OPEN)
+
+    @contextmanager
+    def guard(self, is_failure=lambda error: True):
+        """
+        Run the block through the breaker. Exceptions for which
+        `is_failure(error)` is false (e.g. a refused recipient) show that
+        the service is up and count as success.
+        """
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            # (a probe killed by e.g. GreenletExit must not leave the breaker half-open)
+            if not isinstance(e, Exception) or is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
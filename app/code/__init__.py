@@ -1,3 +0,0 @@
-from app.code.student import *
-from app.code.general_function import *
-from app.code.lecturers import *
\ No newline at end of file
@@ -0,0 +1,130 @@
+from app.utils import email_deliveries, email_dead_letters
+from app.repositories import lecturer_repo
+from app.archive import archive_cohort
+from app.validation import (
+    EMAIL_DELIVERIES_SCHEMA, EMAIL_DEAD_LETTERS_SCHEMA,
+    REQUEUE_DEAD_LETTERS_SCHEMA, ARCHIVE_COHORT_SCHEMA,
+)
+from flask import Blueprint
+from flask_restful import Api, Resource
+from werkzeug.exceptions import BadRequest
+from bson import ObjectId
+from bson.errors import InvalidId
+import bcrypt
+
+
+bp = Blueprint("admin", __name__)
+api = Api(bp, catch_all_404s=True)
+
+# Most records returned by one listing call
+MAX_LIMIT = 200
+
+# Inspection never returns the message body (it may hold an OTP or password)
+DELIVERY_VIEW = {"message": 0}
+
+
+def authenticate_lecturer(email: str, password: str) -> dict:
+    """The lecturer with these credentials (email already normalized); BadRequest otherwise."""
+    lecturer = lecturer_repo.get_by_email(email, {"role": 1, "password": 1})
+    if not lecturer:
+        raise BadRequest("Lecturer not found")
+
+    if lecturer.get("role") != "lecturer":
+        raise BadRequest("Only lecturers can perform this action")
+
+    if not bcrypt.checkpw(password.encode("utf-8"), lecturer["password"].encode("utf-8")):
+        raise BadRequest("Invalid password")
+    return lecturer
+
+
+def delivery_view(record: dict) -> dict:
+    """JSON-safe view of a delivery / dead-letter record."""
+    view = dict(record)
+    view["_id"] = str(record["_id"])
+    for key, value in view.items():
+        if hasattr(value, "isoformat"):
+            view[key] = value.isoformat()
+    return view
+
+
+class EmailDeliveries(Resource):
+    def post(self):
+        args = EMAIL_DELIVERIES_SCHEMA.parse_request()
+        authenticate_lecturer(args["email"], args["password"])
+        # Imported here: the delivery stack (smtplib) is only loaded by workers that send mail
+        from app import delivery
+
+        query = {"status": args["status"]} if args["status"] else {}
+        limit = max(1, min(args["limit"], MAX_LIMIT))
+        records = email_deliveries.find(query, DELIVERY_VIEW).sort("created_at", -1).limit(limit)
+
+        return {
+            "summary": delivery.delivery_summary(),
+            "deliveries": [delivery_view(record) for record in records],
+        }, 200
+
+
+# Route
+api.add_resource(EmailDeliveries, "/admin/email/deliveries")
+
+
+class EmailDeadLetters(Resource):
+    def post(self):
+        args = EMAIL_DEAD_LETTERS_SCHEMA.parse_request()
+        authenticate_lecturer(args["email"], args["password"])
+
+        query = {"kind": args["kind"]} if args["kind"] else {}
+        limit = max(1, min(args["limit"], MAX_LIMIT))
+        records = email_dead_letters.find(query, DELIVERY_VIEW).sort("dead_at", -1).limit(limit)
+
+        return {
+            "total": email_dead_letters.count_documents(query),
+            "dead_letters": [delivery_view(record) for record in records],
+        }, 200
+
+
+# Route
+api.add_resource(EmailDeadLetters, "/admin/email/dead-letters")
+
+
+class RequeueEmailDeadLetters(Resource):
+    def post(self):
+        args = REQUEUE_DEAD_LETTERS_SCHEMA.parse_request()
+        authenticate_lecturer(args["email"], args["password"])
+        from app import delivery
+
+        if args["all"]:
+            ids = None
+        elif args["ids"]:
+            try:
+                ids = [ObjectId(record_id) for record_id in args["ids"]]
+            except InvalidId:
+                raise BadRequest("Invalid dead letter id")
+        else:
+            raise BadRequest("Provide the dead letter 'ids' to requeue, or 'all': true")
+
+        # Sent by the retry job on its next run
+        return {"message": "Dead letters requeued", "requeued": delivery.requeue(ids)}, 200
+
+
+# Route
+api.add_resource(RequeueEmailDeadLetters, "/admin/email/dead-letters/requeue")
+
+
+class ArchiveCohort(Resource):
+    def post(self):
+        args = ARCHIVE_COHORT_SCHEMA.parse_request()
+        authenticate_lecturer(args["email"], args["password"])
+
+        cohort = args["cohort"]
+        try:
+            # Moved in batches; safe to repeat if interrupted
+            moved = archive_cohort(cohort, force=args["force"])
+        except ValueError as e:
+            raise BadRequest(str(e))
+
+        return {"message": f"{moved} members of cohort {cohort} archived", "archived": moved}, 200
+
+
+# Route
+api.add_resource(ArchiveCohort, "/admin/archive/cohort")
@@ -0,0 +1,53 @@
+from app.archive import archived_cohorts, archived_members, archived_member
+from app.validation import requested_cohort
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+
+
+bp = Blueprint("archive", __name__)
+api = Api(bp, catch_all_404s=True)
+
+
+class ArchivedCohorts(Resource):
+    def get(self):
+        cohorts = archived_cohorts()
+        if not cohorts:
+            return {"message": "No archived cohorts"}, 404
+
+        return {"cohorts": cohorts}, 200
+
+
+# Route
+api.add_resource(ArchivedCohorts, "/archive/cohorts")
+
+
+class ArchivedCohortMembers(Resource):
+    def get(self, cohort):
+        cohort = requested_cohort({"cohort": cohort})
+        members_list = archived_members(cohort)
+        if not members_list:
+            return {"message": f"No archived members for cohort: {cohort}"}, 404
+
+        return {"cohort": cohort, "total": len(members_list), "members": members_list}, 200
+
+
+# Route
+api.add_resource(ArchivedCohortMembers, "/archive/cohorts/<string:cohort>")
+
+
+class ArchivedStudent(Resource):
+    def get(self):
+        # reg_no contains a "/", so it is passed as ?reg_no=2022/123456
+        reg_no = request.args.get("reg_no", "").strip().upper()
+        if not reg_no:
+            return {"error": "Query 'reg_no' is required"}, 400
+
+        student = archived_member(reg_no)
+        if not student:
+            return {"message": "Archived student not found"}, 404
+
+        return {"student": student}, 200
+
+
+# Route
+api.add_resource(ArchivedStudent, "/archive/student")
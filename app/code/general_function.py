@@ -1,15 +1,26 @@
 from app.utils import *
-from flask import Flask, request
+from app.stats import get_member_stats
+from app.search import SCOPES, search
+from app.metrics import metrics
+from app.idempotency import idempotent
+from app.validation import parse_cohort, requested_cohort
+from app.repositories import student_repo, lecturer_repo, announcement_repo
+from app.broadcast import parse_audience, create_broadcast, start_broadcast, broadcast_progress
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, current_app, request
 from flask_restful import Api, Resource
 import datetime
+import time
 
-from flask import Flask, request
-from flask_restful import Api, Resource
-from pymongo import MongoClient
-import datetime
+
+bp = Blueprint("general", __name__)
+api = Api(bp, catch_all_404s=True)
 
 
 class Announcement(Resource):
+    method_decorators = {"post": [idempotent]}
+
     def post(self):
         data = request.get_json()
         phone_number = data.get("phone_number")
@@ -18,12 +29,19 @@ class Announcement(Resource):
         if not phone_number or not announcement_text:
             return {"error": "phone_number and announcement are required"}, 400
 
+        # ✅ Optional: also email the announcement to members (all, or filtered by role / gender)
+        broadcast = data.get("broadcast") is True
+        try:
+            audience = parse_audience(data.get("audience")) if broadcast else {}
+        except (ValueError, AttributeError) as e:
+            return {"error": str(e) if isinstance(e, ValueError) else "audience must be an object"}, 400
+
         # ✅ Try finding user in 'members' collection first
-        user = members.find_one({"phone_number": phone_number})
+        user = student_repo.get_by_phone(phone_number)
 
         # ✅ If not found, check 'lecturers' collection
         if not user:
-            user = lecturers.find_one({"phone_number": phone_number})
+            user = lecturer_repo.get_by_phone(phone_number)
 
         # ✅ If still not found, return error
         if not user:
@@ -49,10 +67,7 @@ class Announcement(Resource):
             full_name = " ".join([surname, first_name, other_names]).strip()
 
         # ✅ Prevent duplicate announcements
-        existing_announcement = announcement.find_one({
-            "announcement_text": announcement_text
-        })
-        if existing_announcement:
+        if announcement_repo.text_exists(announcement_text):
             return {"error": "This announcement has already been posted"}, 409
 
         # ✅ Save announcement to MongoDB
@@ -64,7 +79,16 @@ class Announcement(Resource):
             "announcement": f"{full_name} says: {announcement_text}",
             "created_at": datetime.datetime.utcnow()
         }
-        announcement.insert_one(announcement_doc)
+        announcement_id = announcement_repo.add(announcement_doc)
+
+        if broadcast:
+            # Delivered in the background; progress at /announcement/broadcasts/<broadcast_id>
+            broadcast_id = create_broadcast(announcement_id, full_name, announcement_text, audience)
+            start_broadcast(current_app._get_current_object(), broadcast_id)
+            return {
+                "message": "Announcement posted successfully, email broadcast started",
+                "broadcast_id": str(broadcast_id)
+            }, 201
 
         return {"message": "Announcement posted successfully"}, 201
 
@@ -73,10 +97,29 @@ class Announcement(Resource):
 api.add_resource(Announcement, "/announcement")
 
 
+class AnnouncementBroadcastProgress(Resource):
+    def get(self, broadcast_id):
+        try:
+            doc = broadcasts.find_one({"_id": ObjectId(broadcast_id)})
+        except InvalidId:
+            return {"error": "Invalid broadcast id"}, 400
+
+        if not doc:
+            return {"message": "Broadcast not found"}, 404
+
+        return broadcast_progress(doc), 200
+
+
+# Route
+api.add_resource(AnnouncementBroadcastProgress, "/announcement/broadcasts/<string:broadcast_id>")
+
+
 class GetAllMembersAndCount(Resource):
     def get(self):
+        # ?cohort=2023 limits both the members and the counts to that cohort
+        cohort = requested_cohort()
         try:            
-            all_members_cursor = members.find({}, {"_id": 0, "password": 0})
+            all_members_cursor = student_repo.listing(cohort=cohort)
             
             # Convert datetime fields to string
             all_members = []
@@ -86,14 +129,11 @@ class GetAllMembersAndCount(Resource):
                         member[key] = value.isoformat()
                 all_members.append(member)
 
-            # Count excos (case-insensitive)
-            total_excos = members.count_documents({"role": {"$regex": "^exco$", "$options": "i"}})
-            
-            # Count students (case-insensitive)
-            total_students = members.count_documents({"role": {"$regex": "^student$", "$options": "i"}})
-            
-            # Count all members
-            total_members = len(all_members)
+            # Counts come from the materialized counters
+            member_stats = get_member_stats(cohort)
+            total_excos = member_stats.get("role", {}).get("exco", 0)
+            total_students = member_stats.get("role", {}).get("student", 0)
+            total_members = member_stats.get("total", len(all_members))
 
             return {
                 "members": all_members,
@@ -112,7 +152,7 @@ api.add_resource(GetAllMembersAndCount, "/members/stats")
 class GetAnnouncement(Resource):
     def get(self):
         # Fetch all announcements from the database
-        all_announcements = list(announcement.find({}, {"_id": 0}))  # Exclude MongoDB _id
+        all_announcements = announcement_repo.listing()
 
         if not all_announcements:
             return {"message": "No announcements found"}, 404
@@ -143,18 +183,17 @@ class GetStudentsByGender(Resource):
             if gender not in ["male", "female"]:
                 return {"error": "Invalid gender. Provide 'male' or 'female'."}, 400
 
-            # Fetch students filtered by gender
-            students_by_gender = list(members.find(
-                {"gender": {"$regex": f"^{gender}$", "$options": "i"}},
-                {"_id": 0, "password": 0}  # Exclude sensitive fields
-            ))
+            try:
+                cohort = parse_cohort(data.get("cohort"))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Fetch students filtered by gender (and cohort, if given)
+            students_by_gender = list(student_repo.listing(gender=gender, cohort=cohort, by_surname=True))
 
             if not students_by_gender:
                 return {"message": f"No students found for gender: {gender}"}, 404
 
-            # Optionally sort alphabetically by surname
-            students_by_gender.sort(key=lambda s: s.get("surname", "").lower())
-
             return {"students": students_by_gender}, 200
 
         except Exception as e:
@@ -162,3 +201,32 @@ class GetStudentsByGender(Resource):
 
 # Route
 api.add_resource(GetStudentsByGender, "/students/by-gender")
+
+
+class SearchMembers(Resource):
+    def get(self):
+        query = request.args.get("q", "").strip()
+        scope = request.args.get("scope", "all").strip().lower()
+        limit = request.args.get("limit", "20").strip()
+
+        if len(query) < 2:
+            return {"error": "Query 'q' must be at least 2 characters"}, 400
+
+        if scope not in SCOPES:
+            return {"error": f"Invalid scope. Provide one of {list(SCOPES)}."}, 400
+
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            return {"error": "Limit must be a number between 1 and 100"}, 400
+
+        try:
+            started = time.perf_counter()
+            results = search(query, scope=scope, limit=int(limit))
+            metrics.observe("search", time.perf_counter() - started)
+
+            return {"query": query, "results": results}, 200
+
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+# Route
+api.add_resource(SearchMembers, "/search")
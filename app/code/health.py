@@ -0,0 +1,64 @@
+from app import mongo
+from app.metrics import metrics
+from config import Config
+from flask import Blueprint
+from flask_restful import Api, Resource
+import pymongo
+import time
+
+
+bp = Blueprint("health", __name__)
+api = Api(bp, catch_all_404s=True)
+
+
+def ping_database() -> dict:
+    """
+    Ping MongoDB within HEALTHCHECK_TIMEOUT_MS.
+    Returns {"ok": bool, "latency_ms": float, ["error": str]}.
+    """
+    started = time.perf_counter()
+    try:
+        # Client-side timeout covers server selection, connection and the command
+        with pymongo.timeout(Config.HEALTHCHECK_TIMEOUT_MS / 1000):
+            mongo.cx.admin.command("ping")
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        return {
+            "ok": False,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "error": str(e),
+        }
+
+
+class HealthCheck(Resource):
+    def get(self):
+        # Liveness: the process is serving requests. The DB status is reported
+        # but does not fail the probe, so a DB outage doesn't restart workers.
+        return {"status": "ok", "database": ping_database()}, 200
+
+
+# Route
+api.add_resource(HealthCheck, "/healthz")
+
+
+class ReadinessCheck(Resource):
+    def get(self):
+        # Readiness: only accept traffic when the DB answers quickly
+        database = ping_database()
+        if not database["ok"]:
+            return {"status": "unavailable", "database": database}, 503
+
+        return {"status": "ready", "database": database}, 200
+
+
+# Route
+api.add_resource(ReadinessCheck, "/readyz")
+
+
+class Metrics(Resource):
+    def get(self):
+        return metrics.snapshot(), 200
+
+
+# Route
+api.add_resource(Metrics, "/metrics")
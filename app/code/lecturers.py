@@ -1,70 +1,65 @@
 from app.utils import *
-from app.email_util import *
-from flask import Flask, jsonify, Response
-from flask_restful import Api, Resource, reqparse
+from app.stats import record_role_change, record_lecturers_added
+from app.search import search_keys
+from app.validation import (
+    LECTURER_SCHEMA, LECTURER_LOGIN_SCHEMA, LECTURER_PASSWORD_CHANGE_SCHEMA,
+    LECTURER_FORGOT_PASSWORD_SCHEMA, LECTURER_RESET_PASSWORD_SCHEMA,
+    ROLE_CHANGE_SCHEMA, STUDENT_PASSWORD_CHANGE_SCHEMA,
+)
+from app.idempotency import idempotent
+from app.projections import LECTURER_LOGIN
+from app.repositories import student_repo, lecturer_repo
+from app.lecturer_directory import sync_lecturers
+from app import standard_reports
+from config import Config
+from flask import Blueprint, jsonify, request
+from flask_restful import Api, Resource
 from werkzeug.exceptions import BadRequest
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.pagesizes import landscape, letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from datetime import datetime, timedelta
 import random
 import bcrypt   
-import io
 
 
-class RegisterLecturer(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("surname", type=str, required=True, help="Surname is required")
-        self.parser.add_argument("first_name", type=str, required=True, help="First name is required")
-        self.parser.add_argument("other_names", type=str, required=False)  # optional
-        self.parser.add_argument("phone_number", type=str, required=True, help="Phone number is required")
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("gender", type=str, required=True, help="Gender is required")
-        self.parser.add_argument("title", type=str, required=False)  # optional
+bp = Blueprint("lecturers", __name__)
+api = Api(bp, catch_all_404s=True)
 
-    def post(self):
-        args = self.parser.parse_args()
-
-        # ✅ Normalize input
-        reg_no = args["reg_no"].strip().upper()
-        surname = normalize_name(args["surname"])
-        first_name = normalize_name(args["first_name"])
-        other_names = normalize_name(args["other_names"]) if args.get("other_names") else None
-        phone_number = normalize_phone(args["phone_number"])
-        email = normalize_email(args["email"])
-        gender = args["gender"].strip().lower()
-        title = args.get("title")
-
-        # ✅ Validate phone number
-        if not is_valid_nigerian_number(phone_number):
-            raise BadRequest("Invalid Nigerian phone number format")
 
-        # ✅ Validate email
-        if not is_valid_gmail(email):
-            raise BadRequest("Invalid Gmail address")
+def lecturer_document(data: dict, hashed_password: str) -> dict:
+    """Lecturer document from a row validated by LECTURER_SCHEMA."""
+    new_lecturer = {
+        "reg_no": data["reg_no"],   # 🔑 Primary Key
+        "surname": data["surname"],
+        "first_name": data["first_name"],
+        "other_names": data["other_names"],
+        "phone_number": data["phone_number"],
+        "email": data["email"],
+        "gender": normalize_word(data["gender"]),
+        "title": data["title"],
+        "role": "lecturer",
+        "password": hashed_password
+    }
+    new_lecturer.update(search_keys(new_lecturer))
+    return with_keys(new_lecturer)
 
-        # ✅ Validate gender
-        if gender not in ["male", "female"]:
-            raise BadRequest("Gender must be either 'Male' or 'Female'")
 
-        # ✅ Validate title
-        if title:
-            title = title.strip().capitalize()
-            if title not in ["Dr", "Prof"]:
-                raise BadRequest("Title must be either 'Dr' or 'Prof'")
-        else:
-            title = None  # default if not provided
+class RegisterLecturer(Resource):
+    method_decorators = {"post": [idempotent]}
+
+    def post(self):
+        # ✅ Normalize & validate input (see app/validation.py)
+        data = LECTURER_SCHEMA.parse_request()
+        reg_no = data["reg_no"]
+        phone_number = data["phone_number"]
+        email = data["email"]
 
         # ✅ Check duplicates (reg_no, phone, email)
-        if lecturers.find_one({"reg_no": reg_no}):
+        if lecturer_repo.exists("reg_no", reg_no):
             raise BadRequest("A lecturer with this registration number already exists")
 
-        if lecturers.find_one({"phone_number": phone_number}):
+        if lecturer_repo.exists("phone_number", phone_number):
             raise BadRequest("A lecturer with this phone number already exists")
 
-        if lecturers.find_one({"email": email}):
+        if lecturer_repo.exists("email", email):
             raise BadRequest("A lecturer with this email already exists")
 
         # ✅ Default password (six zeros)
@@ -74,23 +69,14 @@ class RegisterLecturer(Resource):
         hashed_password = bcrypt.hashpw(default_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Save new lecturer
-        new_lecturer = {
-            "reg_no": reg_no,   # 🔑 Primary Key
-            "surname": surname,
-            "first_name": first_name,
-            "other_names": other_names,
-            "phone_number": phone_number,
-            "email": email,
-            "gender": normalize_word(gender),
-            "title": title,
-            "role": "lecturer",
-            "password": hashed_password
-        }
-        lecturers.insert_one(new_lecturer)
+        new_lecturer = lecturer_document(data, hashed_password)
+        lecturer_repo.add(new_lecturer)
+        record_lecturers_added()
+        sync_lecturers([new_lecturer])
 
         # ✅ Build full name with/without title
-        full_name = f"{surname} {first_name}" + (f" {other_names}" if other_names else "")
-        lecturer_name = f"{title} {full_name}" if title else full_name
+        full_name = f"{data['surname']} {data['first_name']}" + (f" {data['other_names']}" if data["other_names"] else "")
+        lecturer_name = f"{data['title']} {full_name}" if data["title"] else full_name
 
         # ✅ Send welcome email
         EmailSender.send_welcome_email_lecturer(
@@ -111,21 +97,15 @@ api.add_resource(RegisterLecturer, "/api/register/lecturer")
 
 
 class DemoteExco(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Lecturer password is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Student reg_no is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = ROLE_CHANGE_SCHEMA.parse_request()
 
-        email = normalize_email(args["email"])
+        email = args["email"]
         password = args["password"]
-        reg_no = args["reg_no"].strip().upper()
+        reg_no = args["reg_no"]
 
         # ✅ Check lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("Lecturer not found")
 
@@ -138,7 +118,7 @@ class DemoteExco(Resource):
             raise BadRequest("Invalid password")
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student not found")
 
@@ -151,10 +131,8 @@ class DemoteExco(Resource):
             return jsonify({"message": "This user is already a student"})
 
         # ✅ Update role from exco → student
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"role": "Student"}}
-        )
+        if student_repo.change_role(reg_no, student["role"], "Student"):
+            record_role_change("Exco", "Student", student.get("cohort"))
 
         # ✅ Send notification email to student
         student_email = student.get("email")
@@ -177,21 +155,15 @@ api.add_resource(DemoteExco, "/api/demote/student")
 
 
 class PromoteStudent(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Lecturer password is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Student reg_no is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = ROLE_CHANGE_SCHEMA.parse_request()
 
-        email = normalize_email(args["email"])
+        email = args["email"]
         password = args["password"]
-        reg_no = args["reg_no"].strip().upper()
+        reg_no = args["reg_no"]
 
         # ✅ Check lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("Lecturer not found")
 
@@ -204,7 +176,7 @@ class PromoteStudent(Resource):
             raise BadRequest("Invalid password")
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student not found")
 
@@ -218,10 +190,8 @@ class PromoteStudent(Resource):
             return jsonify({"message": "This student is already an Exco"})
 
         # ✅ Update role from student → exco
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"role": "Exco"}}
-        )
+        if student_repo.change_role(reg_no, student["role"], "Exco"):
+            record_role_change("Student", "Exco", student.get("cohort"))
 
         # ✅ Send notification email to student
         student_email = student.get("email")
@@ -247,82 +217,11 @@ api.add_resource(PromoteStudent, "/api/promote/student")
 class DownloadAllLecturers(Resource):
     def get(self):
         try:
-            # Fetch lecturers, exclude _id and password
-            lecturers_list = list(lecturers.find({}, {"_id": 0, "password": 0}))
-
-            if not lecturers_list:
+            # Lecturers sorted alphabetically by surname
+            response = standard_reports.report_response("lecturers", "All_Lecturers.pdf")
+            if response is None:
                 return {"message": "No lecturers found"}, 404
 
-            # Sort lecturers alphabetically by surname
-            lecturers_list = sorted(lecturers_list, key=lambda s: s.get("surname", "").lower())
-
-            # PDF in memory
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(
-                output,
-                pagesize=landscape(letter),
-                leftMargin=20,
-                rightMargin=20,
-                topMargin=20,
-                bottomMargin=20,
-            )
-            elements = []
-
-            styles = getSampleStyleSheet()
-            elements.append(Paragraph("All Lecturers List", styles['Title']))
-
-            # Add table headings (S/N + lecturer fields)
-            headers = ["S/N"] + list(lecturers_list[0].keys())
-            data = [headers]
-
-            # Add rows with numbering
-            for idx, lec in enumerate(lecturers_list, start=1):
-                row = [idx] + [str(v) for v in lec.values()]
-                data.append(row)
-
-            # --- Fit table into page width ---
-            page_width, _ = landscape(letter)
-            usable_width = page_width - doc.leftMargin - doc.rightMargin
-
-            # Divide usable width equally among columns
-            col_count = len(headers)
-            col_widths = [usable_width / col_count] * col_count
-
-            # Use Paragraphs for wrapping text
-            wrapped_data = []
-            for row in data:
-                wrapped_row = []
-                for cell in row:
-                    style = styles['Normal']
-                    style.fontSize = 8
-                    style.leading = 10
-                    wrapped_row.append(Paragraph(str(cell), style))
-                wrapped_data.append(wrapped_row)
-
-            # Create table with fitted widths
-            table = Table(wrapped_data, colWidths=col_widths, repeatRows=1)
-
-            # Style
-            table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (0, -1), "CENTER"),  # S/N center
-                ("ALIGN", (1, 0), (-1, -1), "LEFT"),   # Other fields left
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),     # Smaller font
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-            ]))
-
-            elements.append(table)
-            doc.build(elements)
-
-            pdf_data = output.getvalue()
-            output.close()
-
-            # Prepare response
-            response = Response(pdf_data, mimetype="application/pdf")
-            response.headers["Content-Disposition"] = "attachment; filename=All_Lecturers.pdf"
             return response
 
         except Exception as e:
@@ -334,17 +233,10 @@ api.add_resource(DownloadAllLecturers, "/lecturers/download-all")
 
 
 class ChangeLecturerPassword(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("previous_password", type=str, required=True, help="Previous password is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = LECTURER_PASSWORD_CHANGE_SCHEMA.parse_request()
 
-        # ✅ Normalize email
-        email = normalize_email(args["email"])
+        email = args["email"]
         previous_password = args["previous_password"]
         new_password = args["new_password"]
 
@@ -353,7 +245,7 @@ class ChangeLecturerPassword(Resource):
             raise BadRequest("Invalid Gmail address")
 
         # 🔎 Check lecturer existence
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             return {"message": "Lecturer not found"}, 404
 
@@ -365,10 +257,7 @@ class ChangeLecturerPassword(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # 📝 Update DB
-        lecturers.update_one(
-            {"email": email},
-            {"$set": {"password": hashed_password}}
-        )
+        lecturer_repo.set_password(hashed_password, email=email)
 
         # ✅ Build lecturer full name
         full_name = f"{lecturer.get('surname')} {lecturer.get('first_name')}"
@@ -389,16 +278,12 @@ api.add_resource(ChangeLecturerPassword, "/api/lecturer/change_password")
 
 
 class ForgotPasswordLecturer(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-
     def post(self):
-        args = self.parser.parse_args()
-        email = args["email"].strip().lower()
+        args = LECTURER_FORGOT_PASSWORD_SCHEMA.parse_request()
+        email = args["email"]
 
         # ✅ Check if lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("No lecturer found with this email")
 
@@ -427,10 +312,7 @@ class ForgotPasswordLecturer(Resource):
         expiry_time = datetime.utcnow() + timedelta(minutes=5)
 
         # ✅ Save OTP & expiry in DB
-        lecturers.update_one(
-            {"email": email},
-            {"$set": {"reset_otp": otp, "otp_expiry": expiry_time}}
-        )
+        lecturer_repo.set_otp(email, otp, expiry_time)
 
         # ✅ Send OTP email
         EmailSender.send_lecturer_otp_email(
@@ -450,20 +332,14 @@ api.add_resource(ForgotPasswordLecturer, "/api/lecturer/forgot-password")
 
 
 class LecturerResetPasswordUsingOTP(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-        self.parser.add_argument("otp", type=str, required=True, help="OTP is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
-
     def post(self):
-        args = self.parser.parse_args()
-        email = args["email"].strip().lower()
-        otp = args["otp"].strip()
-        new_password = args["new_password"].strip()
+        args = LECTURER_RESET_PASSWORD_SCHEMA.parse_request()
+        email = args["email"]
+        otp = args["otp"]
+        new_password = args["new_password"]
 
         # ✅ Check if lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("No lecturer found with this email")
 
@@ -481,11 +357,7 @@ class LecturerResetPasswordUsingOTP(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Update password in DB and remove OTP fields
-        lecturers.update_one(
-            {"email": email},
-            {"$set": {"password": hashed_password},
-             "$unset": {"reset_otp": "", "otp_expiry": ""}}
-        )
+        lecturer_repo.set_password(hashed_password, email=email, clear_otp=True)
 
         return jsonify({
             "message": "Lecturer password has been successfully reset."
@@ -496,18 +368,13 @@ class LecturerResetPasswordUsingOTP(Resource):
 api.add_resource(LecturerResetPasswordUsingOTP, "/api/lecturer/reset-password-using-otp")
 
 class LecturerLogin(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Lecturer registration number is required")
-        self.parser.add_argument("password", type=str, required=True, help="Password is required")
-
     def post(self):
-        args = self.parser.parse_args()
-        reg_no = args["reg_no"].strip().upper()
-        password = args["password"].strip()
+        args = LECTURER_LOGIN_SCHEMA.parse_request()
+        reg_no = args["reg_no"]
+        password = args["password"]
 
-        # ✅ Check if lecturer exists by reg_no
-        lecturer = lecturers.find_one({"reg_no": reg_no})
+        # ✅ Check if lecturer exists by reg_no (password hash + profile fields only)
+        lecturer = lecturer_repo.get_by_reg_no(reg_no, LECTURER_LOGIN)
         if not lecturer:
             return {"error": "Invalid registration number or password"}, 401
 
@@ -519,8 +386,8 @@ class LecturerLogin(Resource):
         # Optional: Generate JWT token if needed
         # token = create_jwt_for_lecturer(lecturer)
 
-        # ✅ Return lecturer info excluding password
-        lecturer_info = {k: v for k, v in lecturer.items() if k not in ["_id", "password"]}
+        # ✅ Return the slim profile excluding password
+        lecturer_info = {k: v for k, v in lecturer.items() if k != "password"}
 
         return jsonify({
             "message": "Login successful",
@@ -534,58 +401,23 @@ api.add_resource(LecturerLogin, "/api/lecturer/login")
 
 
 class RegisterLecturerNoMail(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("surname", type=str, required=True, help="Surname is required")
-        self.parser.add_argument("first_name", type=str, required=True, help="First name is required")
-        self.parser.add_argument("other_names", type=str, required=False)  # optional
-        self.parser.add_argument("phone_number", type=str, required=True, help="Phone number is required")
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("gender", type=str, required=True, help="Gender is required")
-        self.parser.add_argument("title", type=str, required=False)  # optional
+    method_decorators = {"post": [idempotent]}
 
     def post(self):
-        args = self.parser.parse_args()
-
-        # ✅ Normalize input
-        reg_no = args["reg_no"].strip().upper()
-        surname = normalize_name(args["surname"])
-        first_name = normalize_name(args["first_name"])
-        other_names = normalize_name(args["other_names"]) if args.get("other_names") else None
-        phone_number = normalize_phone(args["phone_number"])
-        email = normalize_email(args["email"])
-        gender = args["gender"].strip().lower()
-        title = args.get("title")
-
-        # ✅ Validate phone number
-        if not is_valid_nigerian_number(phone_number):
-            raise BadRequest("Invalid Nigerian phone number format")
-
-        # ✅ Validate email
-        if not is_valid_gmail(email):
-            raise BadRequest("Invalid Gmail address")
-
-        # ✅ Validate gender
-        if gender not in ["male", "female"]:
-            raise BadRequest("Gender must be either 'Male' or 'Female'")
-
-        # ✅ Validate title
-        if title:
-            title = title.strip().capitalize()
-            if title not in ["Dr", "Prof"]:
-                raise BadRequest("Title must be either 'Dr' or 'Prof'")
-        else:
-            title = None  # default if not provided
+        # ✅ Normalize & validate input (see app/validation.py)
+        data = LECTURER_SCHEMA.parse_request()
+        reg_no = data["reg_no"]
+        phone_number = data["phone_number"]
+        email = data["email"]
 
         # ✅ Check duplicates (reg_no, phone, email)
-        if lecturers.find_one({"reg_no": reg_no}):
+        if lecturer_repo.exists("reg_no", reg_no):
             raise BadRequest("A lecturer with this registration number already exists")
 
-        if lecturers.find_one({"phone_number": phone_number}):
+        if lecturer_repo.exists("phone_number", phone_number):
             raise BadRequest("A lecturer with this phone number already exists")
 
-        if lecturers.find_one({"email": email}):
+        if lecturer_repo.exists("email", email):
             raise BadRequest("A lecturer with this email already exists")
 
         # ✅ Default password (six zeros)
@@ -595,19 +427,10 @@ class RegisterLecturerNoMail(Resource):
         hashed_password = bcrypt.hashpw(default_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Save new lecturer
-        new_lecturer = {
-            "reg_no": reg_no,   # 🔑 Primary Key
-            "surname": surname,
-            "first_name": first_name,
-            "other_names": other_names,
-            "phone_number": phone_number,
-            "email": email,
-            "gender": normalize_word(gender),
-            "title": title,
-            "role": "lecturer",
-            "password": hashed_password
-        }
-        lecturers.insert_one(new_lecturer)
+        new_lecturer = lecturer_document(data, hashed_password)
+        lecturer_repo.add(new_lecturer)
+        record_lecturers_added()
+        sync_lecturers([new_lecturer])
 
         return jsonify({
             "message": "Lecturer registered successfully (no email sent)"
@@ -618,23 +441,75 @@ class RegisterLecturerNoMail(Resource):
 api.add_resource(RegisterLecturerNoMail, "/api/v1/register_lecturer_no_mail")
 
 
-class ChangeLecturerPasswordNoMail(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("previous_password", type=str, required=True, help="Previous password is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
+class BulkRegisterLecturersNoMail(Resource):
+    method_decorators = {"post": [idempotent]}
 
     def post(self):
-        args = self.parser.parse_args()
+        data = request.get_json(silent=True) or {}
+        records = data.get("lecturers")
+
+        if not isinstance(records, list) or not records:
+            return {"error": "A non-empty 'lecturers' list is required"}, 400
+
+        if len(records) > Config.BULK_REGISTER_MAX:
+            return {"error": f"At most {Config.BULK_REGISTER_MAX} lecturers can be registered at once"}, 400
+
+        # ✅ Validate the whole batch column-wise
+        rows, mask, errors = LECTURER_SCHEMA.validate_batch(records)
+
+        # ✅ Check duplicates (reg_no, phone, email) against the database in one query
+        valid = [i for i, ok in enumerate(mask) if ok]
+        existing = lecturer_repo.find_existing(
+            [rows[i]["reg_no"] for i in valid],
+            [rows[i]["phone_number"] for i in valid],
+            [rows[i]["email"] for i in valid],
+        )
+        taken = {field: {lec.get(field) for lec in existing} for field in ("reg_no", "phone_number", "email")}
+        messages = {
+            "reg_no": "A lecturer with this registration number already exists",
+            "phone_number": "A lecturer with this phone number already exists",
+            "email": "A lecturer with this email already exists",
+        }
+
+        to_insert = []
+        for i in valid:
+            duplicate = next((field for field in ("reg_no", "phone_number", "email") if rows[i][field] in taken[field]), None)
+            if duplicate:
+                errors.append({"row": i, "field": duplicate, "error": messages[duplicate]})
+            else:
+                to_insert.append(rows[i])
+
+        if to_insert:
+            # ✅ Every row gets the same well-known default password, so it is hashed once per batch
+            hashed_password = bcrypt.hashpw("000000".encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+            new_lecturers = [lecturer_document(row, hashed_password) for row in to_insert]
+            lecturer_repo.add_many(new_lecturers)
+            record_lecturers_added(len(to_insert))
+            sync_lecturers(new_lecturers)
+
+        errors.sort(key=lambda e: e["row"])
+        return {
+            "message": f"{len(to_insert)} of {len(records)} lecturers registered (no email sent)",
+            "registered": len(to_insert),
+            "errors": errors
+        }, 200 if to_insert else 400
+
+
+# ✅ Register endpoint
+api.add_resource(BulkRegisterLecturersNoMail, "/api/v1/register_lecturers_bulk_no_mail")
+
+
+class ChangeLecturerPasswordNoMail(Resource):
+    def post(self):
+        args = STUDENT_PASSWORD_CHANGE_SCHEMA.parse_request()
 
         # 🆔 Extract parameters
-        reg_no = args["reg_no"].strip().upper()
+        reg_no = args["reg_no"]
         previous_password = args["previous_password"]
         new_password = args["new_password"]
 
         # 🔎 Check lecturer existence by registration number
-        lecturer = lecturers.find_one({"reg_no": reg_no})
+        lecturer = lecturer_repo.get_by_reg_no(reg_no)
         if not lecturer:
             return {"message": "Lecturer not found"}, 404
 
@@ -646,10 +521,7 @@ class ChangeLecturerPasswordNoMail(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # 📝 Update DB
-        lecturers.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"password": hashed_password}}
-        )
+        lecturer_repo.set_password(hashed_password, reg_no=reg_no)
 
         return jsonify({
             "message": "Password updated successfully"
@@ -661,21 +533,15 @@ api.add_resource(ChangeLecturerPasswordNoMail, "/api/lecturer/change_password_No
 
 
 class DemoteExcoNoMail(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Lecturer password is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Student reg_no is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = ROLE_CHANGE_SCHEMA.parse_request()
 
-        email = normalize_email(args["email"])
+        email = args["email"]
         password = args["password"]
-        reg_no = args["reg_no"].strip().upper()
+        reg_no = args["reg_no"]
 
         # ✅ Check lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("Lecturer not found")
 
@@ -688,7 +554,7 @@ class DemoteExcoNoMail(Resource):
             raise BadRequest("Invalid password")
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student not found")
 
@@ -701,10 +567,8 @@ class DemoteExcoNoMail(Resource):
             return jsonify({"message": "This user is already a student"})
 
         # ✅ Update role from exco → student
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"role": "Student"}}
-        )
+        if student_repo.change_role(reg_no, student["role"], "Student"):
+            record_role_change("Exco", "Student", student.get("cohort"))
 
         return jsonify({
             "message": f"Student with reg_no {reg_no} has been demoted from Exco to Student"
@@ -716,21 +580,15 @@ api.add_resource(DemoteExcoNoMail, "/api/demote/student_NoMail")
 
 
 class PromoteStudentNoMail(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("email", type=str, required=True, help="Lecturer email is required")
-        self.parser.add_argument("password", type=str, required=True, help="Lecturer password is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Student reg_no is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = ROLE_CHANGE_SCHEMA.parse_request()
 
-        email = normalize_email(args["email"])
+        email = args["email"]
         password = args["password"]
-        reg_no = args["reg_no"].strip().upper()
+        reg_no = args["reg_no"]
 
         # ✅ Check lecturer exists
-        lecturer = lecturers.find_one({"email": email})
+        lecturer = lecturer_repo.get_by_email(email)
         if not lecturer:
             raise BadRequest("Lecturer not found")
 
@@ -743,7 +601,7 @@ class PromoteStudentNoMail(Resource):
             raise BadRequest("Invalid password")
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student not found")
 
@@ -757,10 +615,8 @@ class PromoteStudentNoMail(Resource):
             return jsonify({"message": "This student is already an Exco"})
 
         # ✅ Update role from student → exco
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"role": "Exco"}}
-        )
+        if student_repo.change_role(reg_no, student["role"], "Exco"):
+            record_role_change("Student", "Exco", student.get("cohort"))
 
         return jsonify({
             "message": f"Student with reg_no {reg_no} has been promoted from Student to Exco"
@@ -1,81 +1,68 @@
 from app.utils import *
-from app.email_util import *
-from flask import Flask, jsonify, Response, request
-from flask_restful import Api, Resource, reqparse
+from config import Config
+from app.cache import lecturer_directory_cache, grouping_pdf_cache
+from app.grouping import grouping_key, get_or_create_grouping, grouping_summary
+from app.stats import get_member_stats, record_member_added, record_members_added
+from app.search import search_keys
+from app.validation import (
+    STUDENT_SCHEMA, STUDENT_LOGIN_SCHEMA, STUDENT_PASSWORD_CHANGE_SCHEMA,
+    STUDENT_FORGOT_PASSWORD_SCHEMA, STUDENT_RESET_PASSWORD_SCHEMA, GROUPING_SCHEMA,
+    cohort_of, parse_cohort, requested_cohort,
+)
+from app.idempotency import idempotent
+from app.projections import MEMBER_LOGIN
+from app.repositories import student_repo, lecturer_repo, grouping_repo
+from app import standard_reports
+from flask import Blueprint, Response, jsonify, request
+from flask_restful import Api, Resource
 from werkzeug.exceptions import BadRequest
 import bcrypt   
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from datetime import datetime, timedelta
 import random
-import io, os
+import json
+
+
+bp = Blueprint("student", __name__)
+api = Api(bp, catch_all_404s=True)
+
+
+def student_document(data: dict, hashed_password: str) -> dict:
+    """Member document from a row validated by STUDENT_SCHEMA."""
+    new_user = {
+        "surname": data["surname"],
+        "first_name": data["first_name"],
+        "other_names": data["other_names"],
+        "admission_type": normalize_word(data["admission_type"]),
+        "phone_number": data["phone_number"],
+        "email": data["email"],
+        "gender": normalize_word(data["gender"]),
+        "role": normalize_word(data["role"]),
+        "reg_no": data["reg_no"],
+        "cohort": cohort_of(data["reg_no"]),
+        "password": hashed_password
+    }
+    new_user.update(search_keys(new_user))
+    return with_keys(new_user)
 
 
 class Register(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("surname", type=str, required=True, help="Surname is required")
-        self.parser.add_argument("first_name", type=str, required=True, help="First name is required")
-        self.parser.add_argument("other_names", type=str, required=False)  # optional
-        self.parser.add_argument("admission_type", type=str, required=True, help="Admission type is required")
-        self.parser.add_argument("phone_number", type=str, required=True, help="Phone number is required")
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("gender", type=str, required=True, help="Gender is required")
-        self.parser.add_argument("role", type=str, required=True, help="Role is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
+    method_decorators = {"post": [idempotent]}
 
     def post(self):
-        args = self.parser.parse_args()
-
-        # Normalize input
-        surname = normalize_name(args["surname"])
-        first_name = normalize_name(args["first_name"])
-        other_names = normalize_name(args["other_names"]) if args.get("other_names") else None
-        admission_type = args["admission_type"].strip().lower()
-        phone_number = normalize_phone(args["phone_number"])
-        email = normalize_email(args["email"])
-        gender = args["gender"].strip().lower()
-        role = args["role"].strip().lower()
-        reg_no = args["reg_no"].strip().upper()
-
-        # ✅ Validate admission type
-        valid_admission_types = ["utme", "direct entry", "transfer admission"]
-        if admission_type not in valid_admission_types:
-            raise BadRequest(f"Admission type must be one of {valid_admission_types}")
-
-        # ✅ Validate phone number
-        if not is_valid_nigerian_number(phone_number):
-            raise BadRequest("Invalid Nigerian phone number format")
-
-        # ✅ Validate email format
-        if not is_valid_gmail(email):
-            raise BadRequest("Invalid Gmail address")
+        # ✅ Normalize & validate input (see app/validation.py)
+        data = STUDENT_SCHEMA.parse_request()
+        surname = data["surname"]
+        first_name = data["first_name"]
+        other_names = data["other_names"]
+        email = data["email"]
+        reg_no = data["reg_no"]
 
         # ✅ Check duplicate email
-        if members.find_one({"email": email}):
+        if student_repo.exists("email", email):
             raise BadRequest("A user with this email already exists")
 
-        # ✅ Validate gender
-        if gender not in ["male", "female"]:
-            raise BadRequest("Gender must be either 'Male' or 'Female'")
-
-        # ✅ Validate role
-        if role not in ["student", "exco"]:
-            raise BadRequest("Role must be one of ['Student', 'Exco']")
-
-        # ✅ Validate Reg No format
-        if not reg_no.startswith("2022/"):
-            raise BadRequest("Registration number must start with '2022/'")
-        if "/" not in reg_no[4:]:
-            raise BadRequest("Registration number must contain '/' after the first 4 digits")
-        if len(reg_no) > 11:
-            raise BadRequest("Registration number must not exceed 11 characters")
-
         # ✅ Check duplicate reg no
-        if members.find_one({"reg_no": reg_no}):
+        if student_repo.exists("reg_no", reg_no):
             raise BadRequest("A user with this registration number already exists")
 
         # ✅ Default password (always six zeros)
@@ -85,19 +72,9 @@ class Register(Resource):
         hashed_password = bcrypt.hashpw(default_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # Save new user
-        new_user = {
-            "surname": surname,
-            "first_name": first_name,
-            "other_names": other_names,
-            "admission_type": normalize_word(admission_type),
-            "phone_number": phone_number,
-            "email": email,
-            "gender": normalize_word(gender),
-            "role": normalize_word(role),
-            "reg_no": reg_no,
-            "password": hashed_password
-        }
-        members.insert_one(new_user)
+        new_user = student_document(data, hashed_password)
+        student_repo.add(new_user)
+        record_member_added(new_user)
 
         # Send welcome email
         full_name = f"{surname} {first_name}" + (f" {other_names}" if other_names else "")
@@ -121,89 +98,11 @@ api.add_resource(Register, "/api/register")
 
 class DownloadStudents(Resource):
     def get(self):
-        students = list(members.find({}, {"_id": 0, "password": 0}))
-        
-        if not students:
+        # Pre-rendered copy when still current, otherwise rendered now (?cohort=2023: that cohort only)
+        response = standard_reports.report_response("students", "026 Students.pdf", requested_cohort())
+        if response is None:
             return {"message": "No students found"}, 404
 
-        output = io.BytesIO()
-        doc = SimpleDocTemplate(
-            output,
-            pagesize=landscape(letter),
-            leftMargin=15,
-            rightMargin=15,
-            topMargin=15,
-            bottomMargin=15
-        )
-        elements = []
-
-        styles = getSampleStyleSheet()
-        normal_style = styles["Normal"]
-        normal_style.fontSize = 9
-        normal_style.leading = 11
-        normal_style.wordWrap = 'CJK'
-
-        # Title
-        elements.append(Paragraph("026 Students", styles['Title']))
-        elements.append(Spacer(1, 10))
-
-        # Table headers
-        headers = ["S/N"] + list(students[0].keys())
-        data = [headers]
-
-        # Build table rows with proper order and wrapping
-        for idx, s in enumerate(students, start=1):
-            row = [Paragraph(str(idx), normal_style)]
-            for key in students[0].keys():
-                value = s.get(key, "")
-                row.append(Paragraph(str(value), normal_style))
-            data.append(row)
-
-        # Calculate page width
-        page_width = doc.pagesize[0] - doc.leftMargin - doc.rightMargin
-
-        # Assign column widths carefully
-        col_widths = []
-        for col in headers:
-            if col.lower() in ["s/n"]:
-                col_widths.append(1.3)  # S/N wide enough for 4 digits
-            elif "email" in col.lower() or "address" in col.lower() or "name" in col.lower():
-                col_widths.append(4.0)  # allow wrapping
-            elif "phone" in col.lower():
-                col_widths.append(2.5)
-            else:
-                col_widths.append(2.0)
-
-        total_weight = sum(col_widths)
-        scaled_widths = [(w / total_weight) * page_width for w in col_widths]
-
-        table = Table(data, colWidths=scaled_widths, repeatRows=1)
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.darkblue),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 5),
-            ("TOPPADDING", (0, 0), (-1, 0), 5),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
-        ]))
-
-        elements.append(table)
-        doc.build(elements)
-
-        pdf_data = output.getvalue()
-        output.close()
-
-        downloads_path = os.path.join(os.getcwd(), "Downloads")
-        os.makedirs(downloads_path, exist_ok=True)
-        file_path = os.path.join(downloads_path, "026 Students.pdf")
-        with open(file_path, "wb") as f:
-            f.write(pdf_data)
-
-        response = Response(pdf_data, mimetype="application/pdf")
-        response.headers["Content-Disposition"] = "attachment; filename=026 Students.pdf"
         return response
 
 # Route
@@ -213,99 +112,11 @@ api.add_resource(DownloadStudents, "/students/download")
 
 class DownloadSortedStudents(Resource):
     def get(self):
-        # Fetch students, exclude _id and password
-        students = list(members.find({}, {"_id": 0, "password": 0}))
-        if not students:
+        # Students sorted alphabetically by surname
+        response = standard_reports.report_response("students_sorted", "026 Students.pdf", requested_cohort())
+        if response is None:
             return {"message": "No students found"}, 404
 
-        # Sort students alphabetically by surname
-        students = sorted(students, key=lambda s: s.get("surname", "").lower())
-
-        # PDF in memory
-        output = io.BytesIO()
-        doc = SimpleDocTemplate(
-            output,
-            pagesize=landscape(letter),
-            leftMargin=20,
-            rightMargin=20,
-            topMargin=20,
-            bottomMargin=20,
-        )
-        elements = []
-
-        styles = getSampleStyleSheet()
-        normal_style = styles["Normal"]
-        normal_style.fontSize = 9
-        normal_style.leading = 11
-        normal_style.wordWrap = 'CJK'
-
-        # Title
-        elements.append(Paragraph("026 Students List", styles['Title']))
-        elements.append(Spacer(1, 10))
-
-        # Table headers
-        headers = ["S/N"] + list(students[0].keys())
-        data = [headers]
-
-        # Add rows with numbering in header order
-        for idx, s in enumerate(students, start=1):
-            row = [idx]
-            for key in students[0].keys():
-                row.append(s.get(key, ""))
-            data.append(row)
-
-        # Calculate page width
-        page_width = doc.pagesize[0] - doc.leftMargin - doc.rightMargin
-
-        # Assign column widths carefully
-        col_widths = []
-        for col in headers:
-            if col.lower() in ["s/n"]:
-                col_widths.append(1.3)  # S/N wide enough for 4 digits
-            elif "email" in col.lower() or "address" in col.lower() or "name" in col.lower():
-                col_widths.append(4.0)  # allow wrapping
-            elif "phone" in col.lower():
-                col_widths.append(2.5)
-            else:
-                col_widths.append(2.0)
-
-        total_weight = sum(col_widths)
-        scaled_widths = [(w / total_weight) * page_width for w in col_widths]
-
-        # Wrap all cell data with Paragraph
-        wrapped_data = []
-        for row in data:
-            wrapped_row = []
-            for cell in row:
-                wrapped_row.append(Paragraph(str(cell), normal_style))
-            wrapped_data.append(wrapped_row)
-
-        # Create table
-        table = Table(wrapped_data, colWidths=scaled_widths, repeatRows=1)
-
-        # Style table
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.darkblue),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (0, -1), "CENTER"),   # S/N center
-            ("ALIGN", (1, 0), (-1, -1), "LEFT"),    # other fields left
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-            ("TOPPADDING", (0, 0), (-1, 0), 6),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-
-        elements.append(table)
-        doc.build(elements)
-
-        pdf_data = output.getvalue()
-        output.close()
-
-        # Prepare response
-        response = Response(pdf_data, mimetype="application/pdf")
-        response.headers["Content-Disposition"] = "attachment; filename=026 Students.pdf"
         return response
 
 
@@ -316,84 +127,11 @@ api.add_resource(DownloadSortedStudents, "/students/download-sorted")
 
 class DownloadExcos(Resource):
     def get(self):
-        # Fetch excos only, exclude _id and password
-        excos = list(members.find(
-            {"role": {"$regex": "^exco$", "$options": "i"}},
-            {"_id": 0, "password": 0}
-        ))
-        if not excos:
+        # Excos only, sorted alphabetically by surname
+        response = standard_reports.report_response("excos", "026_Excos.pdf", requested_cohort())
+        if response is None:
             return {"message": "No excos found"}, 404
 
-        # Sort excos alphabetically by surname
-        excos = sorted(excos, key=lambda e: e.get("surname", "").lower())
-
-        # PDF in memory
-        output = io.BytesIO()
-        doc = SimpleDocTemplate(
-            output,
-            pagesize=landscape(letter),
-            leftMargin=20,
-            rightMargin=20,
-            topMargin=20,
-            bottomMargin=20,
-        )
-        elements = []
-
-        styles = getSampleStyleSheet()
-        elements.append(Paragraph("026 Excos List", styles['Title']))
-
-        # Add table headings (S/N + exco fields)
-        headers = ["S/N"] + list(excos[0].keys())
-        data = [headers]
-
-        # Add rows with numbering
-        for idx, e in enumerate(excos, start=1):
-            row = [idx] + [str(v) for v in e.values()]
-            data.append(row)
-
-        # --- Fit table into page width ---
-        page_width, _ = landscape(letter)
-        usable_width = page_width - doc.leftMargin - doc.rightMargin
-
-        # Divide usable width equally among columns
-        col_count = len(headers)
-        col_widths = [usable_width / col_count] * col_count
-
-        # Use Paragraphs for wrapping text
-        wrapped_data = []
-        for r, row in enumerate(data):
-            wrapped_row = []
-            for c, cell in enumerate(row):
-                style = styles['Normal']
-                style.fontSize = 8
-                style.leading = 10
-                wrapped_row.append(Paragraph(str(cell), style))
-            wrapped_data.append(wrapped_row)
-
-        # Create table with fitted widths
-        table = Table(wrapped_data, colWidths=col_widths, repeatRows=1)
-
-        # Style
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (0, -1), "CENTER"),  # S/N center
-            ("ALIGN", (1, 0), (-1, -1), "LEFT"),   # Other fields left
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, -1), 8),     # Smaller font
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-
-        elements.append(table)
-        doc.build(elements)
-
-        pdf_data = output.getvalue()
-        output.close()
-
-        # Prepare response
-        response = Response(pdf_data, mimetype="application/pdf")
-        response.headers["Content-Disposition"] = "attachment; filename=026_Excos.pdf"
         return response
 
 
@@ -414,100 +152,20 @@ class DownloadMembersByGender(Resource):
                 return {"error": "A data field 'gender' is required and should not be empty"}, 400
 
             gender = data["gender"].lower()
-            if gender not in ["male", "female"]:
-                return {"error": "Invalid gender. Please provide 'male' or 'female'."}, 400
-
-            # Fetch all members filtered by gender
-            members_by_gender = list(members.find(
-                {"gender": {"$regex": f"^{gender}$", "$options": "i"}},
-                {"_id": 0, "password": 0}
-            ))
-            if not members_by_gender:
+            if gender not in ["male", "female", "all"]:
+                return {"error": "Invalid gender. Please provide 'male', 'female' or 'all'."}, 400
+
+            try:
+                cohort = parse_cohort(data.get("cohort"))
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Members of this gender (of one cohort, if given), sorted alphabetically by surname
+            # ("all": one section per gender)
+            response = standard_reports.report_response(f"members_{gender}", f"026_Members_{gender}.pdf", cohort)
+            if response is None:
                 return {"message": f"No members found for gender: {gender}"}, 404
 
-            # Sort alphabetically by surname
-            members_by_gender = sorted(members_by_gender, key=lambda m: m.get("surname", "").lower())
-
-            # PDF setup
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(
-                output,
-                pagesize=landscape(letter),
-                leftMargin=20,
-                rightMargin=20,
-                topMargin=20,
-                bottomMargin=20,
-            )
-            elements = []
-
-            styles = getSampleStyleSheet()
-            normal_style = styles["Normal"]
-            normal_style.fontSize = 9
-            normal_style.leading = 11
-            normal_style.wordWrap = 'CJK'
-
-            elements.append(Paragraph(f"026 Members List - {gender.capitalize()}", styles['Title']))
-            elements.append(Spacer(1, 10))
-
-            # Table headers
-            headers = ["S/N"] + list(members_by_gender[0].keys())
-            data = [headers]
-
-            # Table rows
-            for idx, m in enumerate(members_by_gender, start=1):
-                row = [idx]
-                for key in members_by_gender[0].keys():
-                    row.append(m.get(key, ""))
-                data.append(row)
-
-            # Calculate page width
-            page_width = doc.pagesize[0] - doc.leftMargin - doc.rightMargin
-
-            # Assign relative column widths
-            col_widths = []
-            for col in headers:
-                if col.lower() == "s/n":
-                    col_widths.append(1.3)   # wide enough for 4 digits
-                elif "name" in col.lower() or "email" in col.lower() or "address" in col.lower():
-                    col_widths.append(4.0)   # wider columns
-                elif "phone" in col.lower():
-                    col_widths.append(2.5)
-                else:
-                    col_widths.append(2.0)   # default small-medium
-
-            total_weight = sum(col_widths)
-            scaled_widths = [(w / total_weight) * page_width for w in col_widths]
-
-            # Wrap all data in Paragraphs
-            wrapped_data = []
-            for row in data:
-                wrapped_row = [Paragraph(str(cell), normal_style) for cell in row]
-                wrapped_data.append(wrapped_row)
-
-            # Create table
-            table = Table(wrapped_data, colWidths=scaled_widths, repeatRows=1)
-
-            table.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.darkblue),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (0, -1), "CENTER"),   # S/N center
-                ("ALIGN", (1, 0), (-1, -1), "LEFT"),    # other fields left
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("TOPPADDING", (0, 0), (-1, 0), 6),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-            ]))
-
-            elements.append(table)
-            doc.build(elements)
-
-            pdf_data = output.getvalue()
-            output.close()
-
-            response = Response(pdf_data, mimetype="application/pdf")
-            response.headers["Content-Disposition"] = f"attachment; filename=026_Members_{gender}.pdf"
             return response
 
         except Exception as e:
@@ -518,118 +176,95 @@ class DownloadMembersByGender(Resource):
 api.add_resource(DownloadMembersByGender, "/members/download-by-gender")
 
 
+class DownloadMembersByCohort(Resource):
+    def get(self):
+        # One section per cohort, each sorted alphabetically by surname
+        response = standard_reports.report_response("members_by_cohort", "026_Members_by_cohort.pdf")
+        if response is None:
+            return {"message": "No members found"}, 404
 
-class DownloadGroupedMembers(Resource):
+        return response
+
+
+# Route
+api.add_resource(DownloadMembersByCohort, "/members/download-by-cohort")
+
+
+
+def parse_grouping_request():
+    """
+    Validate a grouping request body.
+    Returns (params, None) or (None, (error_body, status)).
+    """
+    # Validate request content type
+    if not request.is_json:
+        return None, ({"error": "Request must be JSON"}, 400)
+
+    try:
+        # Normalized, with the defaults filled in (see app/validation.py)
+        return GROUPING_SCHEMA.validate_record(request.get_json()), None
+    except BadRequest as e:
+        return None, ({"error": e.description}, 400)
+
+
+class GroupMembers(Resource):
     def post(self):
         try:
-            # Validate request content type
-            if not request.is_json:
-                return {"error": "Request must be JSON"}, 400
+            params, error = parse_grouping_request()
+            if error:
+                return error
+
+            grouping = get_or_create_grouping(**params)
+            if not grouping:
+                return {"message": "No members found"}, 404
+
+            return grouping_summary(grouping), 200
+
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+# Route
+api.add_resource(GroupMembers, "/members/groups")
 
-            data = request.get_json()
 
-            # Validate input parameters
-            course_title = data.get("course_title")
-            group_size = data.get("group_size")
+class GetMemberGroups(Resource):
+    def get(self, course_title):
+        # ?cohort=2023 for groups made from that cohort only
+        grouping = grouping_repo.get(grouping_key(course_title, requested_cohort()))
+        if not grouping:
+            return {"message": f"No groups found for course: {course_title}"}, 404
 
-            if not course_title or not str(course_title).strip():
-                return {"error": "Course title is required"}, 400
+        return grouping_summary(grouping), 200
 
-            if not group_size or not str(group_size).isdigit():
-                return {"error": "Group size must be a valid number"}, 400
 
-            group_size = int(group_size)
-            if group_size <= 0:
-                return {"error": "Group size must be greater than zero"}, 400
+# Route
+api.add_resource(GetMemberGroups, "/members/groups/<string:course_title>")
+
 
-            # Fetch members, exclude _id and password
-            members_list = list(members.find({}, {"_id": 0, "password": 0}))
+class DownloadGroupedMembers(Resource):
+    def post(self):
+        try:
+            params, error = parse_grouping_request()
+            if error:
+                return error
 
-            if not members_list:
+            # Stored assignment for this course (computed only when missing or changed)
+            grouping = get_or_create_grouping(**params)
+            if not grouping:
                 return {"message": "No members found"}, 404
 
-            # Sort members alphabetically by surname
-            members_list = sorted(members_list, key=lambda s: s.get("surname", "").lower())
-
-            # Split into groups
-            groups = [
-                members_list[i:i + group_size]
-                for i in range(0, len(members_list), group_size)
-            ]
-
-            # PDF in memory
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(
-                output,
-                pagesize=landscape(letter),
-                leftMargin=20,
-                rightMargin=20,
-                topMargin=20,
-                bottomMargin=20,
+            # The PDF only changes when the stored assignment does
+            cohort = grouping.get("cohort")
+            cache_key = (grouping["_id"], cohort, grouping["created_at"])
+            pdf_data = grouping_pdf_cache.get_or_load(
+                cache_key,
+                lambda: reports.render_grouped_report(
+                    standard_reports.cohort_title(grouping["course_title"], cohort), grouping["groups"]
+                )
             )
-            elements = []
-            styles = getSampleStyleSheet()
-
-            # Add course title at the top
-            elements.append(Paragraph(f"{course_title} - Grouping", styles['Title']))
-            elements.append(Spacer(1, 12))
-
-            # Loop through each group and create a table
-            for group_index, group in enumerate(groups, start=1):
-                elements.append(Paragraph(f"Group {group_index}", styles['Heading2']))
-                elements.append(Spacer(1, 6))
-
-                # Table headers (S/N + member fields)
-                headers = ["S/N"] + list(group[0].keys())
-                data = [headers]
-
-                # Add rows
-                for idx, member in enumerate(group, start=1):
-                    row = [idx] + [str(v) for v in member.values()]
-                    data.append(row)
-
-                # --- Fit table into page width ---
-                page_width, _ = landscape(letter)
-                usable_width = page_width - doc.leftMargin - doc.rightMargin
-                col_count = len(headers)
-                col_widths = [usable_width / col_count] * col_count
-
-                # Wrap text in cells
-                wrapped_data = []
-                for row in data:
-                    wrapped_row = []
-                    for cell in row:
-                        style = styles['Normal']
-                        style.fontSize = 8
-                        style.leading = 10
-                        wrapped_row.append(Paragraph(str(cell), style))
-                    wrapped_data.append(wrapped_row)
-
-                # Create table
-                table = Table(wrapped_data, colWidths=col_widths, repeatRows=1)
-                table.setStyle(TableStyle([
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("ALIGN", (0, 0), (0, -1), "CENTER"),
-                    ("ALIGN", (1, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 8),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ]))
-
-                elements.append(table)
-                elements.append(Spacer(1, 20))
-
-            doc.build(elements)
-
-            pdf_data = output.getvalue()
-            output.close()
-
-            # Response
-            response = Response(pdf_data, mimetype="application/pdf")
-            response.headers["Content-Disposition"] = f"attachment; filename={course_title}_Groups.pdf"
-            return response
+            filename = standard_reports.cohort_filename(f"{grouping['course_title']}_Groups.pdf", cohort)
+            return reports.pdf_response(pdf_data, filename)
 
         except Exception as e:
             return {"error": str(e)}, 500
@@ -640,22 +275,16 @@ api.add_resource(DownloadGroupedMembers, "/members/download-groups")
 
 
 class ChangePassword(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("previous_password", type=str, required=True, help="Previous password is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = STUDENT_PASSWORD_CHANGE_SCHEMA.parse_request()
 
-        # Normalize input
-        reg_no = args["reg_no"].strip().upper()
+        # Normalized by the schema (see app/validation.py)
+        reg_no = args["reg_no"]
         previous_password = args["previous_password"]
         new_password = args["new_password"]
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student with this registration number does not exist")
 
@@ -667,10 +296,7 @@ class ChangePassword(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Update password
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"password": hashed_password}}
-        )
+        student_repo.set_password(reg_no, hashed_password)
 
         # ✅ Send change password email notification
         full_name = f"{student.get('surname', '')} {student.get('first_name', '')}".strip()
@@ -690,18 +316,12 @@ api.add_resource(ChangePassword, "/api/change-password")
 
 
 class ForgotPasswordStudent(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument(
-            "reg_no", type=str, required=True, help="Registration number is required"
-        )
-
     def post(self):
-        args = self.parser.parse_args()
-        reg_no = args["reg_no"].strip().upper()
+        args = STUDENT_FORGOT_PASSWORD_SCHEMA.parse_request()
+        reg_no = args["reg_no"]
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("No student found with this registration number")
 
@@ -729,10 +349,7 @@ class ForgotPasswordStudent(Resource):
         expiry_time = datetime.utcnow() + timedelta(minutes=5)
 
         # ✅ Save OTP & expiry in DB
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"reset_otp": otp, "otp_expiry": expiry_time}}
-        )
+        student_repo.set_otp(reg_no, otp, expiry_time)
 
         # ✅ Send OTP email
         EmailSender.send_student_otp_email(
@@ -754,20 +371,14 @@ api.add_resource(ForgotPasswordStudent, "/api/student/forgot-password")
 
 
 class StudentResetPasswordUsingOTP(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Student registration number is required")
-        self.parser.add_argument("otp", type=str, required=True, help="OTP is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
-
     def post(self):
-        args = self.parser.parse_args()
-        reg_no = args["reg_no"].strip().upper()
-        otp = args["otp"].strip()
-        new_password = args["new_password"].strip()
+        args = STUDENT_RESET_PASSWORD_SCHEMA.parse_request()
+        reg_no = args["reg_no"]
+        otp = args["otp"]
+        new_password = args["new_password"]
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("No student found with this registration number")
 
@@ -785,11 +396,7 @@ class StudentResetPasswordUsingOTP(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Update password in DB and remove OTP fields
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"password": hashed_password},
-             "$unset": {"reset_otp": "", "otp_expiry": ""}}
-        )
+        student_repo.set_password(reg_no, hashed_password, clear_otp=True)
 
         return jsonify({
             "message": "Student password has been successfully reset."
@@ -801,18 +408,13 @@ api.add_resource(StudentResetPasswordUsingOTP, "/api/student/reset-password-usin
 
 
 class StudentLogin(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("password", type=str, required=True, help="Password is required")
-
     def post(self):
-        args = self.parser.parse_args()
-        reg_no = args["reg_no"].strip().upper()
-        password = args["password"].strip()
+        args = STUDENT_LOGIN_SCHEMA.parse_request()
+        reg_no = args["reg_no"]
+        password = args["password"]
 
-        # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        # ✅ Check if student exists (password hash + profile fields only)
+        student = student_repo.get_by_reg_no(reg_no, MEMBER_LOGIN)
         if not student:
             raise BadRequest("Invalid registration number or password")
 
@@ -824,8 +426,8 @@ class StudentLogin(Resource):
         # Optional: Generate JWT token
         # token = create_jwt_for_student(student)  # implement JWT generation separately if needed
 
-        # ✅ Return student info (excluding password)
-        student_info = {k: v for k, v in student.items() if k != "password" and k != "_id"}
+        # ✅ Return the slim profile (excluding password)
+        student_info = {k: v for k, v in student.items() if k != "password"}
 
         return jsonify({
             "message": "Login successful",
@@ -840,67 +442,20 @@ api.add_resource(StudentLogin, "/api/student/login")
 
 
 class RegisterStudentNoMail(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("surname", type=str, required=True, help="Surname is required")
-        self.parser.add_argument("first_name", type=str, required=True, help="First name is required")
-        self.parser.add_argument("other_names", type=str, required=False)  # optional
-        self.parser.add_argument("admission_type", type=str, required=True, help="Admission type is required")
-        self.parser.add_argument("phone_number", type=str, required=True, help="Phone number is required")
-        self.parser.add_argument("email", type=str, required=True, help="Email is required")
-        self.parser.add_argument("gender", type=str, required=True, help="Gender is required")
-        self.parser.add_argument("role", type=str, required=True, help="Role is required")
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
+    method_decorators = {"post": [idempotent]}
 
     def post(self):
-        args = self.parser.parse_args()
-
-        # Normalize input
-        surname = normalize_name(args["surname"])
-        first_name = normalize_name(args["first_name"])
-        other_names = normalize_name(args["other_names"]) if args.get("other_names") else None
-        admission_type = args["admission_type"].strip().lower()
-        phone_number = normalize_phone(args["phone_number"])
-        email = normalize_email(args["email"])
-        gender = args["gender"].strip().lower()
-        role = args["role"].strip().lower()
-        reg_no = args["reg_no"].strip().upper()
-
-        # ✅ Validate admission type
-        valid_admission_types = ["utme", "direct entry", "transfer admission"]
-        if admission_type not in valid_admission_types:
-            raise BadRequest(f"Admission type must be one of {valid_admission_types}")
-
-        # ✅ Validate phone number
-        if not is_valid_nigerian_number(phone_number):
-            raise BadRequest("Invalid Nigerian phone number format")
-
-        # ✅ Validate email format
-        if not is_valid_gmail(email):
-            raise BadRequest("Invalid Gmail address")
+        # ✅ Normalize & validate input (see app/validation.py)
+        data = STUDENT_SCHEMA.parse_request()
+        email = data["email"]
+        reg_no = data["reg_no"]
 
         # ✅ Check duplicate email
-        if members.find_one({"email": email}):
+        if student_repo.exists("email", email):
             raise BadRequest("A user with this email already exists")
 
-        # ✅ Validate gender
-        if gender not in ["male", "female"]:
-            raise BadRequest("Gender must be either 'Male' or 'Female'")
-
-        # ✅ Validate role
-        if role not in ["student", "exco"]:
-            raise BadRequest("Role must be one of ['Student', 'Exco']")
-
-        # ✅ Validate Reg No format
-        if not reg_no.startswith("2022/"):
-            raise BadRequest("Registration number must start with '2022/'")
-        if "/" not in reg_no[4:]:
-            raise BadRequest("Registration number must contain '/' after the first 4 digits")
-        if len(reg_no) > 11:
-            raise BadRequest("Registration number must not exceed 11 characters")
-
         # ✅ Check duplicate reg no
-        if members.find_one({"reg_no": reg_no}):
+        if student_repo.exists("reg_no", reg_no):
             raise BadRequest("A user with this registration number already exists")
 
         # ✅ Default password (always six zeros)
@@ -910,19 +465,9 @@ class RegisterStudentNoMail(Resource):
         hashed_password = bcrypt.hashpw(default_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # Save new user
-        new_user = {
-            "surname": surname,
-            "first_name": first_name,
-            "other_names": other_names,
-            "admission_type": normalize_word(admission_type),
-            "phone_number": phone_number,
-            "email": email,
-            "gender": normalize_word(gender),
-            "role": normalize_word(role),
-            "reg_no": reg_no,
-            "password": hashed_password
-        }
-        members.insert_one(new_user)
+        new_user = student_document(data, hashed_password)
+        student_repo.add(new_user)
+        record_member_added(new_user)
 
         return jsonify({
             "message": "Student registered successfully (no email sent)"
@@ -933,22 +478,76 @@ class RegisterStudentNoMail(Resource):
 api.add_resource(RegisterStudentNoMail, "/api/v1/register_student_no_mail")
 
 
+class BulkRegisterStudentsNoMail(Resource):
+    method_decorators = {"post": [idempotent]}
+
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        records = data.get("students")
+
+        if not isinstance(records, list) or not records:
+            return {"error": "A non-empty 'students' list is required"}, 400
+
+        if len(records) > Config.BULK_REGISTER_MAX:
+            return {"error": f"At most {Config.BULK_REGISTER_MAX} students can be registered at once"}, 400
+
+        # ✅ Validate the whole batch column-wise
+        rows, mask, errors = STUDENT_SCHEMA.validate_batch(records)
+
+        # ✅ Check duplicates against the database in two queries
+        valid = [i for i, ok in enumerate(mask) if ok]
+        emails = [rows[i]["email"] for i in valid]
+        reg_nos = [rows[i]["reg_no"] for i in valid]
+        existing = student_repo.find_existing(emails, reg_nos)
+        existing_emails = {m.get("email") for m in existing}
+        existing_reg_nos = {m.get("reg_no") for m in existing}
+
+        to_insert = []
+        for i in valid:
+            if rows[i]["email"] in existing_emails:
+                errors.append({"row": i, "field": "email", "error": "A user with this email already exists"})
+            elif rows[i]["reg_no"] in existing_reg_nos:
+                errors.append({"row": i, "field": "reg_no", "error": "A user with this registration number already exists"})
+            else:
+                to_insert.append(rows[i])
+
+        if to_insert:
+            # ✅ Every row gets the same well-known default password, so it is hashed once per batch
+            hashed_password = bcrypt.hashpw("000000".encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+            documents = [student_document(row, hashed_password) for row in to_insert]
+            student_repo.add_many(documents)
+            record_members_added(documents)
+
+        errors.sort(key=lambda e: e["row"])
+        return {
+            "message": f"{len(to_insert)} of {len(records)} students registered (no email sent)",
+            "registered": len(to_insert),
+            "errors": errors
+        }, 200 if to_insert else 400
+
+
+# ✅ Register endpoint
+api.add_resource(BulkRegisterStudentsNoMail, "/api/v1/register_students_bulk_no_mail")
+
+
 class SortedStudentsSummary(Resource):
     def get(self):
-        # Fetch students, exclude _id and password
-        students = list(members.find({}, {"_id": 0, "password": 0}))
+        # Fetch students (listing fields only; ?cohort=2023 for one cohort)
+        cohort = requested_cohort()
+        students = list(student_repo.listing(cohort=cohort))
         if not students:
             return {"message": "No students found"}, 404
 
         # Sort students alphabetically by surname
         students_sorted = sorted(students, key=lambda s: s.get("surname", "").lower())
 
-        # Count male and female separately
-        male_count = sum(1 for s in students_sorted if s.get("gender", "").lower() == "male")
-        female_count = sum(1 for s in students_sorted if s.get("gender", "").lower() == "female")
+        # Counts come from the materialized counters, not a scan
+        member_stats = get_member_stats(cohort)
+        male_count = member_stats.get("gender", {}).get("male", 0)
+        female_count = member_stats.get("gender", {}).get("female", 0)
 
         # Total students
-        total_students = len(students_sorted)
+        total_students = member_stats.get("total", len(students_sorted))
 
         response_data = {
             "total_students": total_students,
@@ -964,22 +563,26 @@ class SortedStudentsSummary(Resource):
 api.add_resource(SortedStudentsSummary, "/students/summary-sorted")
 
 
+def load_lecturer_directory():
+    """Serialized lecturer directory (stored pre-sorted), or None when there are no lecturers."""
+    lecturers = lecturer_repo.directory()
+
+    if not lecturers:
+        return None
+
+    return json.dumps({"lecturers": lecturers}, default=str).encode("utf-8")
+
+
 class StudentViewAllLecturers(Resource):
     def get(self):
         try:
-            # Fetch all lecturers from the collection
-            lecturers = list(student_view_lecturers.find(
-                {},
-                {"_id": 0}  # Exclude MongoDB's default _id field
-            ))
+            # Served from memory; rebuilt when the entry expires or is invalidated
+            body = lecturer_directory_cache.get_or_load("all", load_lecturer_directory)
 
-            if not lecturers:
+            if body is None:
                 return {"message": "No lecturers found"}, 404
 
-            # Optional: sort alphabetically by lecturer name
-            lecturers.sort(key=lambda l: l.get("name", "").lower())
-
-            return {"lecturers": lecturers}, 200
+            return Response(body, mimetype="application/json")
 
         except Exception as e:
             return {"error": str(e)}, 500
@@ -990,22 +593,16 @@ api.add_resource(StudentViewAllLecturers, "/Student/view_all_lecturers")
 
 
 class ChangePasswordNoMal(Resource):
-    def __init__(self):
-        self.parser = reqparse.RequestParser()
-        self.parser.add_argument("reg_no", type=str, required=True, help="Registration number is required")
-        self.parser.add_argument("previous_password", type=str, required=True, help="Previous password is required")
-        self.parser.add_argument("new_password", type=str, required=True, help="New password is required")
-
     def post(self):
-        args = self.parser.parse_args()
+        args = STUDENT_PASSWORD_CHANGE_SCHEMA.parse_request()
 
-        # Normalize input
-        reg_no = args["reg_no"].strip().upper()
+        # Normalized by the schema (see app/validation.py)
+        reg_no = args["reg_no"]
         previous_password = args["previous_password"]
         new_password = args["new_password"]
 
         # ✅ Check if student exists
-        student = members.find_one({"reg_no": reg_no})
+        student = student_repo.get_by_reg_no(reg_no)
         if not student:
             raise BadRequest("Student with this registration number does not exist")
 
@@ -1017,10 +614,7 @@ class ChangePasswordNoMal(Resource):
         hashed_password = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
         # ✅ Update password
-        members.update_one(
-            {"reg_no": reg_no},
-            {"$set": {"password": hashed_password}}
-        )
+        student_repo.set_password(reg_no, hashed_password)
 
         return {
             "message": "Password changed successfully"
@@ -0,0 +1,165 @@
+"""
+Maintenance commands, run with the flask CLI:
+
+    FLASK_APP=run.py flask rebuild-stats
+    FLASK_APP=run.py flask ensure-indexes
+    FLASK_APP=run.py flask backfill-key-fields
+    FLASK_APP=run.py flask backfill-cohorts
+    FLASK_APP=run.py flask archive-cohort 2022
+    FLASK_APP=run.py flask rebuild-lecturer-directory
+    FLASK_APP=run.py flask bench-email-templates
+    FLASK_APP=run.py flask bench-request-schemas
+"""
+import click
+
+
+def register_commands(app) -> None:
+
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats():
+        """Recount the materialized member / lecturer counters."""
+        from app.stats import rebuild_member_stats, rebuild_lecturer_stats
+        doc = rebuild_member_stats()
+        click.echo(f"✅ Member stats rebuilt: {doc['total']} members")
+        doc = rebuild_lecturer_stats()
+        click.echo(f"✅ Lecturer stats rebuilt: {doc['total']} lecturers")
+
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        """Create the indexes listed in app/indexes.py."""
+        from app.indexes import ensure_indexes
+        for name in ensure_indexes():
+            click.echo(f"✅ {name}")
+
+    @app.cli.command("backfill-search-keys")
+    def backfill_search_keys():
+        """Write surname_key / first_name_key on members and lecturers that lack them."""
+        from pymongo import UpdateOne
+        from app.search import search_keys
+        from app.utils import members, lecturers
+
+        for name, collection in (("members", members), ("lecturers", lecturers)):
+            requests = [
+                UpdateOne({"_id": doc["_id"]}, {"$set": search_keys(doc)})
+                for doc in collection.find({"surname_key": {"$exists": False}}, {"surname": 1, "first_name": 1})
+            ]
+            if requests:
+                collection.bulk_write(requests, ordered=False)
+            click.echo(f"✅ {name}: {len(requests)} documents updated")
+
+    @app.cli.command("backfill-key-fields")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def backfill_key_fields(batch_size):
+        """Normalize role / gender and write their role_key / gender_key shadow fields."""
+        from pymongo import UpdateOne
+        from app.utils import members, lecturers, normalize_word, with_keys, KEY_FIELDS
+
+        projection = {field: 1 for field in KEY_FIELDS}
+        projection.update({f"{field}_key": 1 for field in KEY_FIELDS})
+
+        for name, collection in (("members", members), ("lecturers", lecturers)):
+            updated, requests = 0, []
+            for doc in collection.find({}, projection):
+                # Lecturers keep their lower-case "lecturer" role as written
+                fields = {
+                    field: doc[field] if name == "lecturers" and field == "role" else normalize_word(doc[field])
+                    for field in KEY_FIELDS if isinstance(doc.get(field), str)
+                }
+                changes = {k: v for k, v in with_keys(fields).items() if doc.get(k) != v}
+                if changes:
+                    requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+                if len(requests) >= batch_size:
+                    updated += collection.bulk_write(requests, ordered=False).modified_count
+                    requests = []
+            if requests:
+                updated += collection.bulk_write(requests, ordered=False).modified_count
+            click.echo(f"✅ {name}: {updated} documents updated")
+
+    @app.cli.command("backfill-cohorts")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def backfill_cohorts(batch_size):
+        """Write the cohort of members that lack one (from their reg_no) and recount the stats."""
+        from app.repositories import student_repo
+        from app.validation import cohort_of
+        from app.stats import rebuild_member_stats
+
+        updated, unmatched, cohorts = 0, 0, {}
+        for doc in student_repo.without_cohort():
+            cohort = cohort_of(doc.get("reg_no"))
+            if cohort is None:
+                unmatched += 1
+                continue
+            cohorts[doc["_id"]] = cohort
+            if len(cohorts) >= batch_size:
+                updated += student_repo.set_cohorts(cohorts)
+                cohorts = {}
+        updated += student_repo.set_cohorts(cohorts)
+        rebuild_member_stats()
+        click.echo(f"✅ members: {updated} documents updated, {unmatched} reg_nos matched no pattern")
+
+    @app.cli.command("archive-cohort")
+    @click.argument("cohort")
+    @click.option("--batch-size", default=None, type=int, help="Defaults to ARCHIVE_BATCH_SIZE")
+    @click.option("--force", is_flag=True, help="Archive even if the cohort is still open for registration")
+    def archive_cohort_command(cohort, batch_size, force):
+        """Move a graduated cohort's members into Students_archive."""
+        from app.archive import archive_cohort
+        try:
+            moved = archive_cohort(cohort, batch_size, force=force)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"✅ Cohort {cohort}: {moved} members archived")
+
+    @app.cli.command("rebuild-lecturer-directory")
+    @click.option("--batch-size", default=500, show_default=True)
+    def rebuild_lecturer_directory(batch_size):
+        """Rewrite Student_view_lecturers from Lecturers."""
+        from app.lecturer_directory import rebuild_directory
+        written, removed = rebuild_directory(batch_size)
+        click.echo(f"✅ Lecturer directory rebuilt: {written} entries, {removed} stale removed")
+
+    @app.cli.command("bench-email-templates")
+    @click.option("--count", default=1000, show_default=True, help="Messages built per template")
+    def bench_email_templates(count):
+        """Time rendering + MIME building of every email template (no SMTP)."""
+        import time
+        from app.email_templates import TEMPLATES, build_message
+
+        context = {
+            "user_name": "Ada Obi", "student_name": "Ada Obi", "lecturer_name": "Dr Obi",
+            "recipient_name": "Ada Obi", "role": "student", "old_role": "Student", "new_role": "Exco",
+            "reg_no": "2022/000000", "password": "Temp#1234", "otp": "123456",
+            "author": "Dr Obi", "announcement_text": "Lectures resume on Monday.\nVenue: Hall B.",
+        }
+        for name in TEMPLATES:
+            started = time.perf_counter()
+            for _ in range(count):
+                build_message(name, "ada.obi@gmail.com", **context).as_string()
+            elapsed = time.perf_counter() - started
+            click.echo(f"{name:<26} {elapsed / count * 1e6:8.1f} µs/message")
+
+    @app.cli.command("bench-request-schemas")
+    @click.option("--count", default=10000, show_default=True, help="Requests parsed per schema")
+    def bench_request_schemas(count):
+        """Time argument parsing + validation of representative request bodies (no handler)."""
+        import time
+        from app import validation
+
+        bodies = {
+            "STUDENT_LOGIN_SCHEMA": {"reg_no": "2022/123456", "password": "000000"},
+            "LECTURER_LOGIN_SCHEMA": {"reg_no": "LEC/001", "password": "000000"},
+            "STUDENT_RESET_PASSWORD_SCHEMA": {"reg_no": "2022/123456", "otp": "123456", "new_password": "Temp#1234"},
+            "ROLE_CHANGE_SCHEMA": {"email": "Dr.Obi@gmail.com", "password": "000000", "reg_no": "2022/123456"},
+            "STUDENT_SCHEMA": {
+                "surname": "obi", "first_name": "ada", "admission_type": "UTME", "phone_number": "08012345678",
+                "email": "ada.obi@gmail.com", "gender": "Female", "role": "Student", "reg_no": "2022/123456",
+            },
+        }
+        for name, body in bodies.items():
+            schema = getattr(validation, name)
+            with app.test_request_context("/", method="POST", json=body):
+                started = time.perf_counter()
+                for _ in range(count):
+                    schema.parse_request()
+                elapsed = time.perf_counter() - started
+            click.echo(f"{name:<30} {elapsed / count * 1e6:8.1f} µs/request")
@@ -0,0 +1,218 @@
+"""
+Recorded email delivery with retries and a dead-letter collection.
+
+Every EmailSender message goes through deliver(): it is recorded in the
+EmailDeliveries collection and sent straight away. A transient failure
+(connection trouble, 4xx reply) leaves the record "retrying" with a
+next_attempt_at chosen by jittered exponential backoff; the scheduler's
+retry_email_deliveries job sends due records again. A permanent failure
+(5xx reply, refused recipient), EMAIL_MAX_ATTEMPTS failed attempts, or a
+message that is older than its max_age (OTPs) moves the record to
+EmailDeadLetters, from where an admin can requeue it (app/code/admin.py).
+
+Sent records lose their message body (it may hold an OTP or password) and
+expire after EMAIL_DELIVERY_RETENTION_DAYS; they are kept for delivery
+latency / success-rate figures. Messages sent with sensitive=True (OTPs,
+temporary passwords) also lose their body when dead-lettered, so they can't
+be requeued; the user asks for a new OTP or resets the password instead.
+Dead letters expire after EMAIL_DEAD_LETTER_RETENTION_DAYS.
+"""
+import random
+import logging
+import smtplib
+from datetime import datetime, timedelta
+from config import Config
+from app.metrics import metrics
+from app.circuit import CircuitBreaker, CircuitOpenError
+from app.utils import email_deliveries, email_dead_letters
+
+
+logger = logging.getLogger(__name__)
+
+smtp_breaker = CircuitBreaker("smtp", Config.SMTP_BREAKER_FAILURES, Config.SMTP_BREAKER_COOLDOWN)
+
+
+def connect() -> smtplib.SMTP:
+    """Logged-in SMTP connection using SMTP_CONNECT_TIMEOUT / SMTP_SEND_TIMEOUT."""
+    server = smtplib.SMTP(Config.SMTP_SERVER, int(Config.SMTP_PORT), timeout=Config.SMTP_CONNECT_TIMEOUT)
+    try:
+        # Connected: later commands (and the TLS socket wrapping this one) use the send timeout
+        server.sock.settimeout(Config.SMTP_SEND_TIMEOUT)
+        server.starttls()
+        server.login(Config.EMAIL_USERNAME, Config.EMAIL_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def open_connection() -> smtplib.SMTP:
+    """connect() through the breaker; raises CircuitOpenError while the server is considered down."""
+    with smtp_breaker.guard(is_failure=lambda error: not is_permanent(error)):
+        return connect()
+
+
+def send_raw(sender: str, receiver: str, message: str) -> None:
+    """One SMTP session sending one message; raises on failure."""
+    with smtp_breaker.guard(is_failure=lambda error: not is_permanent(error)):
+        with connect() as server:
+            server.sendmail(sender, receiver, message)
+
+
+def is_permanent(error: Exception) -> bool:
+    """Failures a retry can't fix: refused recipients and 5xx replies (except auth, which is our config)."""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPNotSupportedError)):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+# How long a send in progress owns its record before the retry job may take it
+CLAIM_SECONDS = 120
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before the next attempt: exponential, capped, with half of it jittered."""
+    delay = min(Config.EMAIL_RETRY_MAX_SECONDS, Config.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def dead_letter(record: dict, reason: str) -> None:
+    record = dict(record, status="dead", dead_reason=reason, dead_at=datetime.utcnow())
+    if record.get("sensitive"):
+        record.pop("message", None)
+        record["redacted"] = True
+    email_dead_letters.replace_one({"_id": record["_id"]}, record, upsert=True)
+    email_deliveries.delete_one({"_id": record["_id"]})
+    metrics.incr("email.dead_lettered")
+    logger.error("Email to %s (%s) moved to dead letters: %s", record["to"], record["kind"], reason)
+
+
+def attempt(record: dict) -> bool:
+    """Try to send `record` once and update it; True if it was sent."""
+    now = datetime.utcnow()
+    if record.get("max_age") and now - record["created_at"] > timedelta(seconds=record["max_age"]):
+        dead_letter(record, "expired before it could be delivered")
+        return False
+
+    attempts = record.get("attempts", 0) + 1
+    try:
+        send_raw(record["sender"], record["to"], record["message"])
+    except CircuitOpenError as e:
+        # Mail server is down: hold the message in the outbox without using up an attempt
+        delay = e.retry_after + random.uniform(0, Config.EMAIL_RETRY_BASE_SECONDS)
+        email_deliveries.update_one({"_id": record["_id"]}, {"$set": {
+            "status": "retrying",
+            "last_error": str(e),
+            "next_attempt_at": now + timedelta(seconds=delay),
+        }})
+        metrics.incr("email.deferred")
+        return False
+    except Exception as e:
+        metrics.incr("email.failed_attempt")
+        error = f"{type(e).__name__}: {e}"[:500]
+        if is_permanent(e):
+            dead_letter(dict(record, attempts=attempts, last_error=error), "permanent failure")
+        elif attempts >= Config.EMAIL_MAX_ATTEMPTS:
+            dead_letter(dict(record, attempts=attempts, last_error=error), f"gave up after {attempts} attempts")
+        else:
+            email_deliveries.update_one({"_id": record["_id"]}, {"$set": {
+                "status": "retrying",
+                "attempts": attempts,
+                "last_error": error,
+                "next_attempt_at": now + timedelta(seconds=backoff(attempts)),
+            }})
+            metrics.incr("email.retry_scheduled")
+            logger.warning("Email to %s failed (attempt %d), will retry: %s", record["to"], attempts, error)
+        return False
+
+    sent_at = datetime.utcnow()
+    email_deliveries.update_one(
+        {"_id": record["_id"]},
+        {"$set": {"status": "sent", "attempts": attempts, "sent_at": sent_at}, "$unset": {"message": ""}}
+    )
+    metrics.incr("email.sent")
+    metrics.observe("email.delivery", (sent_at - record["created_at"]).total_seconds())
+    return True
+
+
+def deliver(msg, kind: str, max_age: int = None, sensitive: bool = False) -> bool:
+    """
+    Record and send an email.message (retried later on failure); True if it
+    went out on the first attempt. `max_age` (seconds) stops retries of
+    messages that are useless once stale, such as OTPs. A `sensitive`
+    message (one carrying an OTP or password) is not kept once dead-lettered.
+    """
+    now = datetime.utcnow()
+    record = {
+        "kind": kind,
+        "sender": msg["From"],
+        "to": msg["To"],
+        "subject": msg["Subject"],
+        "message": msg.as_string(),
+        "status": "sending",
+        "attempts": 0,
+        "max_age": max_age,
+        "sensitive": sensitive,
+        "created_at": now,
+        # Picked up by the retry job only if this request dies mid-send
+        "next_attempt_at": now + timedelta(seconds=CLAIM_SECONDS),
+    }
+    record["_id"] = email_deliveries.insert_one(record).inserted_id
+    sent = attempt(record)
+    if sent:
+        logger.info("%s email sent to %s", kind, record["to"])
+    return sent
+
+
+def retry_due(limit: int = 200) -> int:
+    """Retry up to `limit` records whose next attempt is due; returns how many were tried."""
+    tried = 0
+    while tried < limit and not smtp_breaker.retry_after():
+        now = datetime.utcnow()
+        record = email_deliveries.find_one_and_update(
+            {"status": {"$in": ["sending", "retrying"]}, "next_attempt_at": {"$lte": now}},
+            {"$set": {"next_attempt_at": now + timedelta(seconds=CLAIM_SECONDS)}},
+            sort=[("next_attempt_at", 1)]
+        )
+        if record is None:
+            break
+        attempt(record)
+        tried += 1
+    return tried
+
+
+def requeue(ids=None) -> int:
+    """Move dead letters (all, or those in `ids`) back for a fresh round of attempts."""
+    query = {"_id": {"$in": list(ids)}} if ids is not None else {}
+    now = datetime.utcnow()
+    count = 0
+    for record in email_dead_letters.find(query):
+        if "message" not in record:
+            continue
+        for field in ("dead_reason", "dead_at", "last_error"):
+            record.pop(field, None)
+        record.update({
+            "status": "retrying",
+            "attempts": 0,
+            "created_at": now,   # restarts the max_age window
+            "next_attempt_at": now,
+            "requeued_at": now,
+        })
+        email_deliveries.replace_one({"_id": record["_id"]}, record, upsert=True)
+        email_dead_letters.delete_one({"_id": record["_id"]})
+        count += 1
+    metrics.incr("email.requeued", count)
+    return count
+
+
+def delivery_summary() -> dict:
+    """Record counts by status, plus the dead-letter count."""
+    counts = {row["_id"]: row["count"] for row in email_deliveries.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ])}
+    counts["dead"] = email_dead_letters.count_documents({})
+    return counts
@@ -0,0 +1,97 @@
+"""
+Email templates (app/templates/email), compiled once per process.
+
+Every email is a pair of templates extending a shared layout: `<name>.html`
+(autoescaped) and `<name>.txt` for the plain-text alternative. The registry
+below loads and compiles all of them at import, so sending only renders the
+per-recipient fields:
+
+    rendered = render("welcome", user_name="Ada", role="student", reg_no="...", password="...")
+    msg = build_message("welcome", "ada@gmail.com", user_name="Ada", ...)
+
+render() needs no app, database or SMTP server, so template cost can be
+measured on its own (`flask bench-email-templates`).
+"""
+import os
+from collections import namedtuple
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from markupsafe import Markup, escape
+from config import Config
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates", "email")
+
+# Template name -> subject line (itself a template)
+SUBJECTS = {
+    "welcome": "Welcome to the Department",
+    "welcome_lecturer": "Welcome to the Department Faculty",
+    "role_change": "Role Change Notification",
+    "password_change": "Password Change Notification",
+    "lecturer_password_change": "Password Change Notification",
+    "student_otp": "Password Reset OTP",
+    "lecturer_otp": "Password Reset OTP",
+    "announcement": "Department Announcement from {{ author }}",
+}
+
+RenderedEmail = namedtuple("RenderedEmail", ["subject", "text", "html"])
+
+
+def nl2br(value) -> Markup:
+    """Escape user text and keep its line breaks."""
+    return Markup("<br>").join(escape(value).split("\n"))
+
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+    undefined=StrictUndefined,   # a missing field fails loudly instead of sending a blank
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+environment.filters["nl2br"] = nl2br
+# Static values shared by every template
+environment.globals.update(
+    image_url=Config.IMAGE_URL,
+    lecturer_image_url=Config.LECTURER_IMAGE_URL,
+)
+
+
+class EmailTemplate(object):
+    """The compiled subject, plain-text and HTML templates of one email."""
+
+    def __init__(self, name: str, subject: str):
+        self.name = name
+        self.subject = environment.from_string(subject)
+        self.text = environment.get_template(f"{name}.txt")
+        self.html = environment.get_template(f"{name}.html")
+
+    def render(self, **context) -> RenderedEmail:
+        return RenderedEmail(
+            subject=self.subject.render(context),
+            text=self.text.render(context),
+            html=self.html.render(context),
+        )
+
+
+TEMPLATES = {name: EmailTemplate(name, subject) for name, subject in SUBJECTS.items()}
+
+
+def render(name: str, **context) -> RenderedEmail:
+    return TEMPLATES[name].render(**context)
+
+
+def build_message(name: str, receiver_email: str, **context) -> MIMEMultipart:
+    """Rendered email `name` for `receiver_email`, plain text first, HTML preferred."""
+    rendered = render(name, **context)
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = rendered.subject
+    msg["From"] = Config.EMAIL_USERNAME
+    msg["To"] = receiver_email
+    msg.attach(MIMEText(rendered.text, "plain", "utf-8"))
+    msg.attach(MIMEText(rendered.html, "html", "utf-8"))
+    return msg
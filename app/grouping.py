@@ -0,0 +1,153 @@
+"""
+Grouping engine for course groups.
+
+Strategies:
+    sequential      - surname order, consecutive chunks of `group_size`
+                      (the original behaviour; the last group may be small)
+    even            - surname order, group sizes differ by at most one
+    gender_balanced - males and females dealt round-robin, sizes differ by at most one
+    random          - seeded shuffle, sizes differ by at most one
+
+Assignments are persisted per course (and cohort, when the request names
+one) in the Groups collection, so repeated requests for a course return the
+same groups (until `regenerate` is asked for) without re-reading and
+re-sorting the whole roster.
+"""
+import math
+import random
+from datetime import datetime
+from app.repositories import student_repo, grouping_repo
+from app.projections import GROUPING_MEMBER
+
+
+STRATEGIES = ("sequential", "even", "gender_balanced", "random")
+
+
+def course_key(course_title: str) -> str:
+    """'  CSC 201 ' -> 'csc 201'"""
+    return " ".join(str(course_title).split()).lower()
+
+
+def grouping_key(course_title: str, cohort: str = None) -> str:
+    """Groups _id: 'csc 201', or 'csc 201|2023' for one cohort's groups."""
+    key = course_key(course_title)
+    return f"{key}|{cohort}" if cohort else key
+
+
+def _surname_key(member: dict) -> tuple:
+    return (member.get("surname", "").lower(), member.get("first_name", "").lower(), member.get("reg_no", ""))
+
+
+def _deal(ordered: list, group_count: int) -> list:
+    """Deal members round-robin into `group_count` groups."""
+    groups = [[] for _ in range(group_count)]
+    for position, member in enumerate(ordered):
+        groups[position % group_count].append(member)
+    return groups
+
+
+def _even_chunks(ordered: list, group_count: int) -> list:
+    """Consecutive chunks whose sizes differ by at most one."""
+    base, extra = divmod(len(ordered), group_count)
+    groups, start = [], 0
+    for index in range(group_count):
+        size = base + (1 if index < extra else 0)
+        groups.append(ordered[start:start + size])
+        start += size
+    return groups
+
+
+def make_groups(members_list: list, group_size: int, strategy: str = "sequential", seed: int = None) -> list:
+    """Split `members_list` into groups of about `group_size` members."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Strategy must be one of {list(STRATEGIES)}")
+
+    ordered = sorted(members_list, key=_surname_key)
+    if not ordered:
+        return []
+
+    if strategy == "sequential":
+        return [ordered[i:i + group_size] for i in range(0, len(ordered), group_size)]
+
+    group_count = math.ceil(len(ordered) / group_size)
+
+    if strategy == "even":
+        return _even_chunks(ordered, group_count)
+
+    if strategy == "random":
+        random.Random(seed).shuffle(ordered)
+        return _even_chunks(ordered, group_count)
+
+    # gender_balanced: deal each gender in turn so every group gets its share
+    by_gender = {}
+    for member in ordered:
+        by_gender.setdefault(str(member.get("gender", "")).lower(), []).append(member)
+    interleaved = [member for gender in sorted(by_gender) for member in by_gender[gender]]
+    groups = _deal(interleaved, group_count)
+    return [sorted(group, key=_surname_key) for group in groups]
+
+
+def get_or_create_grouping(course_title: str, group_size: int, strategy: str = "sequential",
+                           seed: int = None, regenerate: bool = False, cohort: str = None):
+    """
+    Stored grouping for `course_title` (of one cohort's members, or of
+    everyone), created (or recreated) when missing, when the requested
+    parameters differ, or when `regenerate` is set.
+    Returns None when there are no members to group.
+    """
+    key = grouping_key(course_title, cohort)
+
+    if not regenerate:
+        stored = grouping_repo.get(key)
+        if stored and stored["group_size"] == group_size and stored["strategy"] == strategy \
+                and (seed is None or stored.get("seed") == seed):
+            return stored
+
+    members_list = list(student_repo.listing(cohort=cohort, projection=GROUPING_MEMBER))
+    if not members_list:
+        return None
+
+    if strategy == "random" and seed is None:
+        seed = random.randrange(2 ** 31)
+
+    # Mongo keeps milliseconds; truncate so the stored and returned docs agree
+    now = datetime.utcnow()
+    created_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    doc = {
+        "_id": key,
+        "course_title": str(course_title).strip(),
+        "cohort": cohort,
+        "group_size": group_size,
+        "strategy": strategy,
+        "seed": seed,
+        "member_count": len(members_list),
+        "groups": make_groups(members_list, group_size, strategy, seed),
+        "created_at": created_at,
+    }
+    grouping_repo.save(doc)
+    return doc
+
+
+def grouping_summary(doc: dict) -> dict:
+    """JSON-safe view of a stored grouping."""
+    return {
+        "course_title": doc["course_title"],
+        "cohort": doc.get("cohort"),
+        "group_size": doc["group_size"],
+        "strategy": doc["strategy"],
+        "seed": doc.get("seed"),
+        "member_count": doc["member_count"],
+        "created_at": doc["created_at"].isoformat(),
+        "groups": [
+            {
+                "group": index,
+                "size": len(group),
+                "members": [
+                    {k: m.get(k) for k in ("reg_no", "surname", "first_name", "other_names", "gender")}
+                    for m in group
+                ],
+            }
+            for index, group in enumerate(doc["groups"], start=1)
+        ],
+    }
@@ -0,0 +1,149 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that retries a POST with the same `Idempotency-Key` header gets the
+first response replayed from the IdempotencyKeys collection instead of
+running the handler (bcrypt, inserts, mail) again:
+
+    class Register(Resource):
+        method_decorators = {"post": [idempotent]}
+
+The first request claims the key with an insert (the _id is unique), so
+concurrent retries can't both run the handler; a retry that arrives while the
+first is still running gets 409. Responses with a 5xx status (or an
+unhandled exception) release the key so the client can retry for real.
+Records expire after IDEMPOTENCY_TTL via a TTL index on `expires_at`
+(see app/indexes.py).
+"""
+import json
+import hashlib
+import functools
+from datetime import datetime, timedelta
+from flask import Response, request
+from flask_restful.utils import unpack
+from pymongo.errors import DuplicateKeyError
+from werkzeug.exceptions import HTTPException
+from config import Config
+from app.metrics import metrics
+from app.utils import idempotency_keys
+
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint() -> str:
+    return hashlib.sha256(request.get_data(cache=True)).hexdigest()
+
+
+def _claim(record_id: str, fingerprint: str):
+    """
+    Claim `record_id` for this request. Returns None when claimed, otherwise the
+    existing record (finished, or still being processed by another request).
+    """
+    now = datetime.utcnow()
+    record = {
+        "_id": record_id,
+        "fingerprint": fingerprint,
+        "state": "processing",
+        "started_at": now,
+        "expires_at": now + timedelta(seconds=Config.IDEMPOTENCY_TTL),
+    }
+    try:
+        idempotency_keys.insert_one(record)
+        return None
+    except DuplicateKeyError:
+        pass
+
+    # Take over a claim whose request died without finishing
+    stale = now - timedelta(seconds=Config.IDEMPOTENCY_PROCESSING_TIMEOUT)
+    taken = idempotency_keys.find_one_and_update(
+        {"_id": record_id, "state": "processing", "started_at": {"$lt": stale}},
+        {"$set": {"fingerprint": fingerprint, "started_at": now, "expires_at": record["expires_at"]}}
+    )
+    if taken is not None:
+        return None
+
+    existing = idempotency_keys.find_one({"_id": record_id})
+    if existing is None:
+        # Expired in the meantime: claim it afresh
+        return _claim(record_id, fingerprint)
+    return existing
+
+
+def _stored_response(result) -> tuple:
+    """(status, fields to store) for a handler result."""
+    if isinstance(result, Response):
+        return result.status_code, {
+            "body": result.get_data(as_text=True),
+            "mimetype": result.mimetype,
+        }
+
+    data, code, headers = unpack(result)
+    return code, {"json": json.dumps(data, default=str)}
+
+
+def _replay(record: dict):
+    metrics.incr("idempotency.replayed")
+    headers = {"Idempotent-Replayed": "true"}
+    if "json" in record:
+        return json.loads(record["json"]), record["status"], headers
+
+    response = Response(record["body"], status=record["status"], mimetype=record["mimetype"])
+    response.headers.update(headers)
+    return response
+
+
+def _finish(record_id: str, status: int, stored: dict) -> None:
+    if status >= 500:
+        idempotency_keys.delete_one({"_id": record_id})
+        return
+
+    idempotency_keys.update_one(
+        {"_id": record_id},
+        {"$set": dict(stored, state="done", status=status, finished_at=datetime.utcnow())}
+    )
+
+
+def idempotent(func):
+    """Replay the stored response for a repeated Idempotency-Key (see module docstring)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER, "").strip()
+        if not key:
+            return func(*args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}, 400
+
+        record_id = f"{request.method} {request.path} {key}"
+        fingerprint = _fingerprint()
+
+        existing = _claim(record_id, fingerprint)
+        if existing is not None:
+            if existing["fingerprint"] != fingerprint:
+                return {"error": f"{HEADER} was already used with a different request body"}, 422
+
+            if existing["state"] == "processing":
+                metrics.incr("idempotency.in_progress")
+                return {"error": "A request with this Idempotency-Key is still being processed"}, 409, {"Retry-After": "5"}
+
+            return _replay(existing)
+
+        metrics.incr("idempotency.claimed")
+        try:
+            result = func(*args, **kwargs)
+        except HTTPException as e:
+            # e.g. BadRequest from validation: the retry would fail the same way.
+            # Stored as flask-restful sends it (a structured `data` body when set)
+            body = getattr(e, "data", None) or {"message": e.description}
+            _finish(record_id, e.code or 500, {"json": json.dumps(body)})
+            raise
+        except Exception:
+            idempotency_keys.delete_one({"_id": record_id})
+            raise
+
+        status, stored = _stored_response(result)
+        _finish(record_id, status, stored)
+        return result
+    return wrapper
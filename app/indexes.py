@@ -0,0 +1,87 @@
+"""
+Index definitions for every collection the app queries.
+
+Create / update them with:
+
+    FLASK_APP=run.py flask ensure-indexes
+
+An entry is either a key list or a (key list, index options) pair.
+"""
+from pymongo import ASCENDING
+from config import Config
+from app.utils import (
+    members, lecturers, student_view_lecturers, idempotency_keys, broadcasts, email_deliveries, email_dead_letters,
+    members_archive,
+)
+
+
+INDEXES = {
+    "members": [
+        [("reg_no", ASCENDING)],
+        [("email", ASCENDING)],
+        [("phone_number", ASCENDING)],
+        [("surname_key", ASCENDING)],
+        [("first_name_key", ASCENDING)],
+        # Filtered, surname-sorted listings and reports (excos, members by gender)
+        [("role_key", ASCENDING), ("surname_key", ASCENDING)],
+        [("gender_key", ASCENDING), ("surname_key", ASCENDING)],
+        # The same, within one cohort
+        [("cohort", ASCENDING), ("surname_key", ASCENDING)],
+        [("cohort", ASCENDING), ("role_key", ASCENDING), ("surname_key", ASCENDING)],
+        [("cohort", ASCENDING), ("gender_key", ASCENDING), ("surname_key", ASCENDING)],
+    ],
+    "lecturers": [
+        [("reg_no", ASCENDING)],
+        [("email", ASCENDING)],
+        [("phone_number", ASCENDING)],
+        [("surname_key", ASCENDING)],
+        [("first_name_key", ASCENDING)],
+    ],
+    "members_archive": [
+        [("cohort", ASCENDING), ("surname_key", ASCENDING)],
+        [("reg_no", ASCENDING)],
+    ],
+    "student_view_lecturers": [
+        # Directory served in display order (see app/lecturer_directory.py)
+        [("sort_key", ASCENDING)],
+    ],
+    "idempotency_keys": [
+        # TTL: records are removed once expires_at has passed
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "broadcasts": [
+        [("state", ASCENDING), ("lease_until", ASCENDING)],
+    ],
+    "email_deliveries": [
+        # Due retries (see app/delivery.py)
+        [("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+        # TTL: sent records are kept EMAIL_DELIVERY_RETENTION_DAYS
+        ([("sent_at", ASCENDING)], {"expireAfterSeconds": Config.EMAIL_DELIVERY_RETENTION_DAYS * 86400}),
+    ],
+    "email_dead_letters": [
+        # TTL: dead letters are kept EMAIL_DEAD_LETTER_RETENTION_DAYS
+        ([("dead_at", ASCENDING)], {"expireAfterSeconds": Config.EMAIL_DEAD_LETTER_RETENTION_DAYS * 86400}),
+    ],
+}
+
+COLLECTIONS = {
+    "members": members,
+    "lecturers": lecturers,
+    "members_archive": members_archive,
+    "student_view_lecturers": student_view_lecturers,
+    "idempotency_keys": idempotency_keys,
+    "broadcasts": broadcasts,
+    "email_deliveries": email_deliveries,
+    "email_dead_letters": email_dead_letters,
+}
+
+
+def ensure_indexes() -> list:
+    """Create any missing index; returns the index names."""
+    created = []
+    for name, keys_list in INDEXES.items():
+        collection = COLLECTIONS[name]
+        for entry in keys_list:
+            keys, options = entry if isinstance(entry, tuple) else (entry, {})
+            created.append(f"{name}.{collection.create_index(keys, **options)}")
+    return created
@@ -0,0 +1,188 @@
+"""
+Student-facing lecturer directory (Student_view_lecturers).
+
+The directory is a projection of Lecturers: one compact entry per lecturer,
+stored under the lecturer's _id, with a precomputed display `name` and a
+`sort_key`, so /Student/view_all_lecturers reads it already in order. Only
+the name fields are copied; students don't see lecturers' contact details.
+
+It is kept current three ways:
+
+- The register endpoints call sync_lecturers() right after inserting. The
+  first sync in a process rebuilds the whole directory instead, which
+  replaces hand-made or older entries (without sort_key, or with contact
+  fields) that would otherwise linger until the nightly rebuild.
+- Each worker follows a change stream on Lecturers (when the server has one,
+  i.e. a replica set) and applies inserts, updates of directory fields,
+  replaces and deletes, including ones made outside this app. Entries are
+  written whole, so workers applying the same change is harmless, and every
+  worker drops its own lecturer_directory_cache entry as it does so.
+- rebuild_directory() (flask rebuild-lecturer-directory) rewrites every entry
+  and removes entries of lecturers that no longer exist.
+"""
+import logging
+import threading
+from pymongo.errors import OperationFailure, PyMongoError
+from config import Config
+from app.cache import lecturer_directory_cache
+from app.metrics import metrics
+from app.repositories import lecturer_repo
+from app.search import fold
+from app.utils import lecturers
+
+logger = logging.getLogger(__name__)
+
+
+# Lecturer fields an entry is built from (what the student view shows)
+SOURCE_FIELDS = ("title", "surname", "first_name", "other_names")
+SOURCE_PROJECTION = {field: 1 for field in SOURCE_FIELDS}
+
+# "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAM_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+CHANGE_STREAM_RETRY_SECONDS = 5
+
+_watcher = None
+_stop = threading.Event()
+
+# Whether this process has rebuilt the directory yet
+_rebuilt = False
+_rebuild_lock = threading.Lock()
+
+
+def display_name(lecturer: dict) -> str:
+    """'Dr Nnadi Onyebuchi' (title, surname, first name, other names)."""
+    parts = (lecturer.get(field) for field in ("title", "surname", "first_name", "other_names"))
+    return " ".join(str(part).strip() for part in parts if part and str(part).strip())
+
+
+def sort_key(lecturer: dict) -> str:
+    """Surname, then first name, then other names; the title is ignored."""
+    return " ".join(fold(lecturer.get(field)) for field in ("surname", "first_name", "other_names"))
+
+
+def directory_entry(lecturer: dict) -> dict:
+    entry = {field: lecturer.get(field) for field in SOURCE_FIELDS}
+    entry.update({"_id": lecturer["_id"], "name": display_name(lecturer), "sort_key": sort_key(lecturer)})
+    return entry
+
+
+def sync_lecturers(docs: list) -> None:
+    """Write the directory entries of these (just inserted or changed) lecturers."""
+    if not docs:
+        return
+    if not _rebuilt:
+        with _rebuild_lock:
+            if not _rebuilt:
+                # First sync in this process: rewrite every entry (these included)
+                rebuild_directory()
+                return
+    lecturer_repo.save_directory_entries([directory_entry(doc) for doc in docs])
+    lecturer_directory_cache.invalidate()
+    metrics.incr("lecturer_directory.synced", len(docs))
+
+
+def remove_lecturers(ids) -> None:
+    if lecturer_repo.remove_directory_entries(ids):
+        lecturer_directory_cache.invalidate()
+        metrics.incr("lecturer_directory.removed")
+
+
+def rebuild_directory(batch_size: int = 500) -> tuple:
+    """Rewrite every entry from Lecturers; returns (entries written, stale entries removed)."""
+    global _rebuilt
+    seen, batch = set(), []
+    for lecturer in lecturer_repo.listing(projection=SOURCE_PROJECTION, batch_size=batch_size, primary=True):
+        seen.add(lecturer["_id"])
+        batch.append(directory_entry(lecturer))
+        if len(batch) >= batch_size:
+            lecturer_repo.save_directory_entries(batch)
+            batch = []
+    lecturer_repo.save_directory_entries(batch)
+
+    removed = lecturer_repo.remove_directory_entries(lecturer_repo.directory_ids() - seen)
+    lecturer_directory_cache.invalidate()
+    _rebuilt = True
+    return len(seen), removed
+
+
+# --- Change stream -----------------------------------------------------------
+
+def apply_change(change: dict) -> None:
+    operation = change["operationType"]
+    if operation == "delete":
+        remove_lecturers([change["documentKey"]["_id"]])
+        return
+
+    if operation == "update":
+        description = change.get("updateDescription", {})
+        touched = set(description.get("updatedFields", {})) | set(description.get("removedFields", []))
+        # Password, OTP or contact detail changes don't show in the directory
+        if not touched & set(SOURCE_FIELDS):
+            return
+
+    lecturer = change.get("fullDocument")
+    if lecturer is None:
+        # Deleted again before the update could be looked up
+        remove_lecturers([change["documentKey"]["_id"]])
+    else:
+        sync_lecturers([lecturer])
+
+
+def watch_lecturers() -> None:
+    """Apply Lecturers changes until stop_directory_sync() is called."""
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    resume_token = None
+
+    while not _stop.is_set():
+        try:
+            with lecturers.watch(pipeline, full_document="updateLookup", resume_after=resume_token,
+                                 max_await_time_ms=1000) as stream:
+                while not _stop.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is not None:
+                        apply_change(change)
+                    resume_token = stream.resume_token
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_UNSUPPORTED:
+                logger.info("Lecturers change stream not available (standalone server); directory synced on write only")
+                return
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                # Changes were missed while disconnected; start over from a full rebuild
+                resume_token = None
+                rebuild_directory()
+                continue
+            metrics.incr("lecturer_directory.stream_failed")
+            logger.exception("Lecturers change stream failed")
+            _stop.wait(CHANGE_STREAM_RETRY_SECONDS)
+        except PyMongoError:
+            metrics.incr("lecturer_directory.stream_failed")
+            logger.exception("Lecturers change stream failed")
+            _stop.wait(CHANGE_STREAM_RETRY_SECONDS)
+
+
+def start_directory_sync(app):
+    """Follow the Lecturers change stream in a background thread of this worker (once)."""
+    global _watcher
+    if _watcher is not None or not Config.LECTURER_DIRECTORY_CHANGE_STREAM or Config.REPOSITORY_BACKEND != "mongo":
+        return _watcher
+
+    def target():
+        with app.app_context():
+            try:
+                watch_lecturers()
+            except Exception:
+                logger.exception("Lecturer directory sync stopped")
+
+    _stop.clear()
+    _watcher = threading.Thread(target=target, name="lecturer-directory-sync", daemon=True)
+    _watcher.start()
+    return _watcher
+
+
+def stop_directory_sync(timeout: float = 2.0) -> None:
+    global _watcher
+    if _watcher is not None:
+        _stop.set()
+        _watcher.join(timeout)
+        _watcher = None
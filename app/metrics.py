@@ -0,0 +1,49 @@
+"""
+Process-local metrics (counters, gauges, timings).
+
+Every gunicorn worker keeps its own numbers; /metrics reports the worker
+that answered, tagged with its pid.
+"""
+import os
+import threading
+
+
+class Metrics(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration (count / total / max, in milliseconds)."""
+        ms = seconds * 1000
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            timing["count"] += 1
+            timing["total_ms"] += ms
+            timing["max_ms"] = max(timing["max_ms"], ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                name: dict(t, avg_ms=round(t["total_ms"] / t["count"], 3) if t["count"] else 0.0)
+                for name, t in self._timings.items()
+            }
+            return {
+                "pid": os.getpid(),
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+
+metrics = Metrics()
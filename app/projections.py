@@ -0,0 +1,52 @@
+"""
+Field projections, defined once per use and applied in the query so Mongo
+only returns (and we only decode and serialize) the fields an endpoint needs.
+
+Inclusion lists rather than exclusions: a new internal field (OTP state,
+search keys, ...) stays out of responses and reports until it is listed here.
+"""
+
+
+def fields(*names) -> dict:
+    """Inclusion projection for `names` (without _id)."""
+    projection = {"_id": 0}
+    projection.update({name: 1 for name in names})
+    return projection
+
+
+# Public member / lecturer fields, in the order reports show them
+MEMBER_FIELDS = (
+    "surname", "first_name", "other_names", "admission_type",
+    "phone_number", "email", "gender", "role", "reg_no",
+)
+LECTURER_FIELDS = (
+    "reg_no", "surname", "first_name", "other_names",
+    "phone_number", "email", "gender", "title", "role",
+)
+
+# Existence checks (duplicate email / reg no ...): nothing but the _id
+EXISTS = {"_id": 1}
+
+# Login: the password hash to verify, plus the slim profile returned
+MEMBER_PROFILE_FIELDS = ("reg_no", "surname", "first_name", "other_names", "email", "gender", "role")
+LECTURER_PROFILE_FIELDS = ("reg_no", "title", "surname", "first_name", "other_names", "email", "gender", "role")
+MEMBER_LOGIN = fields("password", *MEMBER_PROFILE_FIELDS)
+LECTURER_LOGIN = fields("password", *LECTURER_PROFILE_FIELDS)
+
+# Listing endpoints and PDF reports
+MEMBER_LISTING = fields(*MEMBER_FIELDS)
+LECTURER_LISTING = fields(*LECTURER_FIELDS)
+MEMBER_REPORT = MEMBER_LISTING
+LECTURER_REPORT = LECTURER_LISTING
+ANNOUNCEMENT_LISTING = fields("name", "role", "phone_number", "announcement_text", "announcement", "created_at")
+LECTURER_DIRECTORY = {"_id": 0, "sort_key": 0}
+
+# Members as stored in a grouping (and shown in its PDF)
+GROUPING_MEMBER = MEMBER_LISTING
+
+# Archived members (see app/archive.py): copied without password / OTP fields
+ARCHIVE_COPY = dict(fields(*MEMBER_FIELDS, "cohort", "surname_key"), _id=1)
+ARCHIVE_LISTING = fields(*MEMBER_FIELDS, "cohort")
+
+# Search results (see app/search.py)
+SEARCH = fields("reg_no", "surname", "first_name", "other_names", "title", "surname_key", "first_name_key")
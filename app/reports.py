@@ -0,0 +1,466 @@
+"""
+PDF report rendering (ReportLab).
+
+This module is imported lazily (see `reports` in app/utils.py) so ReportLab is
+only loaded into a worker the first time a report is actually requested.
+
+Roster reports are streamed: records are read from the cursor in chunks of
+REPORT_ROWS_PER_CHUNK, and each chunk becomes its own header-less table that
+is only built when ReportLab reaches it, so at most a chunk's worth of rows
+exists as Python objects at a time (the column header is repeated at the top
+of every page instead). ReportLab can only write the file once the last page
+is done, because the PDF's cross-reference table needs every object's
+offset, so the document goes to a spooled temp file (memory up to
+REPORT_SPOOL_MAX_BYTES, disk beyond) and the response streams from it in
+chunks rather than copying it into one bytes object.
+
+Reports made of independent sections (groups, genders) render each section
+as its own PDF fragment in a process pool, then merge the fragments behind a
+contents page and stamp page numbers on the result (see
+render_sectioned_report()).
+"""
+import io
+import time
+import itertools
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from flask import Response
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus.flowables import SetTopFlowables
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+
+
+from config import Config
+from app.metrics import metrics
+
+
+PAGE_SIZE = landscape(letter)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+DETAILED_STYLE = [
+    ("ALIGN", (0, 0), (0, -1), "CENTER"),   # S/N center
+    ("ALIGN", (1, 0), (-1, -1), "LEFT"),    # other fields left
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+]
+DETAILED_HEADER_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.darkblue),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+    ("TOPPADDING", (0, 0), (-1, 0), 6),
+]
+
+COMPACT_STYLE = [
+    ("ALIGN", (0, 0), (0, -1), "CENTER"),  # S/N center
+    ("ALIGN", (1, 0), (-1, -1), "LEFT"),   # Other fields left
+    ("FONTSIZE", (0, 0), (-1, -1), 8),     # Smaller font
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+]
+COMPACT_HEADER_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+]
+
+
+def new_document(output, margin: int = 20) -> SimpleDocTemplate:
+    """Landscape letter document with equal margins."""
+    return SimpleDocTemplate(
+        output,
+        pagesize=PAGE_SIZE,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+    )
+
+
+def usable_width(doc: SimpleDocTemplate) -> float:
+    return doc.pagesize[0] - doc.leftMargin - doc.rightMargin
+
+
+def cell_style(styles, font_size: int = 9, leading: int = 11):
+    """Normal paragraph style used for wrapped table cells."""
+    style = styles["Normal"]
+    style.fontSize = font_size
+    style.leading = leading
+    style.wordWrap = 'CJK'
+    return style
+
+
+def column_weights(headers: list) -> list:
+    """Relative column widths: wide for names/emails, narrow for S/N."""
+    weights = []
+    for col in headers:
+        col = col.lower()
+        if col == "s/n":
+            weights.append(1.3)   # wide enough for 4 digits
+        elif "name" in col or "email" in col or "address" in col:
+            weights.append(4.0)   # allow wrapping
+        elif "phone" in col:
+            weights.append(2.5)
+        else:
+            weights.append(2.0)
+    return weights
+
+
+def table_rows(records: list, keys: list, style, start: int = 1) -> list:
+    """Numbered, Paragraph-wrapped rows for `records` in `keys` order."""
+    return [
+        [Paragraph(str(idx), style)] + [Paragraph(str(record.get(key, "")), style) for key in keys]
+        for idx, record in enumerate(records, start=start)
+    ]
+
+
+def detailed_widths(headers: list, width: float) -> list:
+    weights = column_weights(headers)
+    total_weight = sum(weights)
+    return [(w / total_weight) * width for w in weights]
+
+
+def compact_widths(headers: list, width: float) -> list:
+    return [width / len(headers)] * len(headers)
+
+
+def _table(data: list, col_widths: list, commands: list) -> Table:
+    table = Table(data, colWidths=col_widths)
+    table.setStyle(TableStyle(commands))
+    return table
+
+
+# --- Streaming ---------------------------------------------------------------
+
+class FlowableStream(list):
+    """
+    Flowable list for doc.build() that is filled from a generator as ReportLab
+    consumes it. The build loop checks len() before taking the next flowable,
+    so refilling there keeps only `lookahead` flowables alive at a time.
+    """
+
+    def __init__(self, flowables, lookahead: int = 2):
+        super().__init__()
+        self._pending = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while self._pending is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+        return list.__len__(self)
+
+
+def peek(records):
+    """(first record, iterator over all records) - first record is None when empty."""
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return None, records
+    return first, itertools.chain([first], records)
+
+
+def chunked(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def streamed_table(records, keys: list, col_widths: list, style, commands: list, header_commands: list):
+    """
+    Flowables for one long table: the header (repeated at the top of every
+    following page) and then one header-less table per chunk of records.
+    """
+    headers = ["S/N"] + list(keys)
+    header = _table([[Paragraph(str(h), style) for h in headers]], col_widths, commands + header_commands)
+    yield SetTopFlowables([header], show=True)
+
+    start = 1
+    for chunk in chunked(records, Config.REPORT_ROWS_PER_CHUNK):
+        yield _table(table_rows(chunk, keys, style, start), col_widths, commands)
+        start += len(chunk)
+
+    yield SetTopFlowables([])
+
+
+def spooled_output():
+    return tempfile.SpooledTemporaryFile(max_size=Config.REPORT_SPOOL_MAX_BYTES)
+
+
+def _build_streamed(doc: SimpleDocTemplate, output, elements):
+    """Build into the spooled `output` and return it rewound."""
+    doc.build(FlowableStream(elements))
+    output.seek(0)
+    return output
+
+
+def render_detailed_report(title: str, records, margin: int = 20, keys=None):
+    """
+    Single table report (students, members by gender). `records` can be a
+    cursor; columns are `keys` (default: the first record's fields). Returns a
+    spooled file with the PDF, or None if there are no records.
+    """
+    first, records = peek(records)
+    if first is None:
+        return None
+
+    output = spooled_output()
+    doc = new_document(output, margin)
+    styles = getSampleStyleSheet()
+    style = cell_style(styles)
+
+    keys = list(keys or first.keys())
+    col_widths = detailed_widths(["S/N"] + keys, usable_width(doc))
+    elements = itertools.chain(
+        [Paragraph(title, styles['Title']), Spacer(1, 10)],
+        streamed_table(records, keys, col_widths, style, DETAILED_STYLE, DETAILED_HEADER_STYLE),
+    )
+    return _build_streamed(doc, output, elements)
+
+
+def render_compact_report(title: str, records, keys=None):
+    """Single table report with small font (excos, lecturers), streamed like render_detailed_report."""
+    first, records = peek(records)
+    if first is None:
+        return None
+
+    output = spooled_output()
+    doc = new_document(output)
+    styles = getSampleStyleSheet()
+    style = cell_style(styles, font_size=8, leading=10)
+
+    keys = list(keys or first.keys())
+    col_widths = compact_widths(["S/N"] + keys, usable_width(doc))
+    elements = itertools.chain(
+        [Paragraph(title, styles['Title'])],
+        streamed_table(records, keys, col_widths, style, COMPACT_STYLE, COMPACT_HEADER_STYLE),
+    )
+    return _build_streamed(doc, output, elements)
+
+
+# --- Sectioned reports -------------------------------------------------------
+
+_section_pool = None
+
+
+def _threads_patched() -> bool:
+    """True on gevent workers (gunicorn.conf.py patches threading before the app loads)."""
+    try:
+        from gevent import monkey
+        return monkey.is_module_patched("threading")
+    except ImportError:
+        return False
+
+
+def parallel_sections() -> bool:
+    """
+    Whether sections may go to the process pool. Not on gevent workers: the
+    pool's manager thread, pipes and locks would run on patched threading and
+    sockets, which can hang the worker. Sections are rendered inline there.
+    """
+    return Config.REPORT_RENDER_PROCESSES > 1 and not _threads_patched()
+
+
+def section_pool() -> ProcessPoolExecutor:
+    """
+    This worker's pool of section renderers. Spawned rather than forked: the
+    worker already runs threads (scheduler, artifact writer, Mongo monitors).
+    """
+    global _section_pool
+    if _section_pool is None:
+        _section_pool = ProcessPoolExecutor(
+            max_workers=Config.REPORT_RENDER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _section_pool
+
+
+def shutdown_section_pool() -> None:
+    global _section_pool
+    if _section_pool is not None:
+        _section_pool.shutdown(wait=True)
+        _section_pool = None
+
+
+def render_section(heading: str, records: list, compact: bool = True) -> bytes:
+    """One section (heading and table) as a standalone PDF fragment."""
+    output = io.BytesIO()
+    doc = new_document(output)
+    styles = getSampleStyleSheet()
+    if compact:
+        style = cell_style(styles, font_size=8, leading=10)
+        commands, header_commands, widths = COMPACT_STYLE, COMPACT_HEADER_STYLE, compact_widths
+    else:
+        style = cell_style(styles)
+        commands, header_commands, widths = DETAILED_STYLE, DETAILED_HEADER_STYLE, detailed_widths
+
+    keys = list(records[0].keys())
+    elements = itertools.chain(
+        [Paragraph(heading, styles['Heading2']), Spacer(1, 6)],
+        streamed_table(records, keys, widths(["S/N"] + keys, usable_width(doc)), style, commands, header_commands),
+    )
+    doc.build(FlowableStream(elements))
+    return output.getvalue()
+
+
+def render_contents(title: str, entries: list) -> bytes:
+    """Title and table of contents; `entries` are (heading, first page) pairs."""
+    output = io.BytesIO()
+    doc = new_document(output)
+    styles = getSampleStyleSheet()
+    style = cell_style(styles)
+
+    data = [[Paragraph(str(heading), style), Paragraph(str(page), style)] for heading, page in entries]
+    width = usable_width(doc)
+    contents = Table(data, colWidths=[width * 0.85, width * 0.15])
+    contents.setStyle(TableStyle([
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ]))
+
+    doc.build([Paragraph(title, styles['Title']), Paragraph("Contents", styles['Heading2']), Spacer(1, 6), contents])
+    return output.getvalue()
+
+
+def page_number_overlay(page_count: int) -> bytes:
+    """`page_count` otherwise blank pages carrying "Page i of N" in the bottom margin."""
+    output = io.BytesIO()
+    overlay = canvas.Canvas(output, pagesize=PAGE_SIZE)
+    for number in range(1, page_count + 1):
+        overlay.setFont("Helvetica", 8)
+        overlay.drawCentredString(PAGE_SIZE[0] / 2, 8, f"Page {number} of {page_count}")
+        overlay.showPage()
+    overlay.save()
+    return output.getvalue()
+
+
+def merge_sections(title: str, headings: list, fragments: list):
+    """Contents page + fragments, bookmarked and page-numbered, as a spooled file."""
+    from pypdf import PdfReader, PdfWriter
+
+    readers = [PdfReader(io.BytesIO(fragment)) for fragment in fragments]
+
+    # The contents' own length shifts every section's first page
+    contents_pages = 1
+    while True:
+        entries, page = [], contents_pages + 1
+        for heading, reader in zip(headings, readers):
+            entries.append((heading, page))
+            page += len(reader.pages)
+        contents = PdfReader(io.BytesIO(render_contents(title, entries)))
+        if len(contents.pages) == contents_pages:
+            break
+        contents_pages = len(contents.pages)
+
+    writer = PdfWriter()
+    for page in contents.pages:
+        writer.add_page(page)
+    for (heading, first_page), reader in zip(entries, readers):
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.add_outline_item(heading, first_page - 1)
+
+    numbers = PdfReader(io.BytesIO(page_number_overlay(len(writer.pages))))
+    for page, number in zip(writer.pages, numbers.pages):
+        page.merge_page(number)
+
+    output = spooled_output()
+    writer.write(output)
+    output.seek(0)
+    return output
+
+
+def render_sectioned_report(title: str, sections: list, compact: bool = True):
+    """
+    Report with one section per (heading, records) pair, e.g. one per group.
+    Sections are rendered in parallel when there are enough rows to pay for
+    the process round trip. Returns a spooled file, or None if every section
+    is empty.
+    """
+    sections = [(heading, list(records)) for heading, records in sections]
+    sections = [(heading, records) for heading, records in sections if records]
+    if not sections:
+        return None
+
+    headings = [heading for heading, _ in sections]
+    rows = sum(len(records) for _, records in sections)
+    started = time.perf_counter()
+
+    if parallel_sections() and len(sections) > 1 and rows >= Config.REPORT_PARALLEL_MIN_ROWS:
+        metrics.incr("report.sections.parallel")
+        fragments = list(section_pool().map(
+            render_section, headings, [records for _, records in sections], itertools.repeat(compact)
+        ))
+    else:
+        metrics.incr("report.sections.inline")
+        fragments = [render_section(heading, records, compact) for heading, records in sections]
+
+    pdf_file = merge_sections(title, headings, fragments)
+    metrics.observe("report.sections", time.perf_counter() - started)
+    return pdf_file
+
+
+def render_grouped_report(course_title: str, groups: list) -> bytes:
+    """One section per group."""
+    sections = [(f"Group {index}", group) for index, group in enumerate(groups, start=1)]
+    pdf_file = render_sectioned_report(f"{course_title} - Grouping", sections)
+    with pdf_file:
+        return pdf_file.read()
+
+
+class FileChunks(object):
+    """
+    WSGI body that reads a rendered PDF file in chunks. close() (called by the
+    server once the response is done) hands the file to `on_close`, or closes it.
+    """
+
+    def __init__(self, pdf_file, on_close=None):
+        self.pdf_file = pdf_file
+        self.on_close = on_close
+
+    def __iter__(self):
+        self.pdf_file.seek(0)
+        while True:
+            chunk = self.pdf_file.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        if self.pdf_file is None:
+            return
+        pdf_file, self.pdf_file = self.pdf_file, None
+        if self.on_close is not None:
+            self.on_close(pdf_file)
+        else:
+            pdf_file.close()
+
+
+def pdf_response(pdf, filename: str, on_close=None):
+    """
+    Flask response that downloads `pdf` as `filename`. `pdf` is either bytes
+    or an open binary file, which is streamed and then passed to `on_close`
+    (or closed).
+    """
+    if isinstance(pdf, bytes):
+        response = Response(pdf, mimetype="application/pdf")
+    else:
+        pdf.seek(0, io.SEEK_END)
+        size = pdf.tell()
+        response = Response(FileChunks(pdf, on_close), mimetype="application/pdf", direct_passthrough=True)
+        response.headers["Content-Length"] = str(size)
+
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
@@ -0,0 +1,625 @@
+"""
+Repositories: every student, lecturer, announcement, stats and grouping query
+in one place.
+
+Handlers call domain methods (student_repo.get_by_reg_no(...),
+lecturer_repo.set_otp(...), stats_repo.increment(...)) instead of building
+Mongo queries. Each repository runs on a backend:
+
+- MongoBackend: a collection (writes and primary reads) plus its *_listing
+  handle for listing / report reads (see MONGO_LISTING_READ_PREFERENCE).
+- MemoryBackend: documents in a dict with hash indexes on the looked-up
+  fields. Needs no database, so the repositories and the handlers built on
+  them can be tested and benchmarked on their own (tests/).
+
+REPOSITORY_BACKEND selects "mongo" (default) or "memory". Repositories only
+need equality and $in lookups (a None value also matches a missing field),
+prefix matches, sorted / limited listings, $set / $unset / $inc updates,
+counts per combination of field values and whole-document replace / delete
+by _id, and both backends implement exactly those.
+
+With the memory backend, registration, login, password / OTP, role change,
+listing, report, stats, search, grouping and lecturer directory endpoints
+run without a database. Still Mongo-only, whatever the backend: requests
+that carry an Idempotency-Key (app/idempotency.py), the email outbox behind
+EmailSender (app/delivery.py; replace EmailSender to run mail-sending
+handlers without one), broadcasts, the archive, scheduler leases and the
+CLI maintenance commands.
+"""
+import re
+import copy
+import threading
+from collections import namedtuple
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from werkzeug.local import LocalProxy
+from config import Config
+from app.utils import (
+    members, lecturers, announcement, student_view_lecturers, stats, groupings,
+    members_listing, lecturers_listing, announcement_listing, student_view_lecturers_listing,
+    by_role, by_gender, with_keys,
+)
+from app.projections import (
+    EXISTS, MEMBER_LISTING, LECTURER_LISTING, ANNOUNCEMENT_LISTING, LECTURER_DIRECTORY, ARCHIVE_COPY, SEARCH,
+)
+
+
+# --- Backends ----------------------------------------------------------------
+
+class MongoBackend(object):
+    def __init__(self, collection, listing=None):
+        self.collection = collection
+        self.listing = listing if listing is not None else collection
+
+    def find_one(self, criteria: dict, projection: dict = None):
+        return self.collection.find_one(criteria, projection)
+
+    def find(self, criteria: dict = None, projection: dict = None, sort: str = None,
+             after_id=None, batch_size: int = None, primary: bool = False, limit: int = None):
+        """Matching documents, ascending by `sort`; only _ids after `after_id` if given."""
+        query = dict(criteria or {})
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        cursor = (self.collection if primary else self.listing).find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort, 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        return cursor
+
+    def find_any(self, values: dict, projection: dict = None) -> list:
+        """Documents whose value of any field in `values` is in that field's list."""
+        clauses = [{field: {"$in": list(wanted)}} for field, wanted in values.items() if wanted]
+        if not clauses:
+            return []
+        return list(self.collection.find({"$or": clauses}, projection))
+
+    def find_prefix(self, fields: tuple, prefix: str, projection: dict = None, limit: int = None):
+        """Documents where any of `fields` starts with `prefix` (anchored regexes use the indexes)."""
+        pattern = "^" + re.escape(prefix)
+        clauses = [{field: {"$regex": pattern}} for field in fields]
+        cursor = self.listing.find(clauses[0] if len(clauses) == 1 else {"$or": clauses}, projection)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    def count(self, criteria: dict = None) -> int:
+        return self.collection.count_documents(criteria or {})
+
+    def count_by(self, fields: tuple) -> list:
+        """[({field: value}, count)] for each combination of `fields` values present."""
+        rows = self.collection.aggregate([
+            {"$group": {"_id": {field: f"${field}" for field in fields}, "count": {"$sum": 1}}}
+        ])
+        return [(row["_id"], row["count"]) for row in rows]
+
+    def insert_one(self, doc: dict):
+        return self.collection.insert_one(doc).inserted_id
+
+    def insert_many(self, docs: list) -> None:
+        self.collection.insert_many(docs, ordered=False)
+
+    def update_one(self, criteria: dict, set_fields: dict = None, unset_fields=()) -> bool:
+        update = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if unset_fields:
+            update["$unset"] = {field: "" for field in unset_fields}
+        return self.collection.update_one(criteria, update).modified_count > 0
+
+    def set_by_id(self, updates: dict) -> int:
+        """$set `updates[_id]` on each document; returns how many changed."""
+        if not updates:
+            return 0
+        requests = [UpdateOne({"_id": _id}, {"$set": fields}) for _id, fields in updates.items()]
+        return self.collection.bulk_write(requests, ordered=False).modified_count
+
+    def increment(self, _id, inc: dict, set_fields: dict = None) -> None:
+        """$inc (and $set) dotted paths of the document `_id`, creating it if needed."""
+        update = {"$inc": inc}
+        if set_fields:
+            update["$set"] = set_fields
+        self.collection.update_one({"_id": _id}, update, upsert=True)
+
+    def unset_before(self, field: str, cutoff, unset_fields) -> int:
+        """$unset `unset_fields` wherever `field` is before `cutoff`; returns how many changed."""
+        return self.collection.update_many(
+            {field: {"$lt": cutoff}}, {"$unset": {name: "" for name in unset_fields}}
+        ).modified_count
+
+    def replace_many(self, docs: list) -> None:
+        """Insert each document, or replace the stored one with the same _id."""
+        if docs:
+            self.collection.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False)
+
+    def delete_many(self, ids) -> int:
+        ids = list(ids)
+        if not ids:
+            return 0
+        return self.collection.delete_many({"_id": {"$in": ids}}).deleted_count
+
+
+def _include(source: dict, shaped: dict, path: list) -> None:
+    """Copy the (dotted) `path` of `source` into `shaped`."""
+    head = path[0]
+    if not isinstance(source, dict) or head not in source:
+        return
+    if len(path) == 1:
+        shaped[head] = source[head]
+    else:
+        _include(source[head], shaped.setdefault(head, {}), path[1:])
+
+
+def _parent(doc: dict, path: str) -> tuple:
+    """(dict holding the last key of a dotted `path`, that key), creating the dicts on the way."""
+    *parents, leaf = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    return doc, leaf
+
+
+def project(doc: dict, projection: dict = None) -> dict:
+    """A copy of `doc` shaped by a Mongo-style inclusion / exclusion projection."""
+    if not projection:
+        return dict(doc)
+    included = [field for field, flag in projection.items() if flag and field != "_id"]
+    # {"_id": 1} (EXISTS) is an inclusion projection of nothing but the _id
+    if included or (set(projection) == {"_id"} and projection["_id"]):
+        shaped = {}
+        for field in included:
+            _include(doc, shaped, field.split("."))
+        if projection.get("_id", 1) and "_id" in doc:
+            shaped["_id"] = doc["_id"]
+        return shaped
+    return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+
+class MemoryBackend(object):
+    """In-process documents with hash indexes on `indexed` fields."""
+
+    def __init__(self, indexed=()):
+        self.lock = threading.RLock()
+        self.docs = {}   # _id -> document, in insertion (= ObjectId) order
+        self.indexes = {field: {} for field in indexed}
+
+    def _index(self, doc: dict) -> None:
+        for field, index in self.indexes.items():
+            if field in doc:
+                index.setdefault(doc[field], set()).add(doc["_id"])
+
+    def _unindex(self, doc: dict) -> None:
+        for field, index in self.indexes.items():
+            if field in doc:
+                index.get(doc[field], set()).discard(doc["_id"])
+
+    def _matches(self, criteria: dict) -> list:
+        criteria = criteria or {}
+        # (documents missing a field aren't in its index, so None is matched by scanning)
+        indexed = [field for field in criteria if field in self.indexes and criteria[field] is not None]
+        if indexed:
+            # Start from the smallest index bucket, check the rest of the criteria
+            candidates = min((self.indexes[field].get(criteria[field], set()) for field in indexed), key=len)
+            docs = [self.docs[_id] for _id in sorted(candidates)]
+        else:
+            docs = list(self.docs.values())
+        return [doc for doc in docs if all(doc.get(field) == value for field, value in criteria.items())]
+
+    def find_one(self, criteria: dict, projection: dict = None):
+        with self.lock:
+            matches = self._matches(criteria)
+            return project(matches[0], projection) if matches else None
+
+    def find(self, criteria: dict = None, projection: dict = None, sort: str = None,
+             after_id=None, batch_size: int = None, primary: bool = False, limit: int = None):
+        with self.lock:
+            docs = self._matches(criteria)
+            if after_id is not None:
+                docs = [doc for doc in docs if doc["_id"] > after_id]
+            if sort:
+                docs.sort(key=lambda doc: doc.get(sort, ""))
+            if limit:
+                docs = docs[:limit]
+            return [project(doc, projection) for doc in docs]
+
+    def find_any(self, values: dict, projection: dict = None) -> list:
+        with self.lock:
+            found = {}
+            for field, wanted in values.items():
+                for value in wanted:
+                    for doc in self._matches({field: value}):
+                        found[doc["_id"]] = doc
+            return [project(found[_id], projection) for _id in sorted(found)]
+
+    def find_prefix(self, fields: tuple, prefix: str, projection: dict = None, limit: int = None) -> list:
+        with self.lock:
+            docs = [
+                doc for doc in self.docs.values()
+                if any(isinstance(doc.get(field), str) and doc[field].startswith(prefix) for field in fields)
+            ]
+            return [project(doc, projection) for doc in docs[:limit or None]]
+
+    def count(self, criteria: dict = None) -> int:
+        with self.lock:
+            return len(self._matches(criteria))
+
+    def count_by(self, fields: tuple) -> list:
+        with self.lock:
+            counts = {}
+            for doc in self.docs.values():
+                values = tuple(doc.get(field) for field in fields)
+                counts[values] = counts.get(values, 0) + 1
+            return [
+                ({field: value for field, value in zip(fields, values) if value is not None}, count)
+                for values, count in counts.items()
+            ]
+
+    def insert_one(self, doc: dict):
+        with self.lock:
+            doc.setdefault("_id", ObjectId())
+            stored = dict(doc)
+            self.docs[stored["_id"]] = stored
+            self._index(stored)
+            return stored["_id"]
+
+    def insert_many(self, docs: list) -> None:
+        with self.lock:
+            for doc in docs:
+                self.insert_one(doc)
+
+    def update_one(self, criteria: dict, set_fields: dict = None, unset_fields=()) -> bool:
+        with self.lock:
+            matches = self._matches(criteria)
+            if not matches:
+                return False
+            doc = matches[0]
+            updated = dict(doc, **(set_fields or {}))
+            for field in unset_fields:
+                updated.pop(field, None)
+            if updated == doc:
+                return False
+            self._unindex(doc)
+            self.docs[doc["_id"]] = updated
+            self._index(updated)
+            return True
+
+    def set_by_id(self, updates: dict) -> int:
+        with self.lock:
+            changed = 0
+            for _id, fields in updates.items():
+                doc = self.docs.get(_id)
+                if doc is None:
+                    continue
+                updated = dict(doc, **fields)
+                if updated == doc:
+                    continue
+                self._unindex(doc)
+                self.docs[_id] = updated
+                self._index(updated)
+                changed += 1
+            return changed
+
+    def increment(self, _id, inc: dict, set_fields: dict = None) -> None:
+        with self.lock:
+            current = self.docs.get(_id)
+            # Copied, never changed in place: earlier reads may share its nested dicts
+            updated = copy.deepcopy(current) if current is not None else {"_id": _id}
+            for path, step in inc.items():
+                parent, leaf = _parent(updated, path)
+                parent[leaf] = parent.get(leaf, 0) + step
+            for path, value in (set_fields or {}).items():
+                parent, leaf = _parent(updated, path)
+                parent[leaf] = value
+            if current is not None:
+                self._unindex(current)
+            self.docs[_id] = updated
+            self._index(updated)
+
+    def unset_before(self, field: str, cutoff, unset_fields) -> int:
+        with self.lock:
+            expired = [
+                doc for doc in self.docs.values()
+                if doc.get(field) is not None and doc[field] < cutoff
+            ]
+            for doc in expired:
+                updated = {key: value for key, value in doc.items() if key not in unset_fields}
+                self._unindex(doc)
+                self.docs[doc["_id"]] = updated
+                self._index(updated)
+            return len(expired)
+
+    def replace_many(self, docs: list) -> None:
+        with self.lock:
+            for doc in docs:
+                current = self.docs.get(doc["_id"])
+                if current is not None:
+                    self._unindex(current)
+                stored = dict(doc)
+                self.docs[stored["_id"]] = stored
+                self._index(stored)
+
+    def delete_many(self, ids) -> int:
+        with self.lock:
+            deleted = 0
+            for _id in ids:
+                doc = self.docs.pop(_id, None)
+                if doc is not None:
+                    self._unindex(doc)
+                    deleted += 1
+            return deleted
+
+
+# --- Repositories ------------------------------------------------------------
+
+def _filters(role: str = None, gender: str = None, cohort: str = None) -> dict:
+    criteria = {}
+    if cohort:
+        criteria["cohort"] = cohort
+    if role:
+        criteria.update(by_role(role))
+    if gender:
+        criteria.update(by_gender(gender))
+    return criteria
+
+
+class StudentRepo(object):
+    INDEXED = ("reg_no", "email", "phone_number", "role_key", "gender_key", "cohort")
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_by_reg_no(self, reg_no: str, projection: dict = None):
+        return self.backend.find_one({"reg_no": reg_no}, projection)
+
+    def get_by_phone(self, phone_number: str, projection: dict = None):
+        return self.backend.find_one({"phone_number": phone_number}, projection)
+
+    def exists(self, field: str, value) -> bool:
+        """Whether a student has `value` as its `field` (email, reg_no, ...)."""
+        return self.backend.find_one({field: value}, EXISTS) is not None
+
+    def find_existing(self, emails: list, reg_nos: list) -> list:
+        """{"email", "reg_no"} of the students already using any of these."""
+        return self.backend.find_any({"email": emails, "reg_no": reg_nos}, {"_id": 0, "email": 1, "reg_no": 1})
+
+    def add(self, doc: dict):
+        return self.backend.insert_one(doc)
+
+    def add_many(self, docs: list) -> None:
+        self.backend.insert_many(docs)
+
+    def set_password(self, reg_no: str, hashed_password: str, clear_otp: bool = False) -> bool:
+        unset = ("reset_otp", "otp_expiry") if clear_otp else ()
+        return self.backend.update_one({"reg_no": reg_no}, {"password": hashed_password}, unset)
+
+    def set_otp(self, reg_no: str, otp: str, expiry) -> bool:
+        return self.backend.update_one({"reg_no": reg_no}, {"reset_otp": otp, "otp_expiry": expiry})
+
+    def purge_expired_otps(self, now) -> int:
+        """Drop reset OTPs that expired before `now`; returns how many students had one."""
+        return self.backend.unset_before("otp_expiry", now, ("reset_otp", "otp_expiry"))
+
+    def change_role(self, reg_no: str, old_role: str, new_role: str) -> bool:
+        """Move a student from `old_role` (as stored) to `new_role`; False if it had changed meanwhile."""
+        return self.backend.update_one({"reg_no": reg_no, "role": old_role}, with_keys({"role": new_role}))
+
+    def listing(self, role: str = None, gender: str = None, cohort: str = None, by_surname: bool = False,
+                projection: dict = MEMBER_LISTING, batch_size: int = None, primary: bool = False):
+        """Students (optionally of one role / gender / cohort), sorted by surname when asked."""
+        return self.backend.find(
+            _filters(role, gender, cohort), projection,
+            sort="surname_key" if by_surname else None, batch_size=batch_size, primary=primary
+        )
+
+    def count(self, role: str = None, gender: str = None, cohort: str = None) -> int:
+        return self.backend.count(_filters(role, gender, cohort))
+
+    def count_by(self, fields: tuple) -> list:
+        """[({field: value}, count)] per combination of `fields` values (stats recount)."""
+        return self.backend.count_by(fields)
+
+    def find_by_prefix(self, fields: tuple, prefix: str, limit: int = None, projection: dict = SEARCH):
+        """Students whose value of any of `fields` starts with `prefix` (search)."""
+        return self.backend.find_prefix(fields, prefix, projection, limit)
+
+    def recipients(self, role: str = None, gender: str = None, cohort: str = None, after_id=None,
+                   projection: dict = None, batch_size: int = None):
+        """Students with an email, in _id order after `after_id` (broadcast delivery)."""
+        docs = self.backend.find(
+            _filters(role, gender, cohort), projection,
+            sort="_id", after_id=after_id, batch_size=batch_size, primary=True
+        )
+        return (doc for doc in docs if isinstance(doc.get("email"), str))
+
+    def cohort_batch(self, cohort: str, limit: int, projection: dict = ARCHIVE_COPY) -> list:
+        """Up to `limit` members of `cohort`, lowest _id first (archiving)."""
+        return list(self.backend.find({"cohort": cohort}, projection, sort="_id", primary=True, limit=limit))
+
+    def delete_ids(self, ids) -> int:
+        return self.backend.delete_many(ids)
+
+    def without_cohort(self, projection: dict = None):
+        """Members with no stored cohort (written before cohorts existed)."""
+        return self.backend.find({"cohort": None}, projection or {"reg_no": 1}, primary=True)
+
+    def set_cohorts(self, cohorts: dict) -> int:
+        """{_id: cohort} -> how many members changed."""
+        return self.backend.set_by_id({_id: {"cohort": cohort} for _id, cohort in cohorts.items()})
+
+
+class LecturerRepo(object):
+    INDEXED = ("reg_no", "email", "phone_number")
+
+    def __init__(self, backend, directory_backend):
+        self.backend = backend
+        self.directory_backend = directory_backend
+
+    def get_by_email(self, email: str, projection: dict = None):
+        return self.backend.find_one({"email": email}, projection)
+
+    def get_by_reg_no(self, reg_no: str, projection: dict = None):
+        return self.backend.find_one({"reg_no": reg_no}, projection)
+
+    def get_by_phone(self, phone_number: str, projection: dict = None):
+        return self.backend.find_one({"phone_number": phone_number}, projection)
+
+    def exists(self, field: str, value) -> bool:
+        """Whether a lecturer has `value` as its `field` (reg_no, phone_number, email)."""
+        return self.backend.find_one({field: value}, EXISTS) is not None
+
+    def find_existing(self, reg_nos: list, phone_numbers: list, emails: list) -> list:
+        """{"reg_no", "phone_number", "email"} of the lecturers already using any of these."""
+        return self.backend.find_any(
+            {"reg_no": reg_nos, "phone_number": phone_numbers, "email": emails},
+            {"_id": 0, "reg_no": 1, "phone_number": 1, "email": 1}
+        )
+
+    def add(self, doc: dict):
+        return self.backend.insert_one(doc)
+
+    def add_many(self, docs: list) -> None:
+        self.backend.insert_many(docs)
+
+    def set_password(self, hashed_password: str, email: str = None, reg_no: str = None, clear_otp: bool = False) -> bool:
+        """Set the password of the lecturer with this email (or reg_no)."""
+        criteria = {"email": email} if email is not None else {"reg_no": reg_no}
+        unset = ("reset_otp", "otp_expiry") if clear_otp else ()
+        return self.backend.update_one(criteria, {"password": hashed_password}, unset)
+
+    def set_otp(self, email: str, otp: str, expiry) -> bool:
+        return self.backend.update_one({"email": email}, {"reset_otp": otp, "otp_expiry": expiry})
+
+    def purge_expired_otps(self, now) -> int:
+        """Drop reset OTPs that expired before `now`; returns how many lecturers had one."""
+        return self.backend.unset_before("otp_expiry", now, ("reset_otp", "otp_expiry"))
+
+    def listing(self, by_surname: bool = False, projection: dict = LECTURER_LISTING, batch_size: int = None,
+                primary: bool = False):
+        return self.backend.find(
+            {}, projection,
+            sort="surname_key" if by_surname else None, batch_size=batch_size, primary=primary
+        )
+
+    def count(self) -> int:
+        return self.backend.count()
+
+    def find_by_prefix(self, fields: tuple, prefix: str, limit: int = None, projection: dict = SEARCH):
+        """Lecturers whose value of any of `fields` starts with `prefix` (search)."""
+        return self.backend.find_prefix(fields, prefix, projection, limit)
+
+    def directory(self, projection: dict = LECTURER_DIRECTORY) -> list:
+        """The student-facing lecturer directory (Student_view_lecturers), in display order."""
+        return list(self.directory_backend.find({}, projection, sort="sort_key"))
+
+    def directory_ids(self) -> set:
+        return {entry["_id"] for entry in self.directory_backend.find({}, {"_id": 1}, primary=True)}
+
+    def save_directory_entries(self, entries: list) -> None:
+        """Write directory entries, keyed by the lecturer's _id."""
+        self.directory_backend.replace_many(entries)
+
+    def remove_directory_entries(self, ids) -> int:
+        return self.directory_backend.delete_many(ids)
+
+
+class AnnouncementRepo(object):
+    INDEXED = ("announcement_text",)
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def text_exists(self, announcement_text: str) -> bool:
+        return self.backend.find_one({"announcement_text": announcement_text}, EXISTS) is not None
+
+    def add(self, doc: dict):
+        return self.backend.insert_one(doc)
+
+    def listing(self, projection: dict = ANNOUNCEMENT_LISTING) -> list:
+        return list(self.backend.find({}, projection))
+
+
+class StatsRepo(object):
+    """Materialized counter documents (see app/stats.py), one per _id."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, stats_id: str, projection: dict = None):
+        return self.backend.find_one({"_id": stats_id}, projection)
+
+    def increment(self, stats_id: str, inc: dict, set_fields: dict = None) -> None:
+        """Add `inc` to (dotted) counters in one atomic update, creating the document if needed."""
+        self.backend.increment(stats_id, inc, set_fields)
+
+    def replace(self, doc: dict) -> None:
+        self.backend.replace_many([doc])
+
+
+class GroupingRepo(object):
+    """Stored course groupings (see app/grouping.py), keyed by grouping_key()."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key: str):
+        return self.backend.find_one({"_id": key})
+
+    def save(self, doc: dict) -> None:
+        self.backend.replace_many([doc])
+
+
+# --- Wiring ------------------------------------------------------------------
+
+Repositories = namedtuple("Repositories", ["students", "lecturers", "announcements", "stats", "groupings"])
+
+
+def create_repositories(backend: str) -> Repositories:
+    if backend == "mongo":
+        return Repositories(
+            students=StudentRepo(MongoBackend(members, members_listing)),
+            lecturers=LecturerRepo(
+                MongoBackend(lecturers, lecturers_listing),
+                MongoBackend(student_view_lecturers, student_view_lecturers_listing),
+            ),
+            announcements=AnnouncementRepo(MongoBackend(announcement, announcement_listing)),
+            stats=StatsRepo(MongoBackend(stats)),
+            groupings=GroupingRepo(MongoBackend(groupings)),
+        )
+
+    if backend == "memory":
+        return Repositories(
+            students=StudentRepo(MemoryBackend(StudentRepo.INDEXED)),
+            lecturers=LecturerRepo(MemoryBackend(LecturerRepo.INDEXED), MemoryBackend()),
+            announcements=AnnouncementRepo(MemoryBackend(AnnouncementRepo.INDEXED)),
+            stats=StatsRepo(MemoryBackend()),
+            groupings=GroupingRepo(MemoryBackend()),
+        )
+
+    raise ValueError(f"Unknown REPOSITORY_BACKEND {backend!r}; use 'mongo' or 'memory'")
+
+
+_repositories = None
+_repositories_lock = threading.Lock()
+
+
+def get_repositories() -> Repositories:
+    global _repositories
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = create_repositories(Config.REPOSITORY_BACKEND)
+    return _repositories
+
+
+def set_repositories(repositories: Repositories) -> None:
+    """Swap the repositories in use (tests / benchmarks)."""
+    global _repositories
+    _repositories = repositories
+
+
+student_repo = LocalProxy(lambda: get_repositories().students)
+lecturer_repo = LocalProxy(lambda: get_repositories().lecturers)
+announcement_repo = LocalProxy(lambda: get_repositories().announcements)
+stats_repo = LocalProxy(lambda: get_repositories().stats)
+grouping_repo = LocalProxy(lambda: get_repositories().groupings)
@@ -0,0 +1,154 @@
+"""
+Background jobs (APScheduler).
+
+Every gunicorn worker runs its own scheduler, so each job run first takes a
+lease in the SchedulerLocks collection; only the worker that gets the lease
+runs the job, and the lease is kept until it expires so late workers don't
+repeat the same run.
+
+Started per worker from gunicorn's post_fork hook (or by run.py in
+development) when SCHEDULER_ENABLED is set.
+"""
+import os
+import time
+import logging
+import functools
+from datetime import datetime, timedelta
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from app.metrics import metrics
+from app.utils import scheduler_locks
+
+
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+OWNER = f"{os.uname().nodename}:{os.getpid()}" if hasattr(os, "uname") else str(os.getpid())
+
+
+def acquire_lock(name: str, lease_seconds: int) -> bool:
+    """Take the lease for `name` unless another worker holds an unexpired one."""
+    now = datetime.utcnow()
+    try:
+        scheduler_locks.find_one_and_update(
+            {"_id": name, "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + timedelta(seconds=lease_seconds), "owner": OWNER, "acquired_at": now}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The lock document exists and is still leased
+        return False
+
+
+def locked_job(name: str, lease_seconds: int):
+    """Run the decorated job only in the worker that gets the lease."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(app):
+            if not acquire_lock(name, lease_seconds):
+                metrics.incr(f"scheduler.{name}.skipped")
+                return
+
+            started = time.perf_counter()
+            try:
+                with app.app_context():
+                    func()
+                metrics.incr(f"scheduler.{name}.ok")
+            except Exception:
+                metrics.incr(f"scheduler.{name}.failed")
+                logger.exception("Scheduled job %s failed", name)
+            finally:
+                metrics.observe(f"scheduler.{name}", time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# --- Jobs --------------------------------------------------------------------
+
+@locked_job("prerender_reports", lease_seconds=3600)
+def prerender_reports():
+    """Render every standard report (and the open cohorts' copies) so daytime downloads are served warm."""
+    from app.standard_reports import STANDARD_REPORTS, COHORT_REPORTS, render_and_store
+    for name in STANDARD_REPORTS:
+        render_and_store(name)
+    for cohort in Config.STUDENT_COHORTS:
+        for name in COHORT_REPORTS:
+            render_and_store(name, cohort)
+
+
+@locked_job("reconcile_stats", lease_seconds=3600)
+def reconcile_stats():
+    """Recount the materialized counters in case a write path missed an update."""
+    from app.stats import rebuild_member_stats, rebuild_lecturer_stats
+    rebuild_member_stats()
+    rebuild_lecturer_stats()
+
+
+@locked_job("rebuild_lecturer_directory", lease_seconds=3600)
+def rebuild_lecturer_directory():
+    """Rewrite the student-facing lecturer directory (catches writes the change stream couldn't see)."""
+    from app.lecturer_directory import rebuild_directory
+    rebuild_directory()
+
+
+@locked_job("purge_expired_otps", lease_seconds=600)
+def purge_expired_otps():
+    """Remove reset OTP fields that have expired."""
+    from app.repositories import student_repo, lecturer_repo
+    now = datetime.utcnow()
+    for repo in (student_repo, lecturer_repo):
+        repo.purge_expired_otps(now)
+
+
+@locked_job("resume_broadcasts", lease_seconds=50)
+def resume_broadcasts():
+    """Continue announcement broadcasts that are queued or whose sender died."""
+    from app.broadcast import resume_broadcasts as run_pending
+    run_pending()
+
+
+@locked_job("retry_email_deliveries", lease_seconds=50)
+def retry_email_deliveries():
+    """Resend emails whose backoff has elapsed."""
+    from app.delivery import retry_due
+    retry_due()
+
+
+@locked_job("purge_old_downloads", lease_seconds=3600)
+def purge_old_downloads():
+    """Delete stored artifacts older than DOWNLOADS_RETENTION_DAYS."""
+    from app.artifacts import get_store
+    get_store().purge(time.time() - Config.DOWNLOADS_RETENTION_DAYS * 86400)
+
+
+# --- Scheduler ---------------------------------------------------------------
+
+def start_scheduler(app) -> BackgroundScheduler:
+    """Start this process's scheduler (once)."""
+    global _scheduler
+    if _scheduler is not None or not Config.SCHEDULER_ENABLED:
+        return _scheduler
+
+    scheduler = BackgroundScheduler(timezone=Config.SCHEDULER_TIMEZONE, job_defaults={"coalesce": True, "max_instances": 1})
+    hour = Config.NIGHTLY_JOBS_HOUR
+
+    scheduler.add_job(reconcile_stats, "cron", hour=hour, minute=0, args=[app], id="reconcile_stats")
+    scheduler.add_job(rebuild_lecturer_directory, "cron", hour=hour, minute=5, args=[app], id="rebuild_lecturer_directory")
+    scheduler.add_job(prerender_reports, "cron", hour=hour, minute=15, args=[app], id="prerender_reports")
+    scheduler.add_job(purge_old_downloads, "cron", hour=hour, minute=45, args=[app], id="purge_old_downloads")
+    scheduler.add_job(purge_expired_otps, "interval", minutes=15, args=[app], id="purge_expired_otps")
+    scheduler.add_job(resume_broadcasts, "interval", minutes=1, args=[app], id="resume_broadcasts")
+    scheduler.add_job(retry_email_deliveries, "interval", minutes=1, args=[app], id="retry_email_deliveries")
+
+    scheduler.start()
+    _scheduler = scheduler
+    return scheduler
+
+
+def shutdown_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
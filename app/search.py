@@ -0,0 +1,183 @@
+"""
+Student / lecturer search.
+
+Every member and lecturer document carries folded (lower-case, accent and
+punctuation free) copies of its names, `surname_key` and `first_name_key`,
+written by the register paths and indexed, so prefix searches are index
+range scans. Typo-tolerant matching ranks a small, index-selected candidate
+set by similarity.
+
+SEARCH_BACKEND = "trigram" instead keeps an in-memory trigram index of both
+collections (rebuilt every SEARCH_INDEX_TTL seconds), which suits small
+deployments.
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from config import Config
+from app.cache import TTLCache
+from app.repositories import student_repo, lecturer_repo
+from app.projections import SEARCH as SEARCH_PROJECTION
+
+# Candidates scored for fuzzy matching, per collection
+FUZZY_CANDIDATES = 500
+FUZZY_THRESHOLD = 0.7
+
+NAME_KEYS = ("surname_key", "first_name_key")
+
+_non_alnum = re.compile(r"[^a-z0-9]+")
+
+
+def fold(value) -> str:
+    """'Ọkafọr-Eze ' -> 'okaforeze'"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", str(value))
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return _non_alnum.sub("", value.lower())
+
+
+def search_keys(doc: dict) -> dict:
+    """Derived search fields stored alongside a member/lecturer document."""
+    return {
+        "surname_key": fold(doc.get("surname")),
+        "first_name_key": fold(doc.get("first_name")),
+    }
+
+
+def similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _result(doc: dict, kind: str, score: float) -> dict:
+    return {
+        "type": kind,
+        "reg_no": doc.get("reg_no"),
+        "surname": doc.get("surname"),
+        "first_name": doc.get("first_name"),
+        "other_names": doc.get("other_names"),
+        "title": doc.get("title"),
+        "score": round(score, 3),
+    }
+
+
+def _best_name_score(query: str, doc: dict) -> float:
+    return max(
+        similarity(query, doc.get("surname_key", "")),
+        similarity(query, doc.get("first_name_key", "")),
+    )
+
+
+# --- Indexed backend ("mongo") ------------------------------------------------
+
+def _indexed_search(repo, kind: str, query: str, limit: int) -> list:
+    reg_no_query = query.strip().upper()
+    name_query = fold(query)
+    results = {}
+
+    # reg_no prefix (anchored, case-sensitive prefix match can use the index)
+    if "/" in reg_no_query or reg_no_query[:1].isdigit():
+        for doc in repo.find_by_prefix(("reg_no",), reg_no_query, limit, SEARCH_PROJECTION):
+            results[doc["reg_no"]] = _result(doc, kind, 1.0)
+
+    if not name_query:
+        return list(results.values())
+
+    # surname / first name prefix
+    for doc in repo.find_by_prefix(NAME_KEYS, name_query, limit, SEARCH_PROJECTION):
+        results.setdefault(doc.get("reg_no"), _result(doc, kind, 1.0))
+
+    # typo tolerant: score names sharing the first letter
+    if len(results) < limit and len(name_query) >= 3:
+        candidates = repo.find_by_prefix(NAME_KEYS, name_query[0], FUZZY_CANDIDATES, SEARCH_PROJECTION)
+        for doc in candidates:
+            if doc.get("reg_no") in results:
+                continue
+            score = _best_name_score(name_query, doc)
+            if score >= FUZZY_THRESHOLD:
+                results[doc.get("reg_no")] = _result(doc, kind, score)
+
+    return list(results.values())
+
+
+# --- In-memory trigram backend -----------------------------------------------
+
+def trigrams(value: str) -> set:
+    value = f"  {value} "
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class TrigramIndex(object):
+    def __init__(self, entries: list):
+        # entries: [(kind, doc)]
+        self.entries = entries
+        self.postings = {}
+        for position, (_, doc) in enumerate(entries):
+            for key in (doc.get("surname_key", ""), doc.get("first_name_key", "")):
+                for gram in trigrams(key):
+                    self.postings.setdefault(gram, set()).add(position)
+
+    def search(self, query: str, kinds: tuple, limit: int) -> list:
+        reg_no_query = query.strip().upper()
+        name_query = fold(query)
+        results = {}
+
+        for kind, doc in self.entries:
+            if kind in kinds and reg_no_query and str(doc.get("reg_no", "")).startswith(reg_no_query):
+                results[(kind, doc.get("reg_no"))] = _result(doc, kind, 1.0)
+
+        if name_query:
+            query_grams = trigrams(name_query)
+            hits = {}
+            for gram in query_grams:
+                for position in self.postings.get(gram, ()):
+                    hits[position] = hits.get(position, 0) + 1
+
+            # Best trigram overlaps first, then exact scoring on those only
+            for position, _ in sorted(hits.items(), key=lambda h: -h[1])[:FUZZY_CANDIDATES]:
+                kind, doc = self.entries[position]
+                if kind not in kinds or (kind, doc.get("reg_no")) in results:
+                    continue
+                if doc.get("surname_key", "").startswith(name_query) or doc.get("first_name_key", "").startswith(name_query):
+                    score = 1.0
+                else:
+                    score = _best_name_score(name_query, doc)
+                if score >= FUZZY_THRESHOLD:
+                    results[(kind, doc.get("reg_no"))] = _result(doc, kind, score)
+
+        return list(results.values())
+
+
+def build_trigram_index() -> TrigramIndex:
+    entries = [("student", doc) for doc in student_repo.listing(projection=SEARCH_PROJECTION)]
+    entries += [("lecturer", doc) for doc in lecturer_repo.listing(projection=SEARCH_PROJECTION)]
+    return TrigramIndex(entries)
+
+
+search_index_cache = TTLCache("search_index", ttl=Config.SEARCH_INDEX_TTL)
+
+
+# --- Entry point -------------------------------------------------------------
+
+SCOPES = {
+    "students": ("student",),
+    "lecturers": ("lecturer",),
+    "all": ("student", "lecturer"),
+}
+
+
+def search(query: str, scope: str = "all", limit: int = 20) -> list:
+    """Best matches first (exact/prefix matches score 1.0)."""
+    kinds = SCOPES[scope]
+
+    if Config.SEARCH_BACKEND == "trigram":
+        results = search_index_cache.get_or_load("index", build_trigram_index).search(query, kinds, limit)
+    else:
+        results = []
+        if "student" in kinds:
+            results += _indexed_search(student_repo, "student", query, limit)
+        if "lecturer" in kinds:
+            results += _indexed_search(lecturer_repo, "lecturer", query, limit)
+
+    results.sort(key=lambda r: (-r["score"], (r["surname"] or "").lower(), (r["first_name"] or "").lower()))
+    return results[:limit]
@@ -0,0 +1,170 @@
+"""
+Standard (unparameterised) PDF reports.
+
+Each report is rendered by one function, used both by its download endpoint
+and by the nightly pre-render job. Rendered PDFs are kept in the artifact
+store (app/artifacts.py); a kept PDF is served as long as it was rendered
+after the last change to the collection it was built from (see app/stats.py
+last_changed()).
+
+Member reports can also be rendered for a single cohort; that copy is kept
+under its own file name and only goes stale when that cohort changes.
+
+Reports are rendered straight from a Mongo cursor (sorted by the indexed
+surname_key where needed) and streamed to the client (see app/reports.py);
+a fresh render is handed to the store's background pool once it has been sent.
+Every render is kept, and its freshness is judged against the stats written
+on the primary, so renders read the primary too: a copy read from a lagging
+secondary would be served as current until the next change.
+"""
+import os
+import time
+from config import Config
+from app import artifacts
+from app.metrics import metrics
+from app.stats import MEMBER_STATS_ID, LECTURER_STATS_ID, last_changed, member_cohorts
+from app.utils import reports
+from app.repositories import student_repo, lecturer_repo
+from app.projections import MEMBER_REPORT, LECTURER_REPORT, MEMBER_FIELDS, LECTURER_FIELDS
+
+
+def _students(role: str = None, gender: str = None, cohort: str = None, by_surname: bool = False):
+    return student_repo.listing(role=role, gender=gender, cohort=cohort, by_surname=by_surname,
+                                projection=MEMBER_REPORT, batch_size=Config.REPORT_CURSOR_BATCH_SIZE, primary=True)
+
+
+def cohort_title(title: str, cohort: str = None) -> str:
+    """'026 Excos' -> '026 Excos - 2023 Cohort' for cohort 2023."""
+    return f"{title} - {cohort} Cohort" if cohort else title
+
+
+def render_students(cohort: str = None):
+    return reports.render_detailed_report(cohort_title("026 Students", cohort), _students(cohort=cohort),
+                                          margin=15, keys=MEMBER_FIELDS)
+
+
+def render_sorted_students(cohort: str = None):
+    return reports.render_detailed_report(cohort_title("026 Students List", cohort),
+                                          _students(cohort=cohort, by_surname=True), keys=MEMBER_FIELDS)
+
+
+def render_excos(cohort: str = None):
+    excos = _students(role="exco", cohort=cohort, by_surname=True)
+    return reports.render_compact_report(cohort_title("026 Excos List", cohort), excos, keys=MEMBER_FIELDS)
+
+
+def render_members_by_gender(gender: str, cohort: str = None):
+    members_by_gender = _students(gender=gender, cohort=cohort, by_surname=True)
+    title = cohort_title(f"026 Members List - {gender.capitalize()}", cohort)
+    return reports.render_detailed_report(title, members_by_gender, keys=MEMBER_FIELDS)
+
+
+def render_members_by_gender_sections(cohort: str = None):
+    sections = [
+        (gender.capitalize(), _students(gender=gender, cohort=cohort, by_surname=True))
+        for gender in ("male", "female")
+    ]
+    return reports.render_sectioned_report(cohort_title("026 Members List by Gender", cohort), sections, compact=False)
+
+
+def render_members_by_cohort_sections():
+    sections = [
+        (f"{cohort} Cohort", _students(cohort=cohort, by_surname=True))
+        for cohort in member_cohorts()
+    ]
+    return reports.render_sectioned_report("026 Members List by Cohort", sections, compact=False)
+
+
+def render_lecturers():
+    lecturers_list = lecturer_repo.listing(by_surname=True, projection=LECTURER_REPORT,
+                                           batch_size=Config.REPORT_CURSOR_BATCH_SIZE, primary=True)
+    return reports.render_compact_report("All Lecturers List", lecturers_list, keys=LECTURER_FIELDS)
+
+
+# name -> (stored file name, source stats id, render function)
+STANDARD_REPORTS = {
+    "students": ("026 Students.pdf", MEMBER_STATS_ID, render_students),
+    "students_sorted": ("026 Students Sorted.pdf", MEMBER_STATS_ID, render_sorted_students),
+    "excos": ("026_Excos.pdf", MEMBER_STATS_ID, render_excos),
+    "members_male": ("026_Members_male.pdf", MEMBER_STATS_ID, lambda cohort=None: render_members_by_gender("male", cohort)),
+    "members_female": ("026_Members_female.pdf", MEMBER_STATS_ID, lambda cohort=None: render_members_by_gender("female", cohort)),
+    "members_all": ("026_Members_all.pdf", MEMBER_STATS_ID, render_members_by_gender_sections),
+    "members_by_cohort": ("026_Members_by_cohort.pdf", MEMBER_STATS_ID, render_members_by_cohort_sections),
+    "lecturers": ("All_Lecturers.pdf", LECTURER_STATS_ID, render_lecturers),
+}
+
+# Reports that can be rendered for one cohort (render(cohort=...))
+COHORT_REPORTS = ("students", "students_sorted", "excos", "members_male", "members_female", "members_all")
+
+
+def cohort_filename(filename: str, cohort: str = None) -> str:
+    """'026_Excos.pdf' -> '026_Excos 2023.pdf' for cohort 2023."""
+    if not cohort:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f"{stem} {cohort}{ext}"
+
+
+def _report(name: str, cohort: str = None):
+    """(stored file name, stats id, render function taking no arguments) for `name` / `cohort`."""
+    filename, stats_id, render = STANDARD_REPORTS[name]
+    if cohort is None:
+        return filename, stats_id, render
+    if name not in COHORT_REPORTS:
+        raise ValueError(f"Report {name} has no per-cohort version")
+    return cohort_filename(filename, cohort), stats_id, lambda: render(cohort=cohort)
+
+
+def render_and_store(name: str, cohort: str = None) -> bool:
+    """Render report `name` (of one cohort) and store it (synchronously; used by the pre-render job)."""
+    filename, _, render = _report(name, cohort)
+    rendered_at = time.time()
+    pdf_file = render()
+    if pdf_file is None:
+        return False
+
+    try:
+        artifacts.get_store().put(filename, pdf_file, rendered_at)
+    finally:
+        pdf_file.close()
+    return True
+
+
+def read_current(name: str, cohort: str = None):
+    """The kept PDF for `name` (of one cohort) as an open file, or None when missing or out of date."""
+    filename, stats_id, _ = _report(name, cohort)
+    store = artifacts.get_store()
+    rendered_at = store.stored_at(filename)
+    if rendered_at is None:
+        return None
+
+    changed_at = last_changed(stats_id, cohort)
+    if changed_at is None or changed_at >= rendered_at:
+        return None
+
+    return store.open(filename)
+
+
+def report_response(name: str, download_name: str, cohort: str = None):
+    """
+    Streaming download of report `name`, of every member or of one cohort
+    (kept copy if current, else rendered now and stored after it has been
+    sent), or None if the report is empty.
+    """
+    download_name = cohort_filename(download_name, cohort)
+    pdf_file = read_current(name, cohort)
+    if pdf_file is not None:
+        metrics.incr(f"report.{name}.warm")
+        return reports.pdf_response(pdf_file, download_name)
+
+    metrics.incr(f"report.{name}.render")
+    filename, _, render = _report(name, cohort)
+    rendered_at = time.time()
+    pdf_file = render()
+    if pdf_file is None:
+        return None
+
+    return reports.pdf_response(
+        pdf_file, download_name,
+        on_close=lambda f: artifacts.put_async(filename, f, rendered_at)
+    )
@@ -0,0 +1,151 @@
+"""
+Materialized member counters.
+
+A single document in the Stats collection holds totals by role, gender and
+admission type, and the same counts per cohort under `cohorts`. Every write
+path that adds a member or changes a role updates it with one atomic $inc, so
+summary endpoints read one document instead of scanning Students_name.
+rebuild_member_stats() recomputes it from scratch.
+
+Each stats document's `updated_at` doubles as the time of the last change to
+its collection (see last_changed()), which pre-rendered reports use to decide
+whether they are still current. Each cohort has its own `updated_at`, so a
+new intake registering doesn't make older cohorts' reports stale.
+"""
+from datetime import datetime
+from app.repositories import student_repo, lecturer_repo, stats_repo
+
+
+MEMBER_STATS_ID = "members"
+LECTURER_STATS_ID = "lecturers"
+
+# Member fields that are counted, e.g. {"role": {"exco": 3, "student": 120}}
+COUNTED_FIELDS = ("role", "gender", "admission_type")
+
+
+def stat_key(value) -> str:
+    """'Direct entry' -> 'direct_entry'"""
+    return str(value or "unknown").strip().lower().replace(" ", "_").replace(".", "_")
+
+
+def _increments(doc: dict, step: int = 1) -> dict:
+    counts = {f"{field}.{stat_key(doc.get(field))}": step for field in COUNTED_FIELDS}
+    cohort = f"cohorts.{stat_key(doc.get('cohort'))}"
+    inc = dict(counts)
+    inc[f"{cohort}.total"] = step
+    inc.update({f"{cohort}.{key}": value for key, value in counts.items()})
+    return inc
+
+
+def record_members_added(docs: list) -> None:
+    """Count newly inserted member documents."""
+    if not docs:
+        return
+
+    now = datetime.utcnow()
+    inc = {"total": len(docs)}
+    changed = {"updated_at": now}
+    for doc in docs:
+        for key, step in _increments(doc).items():
+            inc[key] = inc.get(key, 0) + step
+        changed[f"cohorts.{stat_key(doc.get('cohort'))}.updated_at"] = now
+
+    stats_repo.increment(MEMBER_STATS_ID, inc, changed)
+
+
+def record_member_added(doc: dict) -> None:
+    record_members_added([doc])
+
+
+def record_role_change(old_role: str, new_role: str, cohort: str = None) -> None:
+    """Move one member (of `cohort`) from `old_role` to `new_role`."""
+    now = datetime.utcnow()
+    prefix = f"cohorts.{stat_key(cohort)}"
+    stats_repo.increment(
+        MEMBER_STATS_ID,
+        {
+            f"role.{stat_key(old_role)}": -1, f"role.{stat_key(new_role)}": 1,
+            f"{prefix}.role.{stat_key(old_role)}": -1, f"{prefix}.role.{stat_key(new_role)}": 1,
+        },
+        {"updated_at": now, f"{prefix}.updated_at": now},
+    )
+
+
+def rebuild_member_stats() -> dict:
+    """Recount everything from Students_name and replace the stats document."""
+    doc = {"_id": MEMBER_STATS_ID, "total": 0}
+    doc.update({field: {} for field in COUNTED_FIELDS})
+    cohorts = {}
+
+    # One count per (cohort, role, gender, admission type) combination
+    for values, count in student_repo.count_by(("cohort",) + COUNTED_FIELDS):
+        cohort = cohorts.setdefault(
+            stat_key(values.get("cohort")), dict({"total": 0}, **{field: {} for field in COUNTED_FIELDS})
+        )
+        doc["total"] += count
+        cohort["total"] += count
+        for field in COUNTED_FIELDS:
+            key = stat_key(values.get(field))
+            doc[field][key] = doc[field].get(key, 0) + count
+            cohort[field][key] = cohort[field].get(key, 0) + count
+    doc["cohorts"] = cohorts
+
+    return _replace_if_changed(doc)
+
+
+def _replace_if_changed(doc: dict) -> dict:
+    """Store `doc`, keeping the old updated_at (overall and per cohort) when the counts didn't change."""
+    current = stats_repo.get(doc["_id"]) or {}
+    updated_at = current.pop("updated_at", None)
+    now = datetime.utcnow()
+
+    current_cohorts = current.get("cohorts", {})
+    for key, counts in doc.get("cohorts", {}).items():
+        previous = dict(current_cohorts.get(key, {}))
+        previous_at = previous.pop("updated_at", None)
+        counts["updated_at"] = previous_at if previous == counts and previous_at else now
+
+    if current != doc or updated_at is None:
+        updated_at = now
+
+    doc["updated_at"] = updated_at
+    stats_repo.replace(doc)
+    return doc
+
+
+def record_lecturers_added(count: int = 1) -> None:
+    stats_repo.increment(LECTURER_STATS_ID, {"total": count}, {"updated_at": datetime.utcnow()})
+
+
+def rebuild_lecturer_stats() -> dict:
+    return _replace_if_changed({"_id": LECTURER_STATS_ID, "total": lecturer_repo.count()})
+
+
+def last_changed(stats_id: str, cohort: str = None):
+    """When the collection behind `stats_id` (or one cohort of it) last changed (None if unknown)."""
+    if cohort is None:
+        doc = stats_repo.get(stats_id, {"updated_at": 1})
+        return doc.get("updated_at") if doc else None
+
+    key = stat_key(cohort)
+    doc = stats_repo.get(stats_id, {f"cohorts.{key}.updated_at": 1})
+    return doc.get("cohorts", {}).get(key, {}).get("updated_at") if doc else None
+
+
+def get_member_stats(cohort: str = None) -> dict:
+    """
+    Current counters, overall or for one cohort (rebuilt on first use if the
+    document doesn't exist yet or predates per-cohort counts).
+    """
+    doc = stats_repo.get(MEMBER_STATS_ID)
+    if doc is None or "cohorts" not in doc:
+        doc = rebuild_member_stats()
+    if cohort is None:
+        return doc
+    return doc["cohorts"].get(stat_key(cohort), {"total": 0})
+
+
+def member_cohorts() -> list:
+    """Cohorts that have members, oldest first."""
+    cohorts = get_member_stats()["cohorts"]
+    return sorted(key for key, counts in cohorts.items() if counts.get("total"))
@@ -1,12 +1,73 @@
 import re
-from app import app, api, mongo
+import importlib
+from app import mongo
+from config import Config
+from pymongo import ReadPreference
+from werkzeug.local import LocalProxy
 from datetime import datetime, date, timedelta, timezone as pythontz
 
-#DATABASE collections
-members = mongo.db.Students_name
-announcement = mongo.db.Announcement
-lecturers = mongo.db.Lecturers
-student_view_lecturers = mongo.db.Student_view_lecturers
+
+def lazy_import(module_name: str, attribute: str = None):
+    """
+    Proxy that imports `module_name` (and optionally one attribute of it) on first use.
+    Keeps heavy dependencies (ReportLab, smtplib/MIME) out of workers that never need them.
+    """
+    def load():
+        module = importlib.import_module(module_name)
+        return getattr(module, attribute) if attribute else module
+    return LocalProxy(load)
+
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primarypreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondarypreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def listing_collection(name: str):
+    """Collection handle for listing/report reads, using MONGO_LISTING_READ_PREFERENCE."""
+    read_preference = READ_PREFERENCES[Config.MONGO_LISTING_READ_PREFERENCE.lower()]
+    return mongo.db.get_collection(name, read_preference=read_preference)
+
+
+#DATABASE collections (resolved once mongo has been bound by create_app)
+members = LocalProxy(lambda: mongo.db.Students_name)
+announcement = LocalProxy(lambda: mongo.db.Announcement)
+lecturers = LocalProxy(lambda: mongo.db.Lecturers)
+student_view_lecturers = LocalProxy(lambda: mongo.db.Student_view_lecturers)
+stats = LocalProxy(lambda: mongo.db.Stats)
+groupings = LocalProxy(lambda: mongo.db.Groups)
+scheduler_locks = LocalProxy(lambda: mongo.db.SchedulerLocks)
+idempotency_keys = LocalProxy(lambda: mongo.db.IdempotencyKeys)
+broadcasts = LocalProxy(lambda: mongo.db.Broadcasts)
+email_deliveries = LocalProxy(lambda: mongo.db.EmailDeliveries)
+email_dead_letters = LocalProxy(lambda: mongo.db.EmailDeadLetters)
+members_archive = LocalProxy(lambda: mongo.db.Students_archive)
+
+# Read-only handles for listing/report endpoints (may be served by secondaries)
+members_listing = LocalProxy(lambda: listing_collection("Students_name"))
+announcement_listing = LocalProxy(lambda: listing_collection("Announcement"))
+lecturers_listing = LocalProxy(lambda: listing_collection("Lecturers"))
+student_view_lecturers_listing = LocalProxy(lambda: listing_collection("Student_view_lecturers"))
+members_archive_listing = LocalProxy(lambda: listing_collection("Students_archive"))
+
+# Heavy dependencies, loaded on first use
+reports = lazy_import("app.reports")
+EmailSender = lazy_import("app.email_util", "EmailSender")
+
+
+# Validation patterns (compiled once)
+GMAIL_REGEX = re.compile(
+    r"^(?!\.)"                 # cannot start with dot
+    r"(?!.*\.\.)"              # no consecutive dots
+    r"[a-zA-Z0-9](?:[a-zA-Z0-9._]{4,28}[a-zA-Z0-9])?"  # local part
+    r"@gmail\.com$"            # must end with @gmail.com
+)
+NG_PHONE_LOCAL_REGEX = re.compile(r"^(0)(70|80|81|90|91)\d{8}$")         # 11 digits
+NG_PHONE_INTL_REGEX = re.compile(r"^(\+234|234)(70|80|81|90|91)\d{8}$")  # 13 digits
 
 
 def is_valid_gmail(email: str) -> bool:
@@ -18,15 +79,7 @@ def is_valid_gmail(email: str) -> bool:
     if not isinstance(email, str) or not email:
         return False
 
-    # Regex for Gmail
-    gmail_regex = re.compile(
-        r"^(?!\.)"                 # cannot start with dot
-        r"(?!.*\.\.)"              # no consecutive dots
-        r"[a-zA-Z0-9](?:[a-zA-Z0-9._]{4,28}[a-zA-Z0-9])?"  # local part
-        r"@gmail\.com$"            # must end with @gmail.com
-    )
-
-    return re.match(gmail_regex, email) is not None
+    return GMAIL_REGEX.match(email) is not None
 
 
 def is_valid_nigerian_number(phone: str) -> bool:
@@ -41,11 +94,7 @@ def is_valid_nigerian_number(phone: str) -> bool:
     # Remove spaces and dashes
     phone = phone.strip().replace(" ", "").replace("-", "")
 
-    # Regex patterns
-    local_pattern = re.compile(r"^(0)(70|80|81|90|91)\d{8}$")      # 11 digits
-    intl_pattern = re.compile(r"^(\+234|234)(70|80|81|90|91)\d{8}$")  # 13 digits
-
-    return bool(local_pattern.match(phone) or intl_pattern.match(phone))
+    return bool(NG_PHONE_LOCAL_REGEX.match(phone) or NG_PHONE_INTL_REGEX.match(phone))
 
 
 def normalize_name(value: str) -> str:
@@ -66,3 +115,30 @@ def normalize_phone(value: str) -> str:
 def normalize_word(value: str) -> str:
     """Capitalize first letter only (for Gender, Role, Admission type)."""
     return value.strip().capitalize()
+
+
+# Lower-case shadow copies of the fields listings filter on ("Exco" -> role_key "exco").
+# Exact matches on these use the (role_key / gender_key, surname_key) indexes
+# instead of a case-insensitive regex scan.
+KEY_FIELDS = ("role", "gender")
+
+
+def canonical(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def with_keys(fields: dict) -> dict:
+    """`fields` plus the shadow key of every KEY_FIELDS entry in it (for inserts and $set)."""
+    keyed = dict(fields)
+    for field in KEY_FIELDS:
+        if field in fields:
+            keyed[f"{field}_key"] = canonical(fields[field])
+    return keyed
+
+
+def by_role(role: str) -> dict:
+    return {"role_key": canonical(role)}
+
+
+def by_gender(gender: str) -> dict:
+    return {"gender_key": canonical(gender)}
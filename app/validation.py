@@ -0,0 +1,367 @@
+"""
+Schema-driven validation for registration data and request bodies.
+
+A Schema is a list of Fields, each with a normalizer and ordered checks
+(predicate, message). Schemas and their regexes are built once at import.
+Validation runs column-wise: each field is normalized and checked across the
+whole batch in one pass, producing a per-row validity mask and a list of row
+errors. Single registrations use the same schema through validate_record(),
+and endpoints read their arguments with parse_request() (JSON body, falling
+back to query / form values) instead of building a reqparse parser per
+request. Both raise a 400 of the form
+{"message": <first error>, "errors": [{"field", "error"}, ...]}.
+
+Student reg_nos are checked against Config.STUDENT_REG_NO_PATTERNS, which
+also give each student its cohort (see cohort_of()).
+"""
+import re
+from flask import request
+from flask_restful import inputs
+from werkzeug.exceptions import BadRequest
+from config import Config
+from app.grouping import STRATEGIES
+from app.utils import (
+    is_valid_gmail, is_valid_nigerian_number,
+    normalize_name, normalize_email, normalize_phone,
+)
+
+
+def _lower(value: str) -> str:
+    return value.strip().lower()
+
+
+def _upper(value: str) -> str:
+    return value.strip().upper()
+
+
+def _title(value: str) -> str:
+    return value.strip().capitalize()
+
+
+def _strip(value: str) -> str:
+    return value.strip()
+
+
+def _int(value: str) -> int:
+    return int(value.strip())
+
+
+def _boolean(value: str) -> bool:
+    return inputs.boolean(value.strip())
+
+
+def _whole(value: str) -> int:
+    """'12' -> 12; ValueError for anything but digits."""
+    value = value.strip()
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+def _blank(raw) -> bool:
+    return raw is None or (isinstance(raw, str) and not raw.strip())
+
+
+class Field(object):
+    def __init__(self, name: str, required: bool = True, normalize=None, checks=(), unique: bool = False,
+                 missing_message: str = None, default=None, many: bool = False, invalid_message: str = None):
+        self.name = name
+        self.required = required
+        self.normalize = normalize    # str -> value; may raise ValueError (reported as invalid_message)
+        self.checks = tuple(checks)   # ((predicate, message), ...)
+        self.unique = unique          # must not repeat within a batch
+        self.missing_message = missing_message or f"{name} is required"
+        self.default = default        # value of an optional field that is missing
+        self.many = many              # a list of values (a single value becomes a one-item list)
+        self.invalid_message = invalid_message or f"Invalid {name}"
+
+    def convert(self, raw):
+        """Normalized value of one non-blank raw value."""
+        if not isinstance(raw, str):
+            raw = str(raw)
+        return self.normalize(raw) if self.normalize else raw
+
+
+class Schema(object):
+    def __init__(self, fields: list):
+        self.fields = tuple(fields)
+
+    def validate_batch(self, records: list, all_errors: bool = False):
+        """
+        Validate and normalize `records` column by column.
+        Returns (rows, mask, errors): normalized rows, a list of booleans
+        (True = row valid) and [{"row", "field", "error"}] in row order.
+        Only the first error of each row is reported unless `all_errors`.
+        """
+        count = len(records)
+        rows = [{} for _ in range(count)]
+        mask = [True] * count
+        failed = set()   # (row, field) pairs already reported
+        errors = []
+
+        def fail(index, field, message):
+            if mask[index] or all_errors:
+                errors.append({"row": index, "field": field, "error": message})
+            mask[index] = False
+            failed.add((index, field))
+
+        def pending(index, field):
+            return (mask[index] or all_errors) and (index, field) not in failed
+
+        for field in self.fields:
+            name = field.name
+            column = [record.get(name) if isinstance(record, dict) else None for record in records]
+
+            # Normalize the column (missing/blank -> default)
+            values = []
+            for index, raw in enumerate(column):
+                if field.many and not _blank(raw):
+                    raw = [item for item in (raw if isinstance(raw, list) else [raw]) if not _blank(item)] or None
+                if _blank(raw):
+                    if field.required:
+                        fail(index, name, field.missing_message)
+                    values.append(None)
+                    continue
+                try:
+                    values.append([field.convert(item) for item in raw] if field.many else field.convert(raw))
+                except (ValueError, TypeError):
+                    fail(index, name, field.invalid_message)
+                    values.append(None)
+
+            # Checks, in order; the first failing check is reported
+            for predicate, message in field.checks:
+                for index, value in enumerate(values):
+                    if value is not None and pending(index, name) and not predicate(value):
+                        fail(index, name, message)
+
+            for row, value in zip(rows, values):
+                row[name] = field.default if value is None else value
+
+        # Duplicates inside the batch, once every other check has run: only
+        # rows that are still valid claim a value, so a row isn't rejected as
+        # a duplicate of one that will never be inserted
+        for field in self.fields:
+            if not field.unique:
+                continue
+            seen = set()
+            for index, row in enumerate(rows):
+                value = row[field.name]
+                if value is None or not mask[index]:
+                    continue
+                if value in seen:
+                    fail(index, field.name, f"Duplicate {field.name} in batch")
+                else:
+                    seen.add(value)
+
+        errors.sort(key=lambda e: e["row"])
+        return rows, mask, errors
+
+    def validate_record(self, record: dict) -> dict:
+        """Normalized copy of one record; raises a structured 400 listing every error."""
+        rows, mask, errors = self.validate_batch([record], all_errors=True)
+        if not mask[0]:
+            raise request_error(errors)
+        return rows[0]
+
+    def parse_request(self) -> dict:
+        """Validated arguments of the current request (see request_data())."""
+        return self.validate_record(request_data())
+
+
+def request_data() -> dict:
+    """The request's JSON object, over its query string / form values."""
+    data = request.values.to_dict(flat=False) if request.values else {}
+    data = {key: values[0] if len(values) == 1 else values for key, values in data.items()}
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        data.update(body)
+    return data
+
+
+def request_error(errors: list) -> BadRequest:
+    """400 carrying {"message": <first error>, "errors": [{"field", "error"}, ...]}."""
+    error = BadRequest(errors[0]["error"])
+    # flask-restful sends `data` as the response body
+    error.data = {
+        "message": errors[0]["error"],
+        "errors": [{"field": e["field"], "error": e["error"]} for e in errors],
+    }
+    return error
+
+
+# --- Shared checks ---------------------------------------------------------
+
+ADMISSION_TYPES = ["utme", "direct entry", "transfer admission"]
+GENDERS = ["male", "female"]
+STUDENT_ROLES = ["student", "exco"]
+LECTURER_TITLES = ["Dr", "Prof"]
+
+PHONE_CHECK = (is_valid_nigerian_number, "Invalid Nigerian phone number format")
+GMAIL_CHECK = (is_valid_gmail, "Invalid Gmail address")
+GENDER_CHECK = (lambda v: v in GENDERS, "Gender must be either 'Male' or 'Female'")
+
+REG_NO_PATTERNS = tuple(re.compile(pattern) for pattern in Config.STUDENT_REG_NO_PATTERNS)
+COHORT_FORMAT = re.compile(r"[0-9A-Za-z_-]{1,20}")
+
+
+def cohort_of(reg_no: str):
+    """'2023/123456' -> '2023' (None when no pattern matches)."""
+    for pattern in REG_NO_PATTERNS:
+        match = pattern.fullmatch(reg_no or "")
+        if match:
+            return match.group("cohort")
+    return None
+
+
+def parse_cohort(value):
+    """Cohort filter from a request ('' / None -> None); raises ValueError when malformed."""
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    if not COHORT_FORMAT.fullmatch(value):
+        raise ValueError("Invalid cohort")
+    return value
+
+
+def requested_cohort(data: dict = None):
+    """
+    The `cohort` filter of the current request: from the query string, or
+    from `data` for JSON bodies. None means every cohort; BadRequest if malformed.
+    """
+    value = data.get("cohort") if data is not None else request.args.get("cohort")
+    try:
+        return parse_cohort(value)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+if len(Config.STUDENT_COHORTS) == 1:
+    _COHORT_MESSAGE = f"Registration number must start with '{Config.STUDENT_COHORTS[0]}/'"
+else:
+    _COHORT_MESSAGE = f"Registration number must start with one of {[f'{c}/' for c in Config.STUDENT_COHORTS]}"
+
+STUDENT_REG_NO_CHECKS = (
+    (lambda v: cohort_of(v) is not None, "Invalid registration number format"),
+    (lambda v: cohort_of(v) in Config.STUDENT_COHORTS, _COHORT_MESSAGE),
+)
+
+
+STUDENT_SCHEMA = Schema([
+    Field("surname", normalize=normalize_name, missing_message="Surname is required"),
+    Field("first_name", normalize=normalize_name, missing_message="First name is required"),
+    Field("other_names", required=False, normalize=normalize_name),
+    Field("admission_type", normalize=_lower, missing_message="Admission type is required", checks=[
+        (lambda v: v in ADMISSION_TYPES, f"Admission type must be one of {ADMISSION_TYPES}"),
+    ]),
+    Field("phone_number", normalize=normalize_phone, unique=True,
+          missing_message="Phone number is required", checks=[PHONE_CHECK]),
+    Field("email", normalize=normalize_email, unique=True, missing_message="Email is required", checks=[GMAIL_CHECK]),
+    Field("gender", normalize=_lower, missing_message="Gender is required", checks=[GENDER_CHECK]),
+    Field("role", normalize=_lower, missing_message="Role is required", checks=[
+        (lambda v: v in STUDENT_ROLES, "Role must be one of ['Student', 'Exco']"),
+    ]),
+    Field("reg_no", normalize=_upper, unique=True,
+          missing_message="Registration number is required", checks=STUDENT_REG_NO_CHECKS),
+])
+
+
+LECTURER_SCHEMA = Schema([
+    Field("reg_no", normalize=_upper, unique=True, missing_message="Registration number is required"),
+    Field("surname", normalize=normalize_name, missing_message="Surname is required"),
+    Field("first_name", normalize=normalize_name, missing_message="First name is required"),
+    Field("other_names", required=False, normalize=normalize_name),
+    Field("phone_number", normalize=normalize_phone, unique=True,
+          missing_message="Phone number is required", checks=[PHONE_CHECK]),
+    Field("email", normalize=normalize_email, unique=True, missing_message="Email is required", checks=[GMAIL_CHECK]),
+    Field("gender", normalize=_lower, missing_message="Gender is required", checks=[GENDER_CHECK]),
+    Field("title", required=False, normalize=_title, checks=[
+        (lambda v: v in LECTURER_TITLES, "Title must be either 'Dr' or 'Prof'"),
+    ]),
+])
+
+
+# --- Request schemas -------------------------------------------------------
+# Built once here and read with parse_request(); passwords are passed through
+# as sent, except where the endpoint has always stripped them.
+
+def _reg_no(message: str = "Registration number is required") -> Field:
+    return Field("reg_no", normalize=_upper, missing_message=message)
+
+
+def _email(message: str = "Lecturer email is required") -> Field:
+    return Field("email", normalize=normalize_email, missing_message=message)
+
+
+def _password(name: str, message: str, strip: bool = False) -> Field:
+    return Field(name, normalize=_strip if strip else None, missing_message=message)
+
+
+OTP_FIELD = Field("otp", normalize=_strip, missing_message="OTP is required")
+NEW_PASSWORD_FIELD = _password("new_password", "New password is required")
+PREVIOUS_PASSWORD_FIELD = _password("previous_password", "Previous password is required")
+
+STUDENT_LOGIN_SCHEMA = Schema([_reg_no(), _password("password", "Password is required", strip=True)])
+LECTURER_LOGIN_SCHEMA = Schema([
+    _reg_no("Lecturer registration number is required"),
+    _password("password", "Password is required", strip=True),
+])
+
+STUDENT_PASSWORD_CHANGE_SCHEMA = Schema([_reg_no(), PREVIOUS_PASSWORD_FIELD, NEW_PASSWORD_FIELD])
+LECTURER_PASSWORD_CHANGE_SCHEMA = Schema([_email("Email is required"), PREVIOUS_PASSWORD_FIELD, NEW_PASSWORD_FIELD])
+
+STUDENT_FORGOT_PASSWORD_SCHEMA = Schema([_reg_no()])
+LECTURER_FORGOT_PASSWORD_SCHEMA = Schema([_email()])
+
+STUDENT_RESET_PASSWORD_SCHEMA = Schema([
+    _reg_no("Student registration number is required"), OTP_FIELD,
+    _password("new_password", "New password is required", strip=True),
+])
+LECTURER_RESET_PASSWORD_SCHEMA = Schema([
+    _email(), OTP_FIELD, _password("new_password", "New password is required", strip=True),
+])
+
+# Promote / demote: the acting lecturer's credentials and the student
+ROLE_CHANGE_SCHEMA = Schema([
+    _email(), _password("password", "Lecturer password is required"),
+    _reg_no("Student reg_no is required"),
+])
+
+# /admin endpoints: lecturer credentials, plus each endpoint's own fields
+ADMIN_FIELDS = (_email(), _password("password", "Lecturer password is required"))
+DELIVERY_STATUSES = ("sending", "retrying", "sent")
+LIMIT_FIELD = Field("limit", required=False, normalize=_int, default=50, invalid_message="Limit must be a number")
+
+EMAIL_DELIVERIES_SCHEMA = Schema([
+    *ADMIN_FIELDS,
+    Field("status", required=False, normalize=_lower, checks=[
+        (lambda v: v in DELIVERY_STATUSES, "Status must be sending, retrying or sent"),
+    ]),
+    LIMIT_FIELD,
+])
+EMAIL_DEAD_LETTERS_SCHEMA = Schema([*ADMIN_FIELDS, Field("kind", required=False, normalize=_strip), LIMIT_FIELD])
+REQUEUE_DEAD_LETTERS_SCHEMA = Schema([
+    *ADMIN_FIELDS,
+    Field("ids", required=False, normalize=_strip, many=True),
+    Field("all", required=False, normalize=_boolean, default=False, invalid_message="'all' must be true or false"),
+])
+ARCHIVE_COHORT_SCHEMA = Schema([
+    *ADMIN_FIELDS,
+    Field("cohort", normalize=parse_cohort, missing_message="Cohort is required", invalid_message="Invalid cohort"),
+    Field("force", required=False, normalize=_boolean, default=False, invalid_message="'force' must be true or false"),
+])
+
+# /members/groups and /members/download-groups
+GROUPING_SCHEMA = Schema([
+    Field("course_title", normalize=_strip, missing_message="Course title is required"),
+    Field("group_size", normalize=_whole, missing_message="Group size must be a valid number",
+          invalid_message="Group size must be a valid number", checks=[
+              (lambda v: v > 0, "Group size must be greater than zero"),
+          ]),
+    Field("strategy", required=False, normalize=_lower, default="sequential", checks=[
+        (lambda v: v in STRATEGIES, f"Strategy must be one of {list(STRATEGIES)}"),
+    ]),
+    Field("seed", required=False, normalize=_whole, invalid_message="Seed must be a whole number"),
+    Field("regenerate", required=False, normalize=_boolean, default=False,
+          invalid_message="'regenerate' must be true or false"),
+    Field("cohort", required=False, normalize=parse_cohort, invalid_message="Invalid cohort"),
+])
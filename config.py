@@ -1,4 +1,5 @@
 import os
+import multiprocessing
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -14,4 +15,154 @@ class Config(object):
     SMTP_SERVER = os.environ.get('SMTP_SERVER')
     SMTP_PORT = os.environ.get('SMTP_PORT')
     IMAGE_URL = os.environ.get('IMAGE_URL')
-    LECTURER_IMAGE_URL = os.environ.get('LECTURER_IMAGE_URL')
\ No newline at end of file
+    LECTURER_IMAGE_URL = os.environ.get('LECTURER_IMAGE_URL')
+
+    # MongoClient pool / timeouts
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 20000))
+    # "majority" or a number of nodes, e.g. "1"
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN', 'majority')
+    # Default reads, and reads for listing endpoints (which can tolerate
+    # slightly stale data and may be served by secondaries). Stored PDF
+    # reports are always rendered from the primary.
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_LISTING_READ_PREFERENCE = os.environ.get('MONGO_LISTING_READ_PREFERENCE', 'secondaryPreferred')
+
+    # Largest batch accepted by the bulk registration endpoints
+    BULK_REGISTER_MAX = int(os.environ.get('BULK_REGISTER_MAX', 1000))
+
+    # Student intakes: a reg_no must fully match one of these (space separated)
+    # regexes, whose `cohort` group (the entry year) is stored on the member;
+    # only cohorts listed in STUDENT_COHORTS can register
+    STUDENT_REG_NO_PATTERNS = os.environ.get('STUDENT_REG_NO_PATTERNS', r'(?P<cohort>\d{4})/[^/]{1,6}').split()
+    STUDENT_COHORTS = os.environ.get('STUDENT_COHORTS', '2022').replace(',', ' ').split()
+
+    # Data access for students / lecturers / announcements: "mongo", or
+    # "memory" (in-process, for tests and benchmarks; see app/repositories.py)
+    REPOSITORY_BACKEND = os.environ.get('REPOSITORY_BACKEND', 'mongo').lower()
+
+    # In-process caches (seconds)
+    LECTURER_DIRECTORY_CACHE_TTL = int(os.environ.get('LECTURER_DIRECTORY_CACHE_TTL', 300))
+    GROUPING_PDF_CACHE_TTL = int(os.environ.get('GROUPING_PDF_CACHE_TTL', 3600))
+    # Most group PDFs each worker keeps in memory
+    GROUPING_PDF_CACHE_MAX_ENTRIES = int(os.environ.get('GROUPING_PDF_CACHE_MAX_ENTRIES', 32))
+
+    # Keep Student_view_lecturers in step with Lecturers through a change
+    # stream (replica sets only; see app/lecturer_directory.py)
+    LECTURER_DIRECTORY_CHANGE_STREAM = os.environ.get('LECTURER_DIRECTORY_CHANGE_STREAM', 'true').lower() == 'true'
+
+    # Search: "mongo" (indexed search keys) or "trigram" (in-memory index)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'mongo').lower()
+    SEARCH_INDEX_TTL = int(os.environ.get('SEARCH_INDEX_TTL', 300))
+
+    # Streamed PDF reports: rows built per table chunk, Mongo cursor batch
+    # size, and how large a rendered PDF may get before spilling to disk
+    REPORT_ROWS_PER_CHUNK = int(os.environ.get('REPORT_ROWS_PER_CHUNK', 100))
+    REPORT_CURSOR_BATCH_SIZE = int(os.environ.get('REPORT_CURSOR_BATCH_SIZE', 500))
+    REPORT_SPOOL_MAX_BYTES = int(os.environ.get('REPORT_SPOOL_MAX_BYTES', 4 * 1024 * 1024))
+    # Sectioned reports (groups, genders): processes per worker rendering
+    # sections in parallel (1 = inline; always inline on gevent workers), and
+    # the smallest report worth it
+    REPORT_RENDER_PROCESSES = int(os.environ.get('REPORT_RENDER_PROCESSES', min(4, os.cpu_count() or 1)))
+    REPORT_PARALLEL_MIN_ROWS = int(os.environ.get('REPORT_PARALLEL_MIN_ROWS', 300))
+
+    # Members moved per batch when a cohort is archived (app/archive.py)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+
+    # Idempotency-Key support on write endpoints (seconds): how long a stored
+    # response is replayed, and when an unfinished claim may be taken over
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+    IDEMPOTENCY_PROCESSING_TIMEOUT = int(os.environ.get('IDEMPOTENCY_PROCESSING_TIMEOUT', 300))
+
+    # Announcement broadcasts: overall send rate, parallel SMTP connections,
+    # recipients per connection, and how long a sender holds a broadcast
+    # between progress checkpoints (must exceed one round of batches)
+    BROADCAST_RATE_PER_MINUTE = int(os.environ.get('BROADCAST_RATE_PER_MINUTE', 120))
+    BROADCAST_CONCURRENCY = int(os.environ.get('BROADCAST_CONCURRENCY', 4))
+    BROADCAST_BATCH_SIZE = int(os.environ.get('BROADCAST_BATCH_SIZE', 50))
+    BROADCAST_LEASE_SECONDS = int(os.environ.get('BROADCAST_LEASE_SECONDS', 600))
+
+    # Email delivery retries: attempts before a message is dead-lettered,
+    # backoff between attempts (seconds, doubling up to the max), and how
+    # long sent delivery records and dead letters are kept
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 30))
+    EMAIL_RETRY_MAX_SECONDS = int(os.environ.get('EMAIL_RETRY_MAX_SECONDS', 3600))
+    EMAIL_DELIVERY_RETENTION_DAYS = int(os.environ.get('EMAIL_DELIVERY_RETENTION_DAYS', 30))
+    EMAIL_DEAD_LETTER_RETENTION_DAYS = int(os.environ.get('EMAIL_DEAD_LETTER_RETENTION_DAYS', 30))
+
+    # SMTP timeouts (seconds) for connecting and for each command / send, and
+    # the circuit breaker: consecutive failures before mail is held in the
+    # outbox instead of tried, and how long before the server is probed again
+    SMTP_CONNECT_TIMEOUT = float(os.environ.get('SMTP_CONNECT_TIMEOUT', 5))
+    SMTP_SEND_TIMEOUT = float(os.environ.get('SMTP_SEND_TIMEOUT', 15))
+    SMTP_BREAKER_FAILURES = int(os.environ.get('SMTP_BREAKER_FAILURES', 5))
+    SMTP_BREAKER_COOLDOWN = int(os.environ.get('SMTP_BREAKER_COOLDOWN', 60))
+
+    # Pre-rendered reports and other generated files
+    DOWNLOADS_DIR = os.environ.get('DOWNLOADS_DIR', 'Downloads')
+    DOWNLOADS_RETENTION_DAYS = int(os.environ.get('DOWNLOADS_RETENTION_DAYS', 7))
+    # Artifact store: "local" (one file per name) or "content" (content-addressed)
+    ARTIFACT_STORE = os.environ.get('ARTIFACT_STORE', 'local').lower()
+    ARTIFACT_WRITE_WORKERS = int(os.environ.get('ARTIFACT_WRITE_WORKERS', 2))
+
+    # Background jobs (APScheduler)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_TIMEZONE = os.environ.get('SCHEDULER_TIMEZONE', 'Africa/Lagos')
+    NIGHTLY_JOBS_HOUR = int(os.environ.get('NIGHTLY_JOBS_HOUR', 2))
+
+    # Health / readiness probes
+    HEALTHCHECK_TIMEOUT_MS = int(os.environ.get('HEALTHCHECK_TIMEOUT_MS', 500))
+
+    # Production server (gunicorn) settings
+    # "sync" = one request per process, "gevent" = cooperative workers that
+    # yield while waiting on SMTP / MongoDB instead of holding the process.
+    GUNICORN_BIND = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'sync').lower()
+    GUNICORN_WORKERS = int(os.environ.get(
+        'GUNICORN_WORKERS',
+        multiprocessing.cpu_count() if GUNICORN_WORKER_CLASS == 'gevent' else multiprocessing.cpu_count() * 2 + 1
+    ))
+    GUNICORN_WORKER_CONNECTIONS = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+    GUNICORN_PRELOAD = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+    GUNICORN_KEEPALIVE = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+    GUNICORN_MAX_REQUESTS = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+    # Request time budgets (seconds). PDF exports get a longer budget than
+    # normal API calls; the gunicorn worker timeout is the largest of these.
+    REQUEST_TIMEOUT = int(os.environ.get('REQUEST_TIMEOUT', 30))
+    REPORT_TIMEOUT = int(os.environ.get('REPORT_TIMEOUT', 120))
+    REPORT_ROUTE_PREFIXES = (
+        "/students/download",
+        "/excos/download",
+        "/members/download",
+        "/lecturers/download",
+    )
+
+    # Admission control (per worker): requests of each route class allowed in
+    # flight at once, and how long a request may queue for a slot before it is
+    # turned away with 503 + Retry-After. Requests only run concurrently on
+    # gevent (or threaded) workers; a sync worker never queues.
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    ADMISSION_AUTH_LIMIT = int(os.environ.get('ADMISSION_AUTH_LIMIT', 20))
+    ADMISSION_READ_LIMIT = int(os.environ.get('ADMISSION_READ_LIMIT', 20))
+    ADMISSION_WRITE_LIMIT = int(os.environ.get('ADMISSION_WRITE_LIMIT', 10))
+    ADMISSION_REPORT_LIMIT = int(os.environ.get('ADMISSION_REPORT_LIMIT', 2))
+    ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', 2))
+    AUTH_ROUTE_PREFIXES = (
+        "/api/student/login",
+        "/api/lecturer/login",
+        "/api/student/forgot-password",
+        "/api/lecturer/forgot-password",
+        "/api/student/reset-password-using-otp",
+        "/api/lecturer/reset-password-using-otp",
+        "/api/change-password",
+        "/api/lecturer/change_password",
+    )
+    # Never queued or rejected (probes and metrics)
+    ADMISSION_EXEMPT_PREFIXES = ("/healthz", "/readyz", "/metrics")
@@ -0,0 +1,60 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+All knobs are read from Config (and therefore from the environment / .env).
+"""
+from config import Config
+
+# gevent has to patch the stdlib before the app (pymongo, smtplib, ...) is
+# imported, and with preload_app the app is imported in the master process.
+if Config.GUNICORN_WORKER_CLASS == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+
+bind = Config.GUNICORN_BIND
+worker_class = Config.GUNICORN_WORKER_CLASS
+workers = Config.GUNICORN_WORKERS
+worker_connections = Config.GUNICORN_WORKER_CONNECTIONS
+
+# Load the app once in the master so workers fork with it already imported
+preload_app = Config.GUNICORN_PRELOAD
+
+# The worker timeout must cover the slowest route (PDF exports);
+# shorter per-route budgets are enforced by wsgi.RouteTimeoutMiddleware.
+timeout = max(Config.REQUEST_TIMEOUT, Config.REPORT_TIMEOUT)
+graceful_timeout = Config.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = Config.GUNICORN_KEEPALIVE
+
+# Recycle workers periodically to keep memory (ReportLab buffers) bounded
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = Config.GUNICORN_MAX_REQUESTS_JITTER
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Background jobs run in every worker, guarded by a Mongo lease (app/scheduler.py)
+    from wsgi import app
+    from app.scheduler import start_scheduler
+    from app.lecturer_directory import start_directory_sync
+    start_scheduler(app)
+    start_directory_sync(app)
+
+
+def worker_exit(server, worker):
+    import sys
+    from app.scheduler import shutdown_scheduler
+    from app.artifacts import shutdown as flush_artifacts
+    from app.lecturer_directory import stop_directory_sync
+    shutdown_scheduler()
+    stop_directory_sync()
+    flush_artifacts()
+
+    # Section renderer processes, if this worker ever started them
+    reports = sys.modules.get("app.reports")
+    if reports is not None:
+        reports.shutdown_section_pool()
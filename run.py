@@ -1,5 +1,11 @@
-from app import app
+from app import create_app
 from config import Config
 
+app = create_app(Config)
+
 if __name__=='__main__':
+    from app.scheduler import start_scheduler
+    from app.lecturer_directory import start_directory_sync
+    start_scheduler(app)
+    start_directory_sync(app)
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Admission control middleware around a dummy WSGI app:
+
+    python -m unittest discover tests
+"""
+import unittest
+from types import SimpleNamespace
+from werkzeug.test import EnvironBuilder
+from app.admission import AdmissionControlMiddleware
+
+
+def settings(**overrides):
+    config = SimpleNamespace(
+        AUTH_ROUTE_PREFIXES=("/api/student/login", "/api/lecturer/login"),
+        REPORT_ROUTE_PREFIXES=("/members/download", "/students/download"),
+        ADMISSION_EXEMPT_PREFIXES=("/healthz", "/metrics"),
+        ADMISSION_MAX_WAIT=0.05,
+        ADMISSION_AUTH_LIMIT=4, ADMISSION_READ_LIMIT=4, ADMISSION_WRITE_LIMIT=4, ADMISSION_REPORT_LIMIT=1,
+    )
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def streaming_app(environ, start_response):
+    """Answers with a body of three chunks."""
+    start_response("200 OK", [("Content-Type", "application/pdf")])
+    return iter([b"a", b"b", b"c"])
+
+
+def broken_app(environ, start_response):
+    raise RuntimeError("handler failed")
+
+
+def failing_body_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "application/pdf")])
+
+    def body():
+        yield b"a"
+        raise RuntimeError("render failed")
+    return body()
+
+
+class Response(object):
+    def __init__(self, middleware, path: str, method: str = "GET"):
+        self.status = None
+        self.headers = {}
+        self.body = middleware(EnvironBuilder(path=path, method=method).get_environ(), self.start_response)
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = status
+        self.headers = dict(headers)
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_route_classes(self):
+        middleware = AdmissionControlMiddleware(streaming_app, settings())
+        self.assertEqual(middleware.classify("POST", "/api/student/login"), "auth")
+        self.assertEqual(middleware.classify("GET", "/members/download-groups"), "report")
+        self.assertEqual(middleware.classify("POST", "/students/download"), "report")
+        self.assertEqual(middleware.classify("POST", "/announcement"), "write")
+        self.assertEqual(middleware.classify("DELETE", "/members/exco"), "write")
+        self.assertEqual(middleware.classify("GET", "/members"), "read")
+        self.assertIsNone(middleware.classify("GET", "/healthz"))
+        self.assertIsNone(middleware.classify("OPTIONS", "/members/download-groups"))
+
+
+class AdmissionTest(unittest.TestCase):
+    def test_slot_held_until_body_is_closed(self):
+        middleware = AdmissionControlMiddleware(streaming_app, settings())
+        report = middleware.classes["report"]
+
+        response = Response(middleware, "/members/download-groups")
+        self.assertEqual(report.in_flight, 1)
+        self.assertEqual(b"".join(response.body), b"abc")
+        self.assertEqual(report.in_flight, 1)
+        response.body.close()
+        self.assertEqual(report.in_flight, 0)
+
+    def test_busy_class_is_rejected_with_retry_after(self):
+        middleware = AdmissionControlMiddleware(streaming_app, settings())
+        held = Response(middleware, "/members/download-groups")
+
+        rejected = Response(middleware, "/students/download")
+        self.assertEqual(rejected.status, "503 Service Unavailable")
+        self.assertEqual(rejected.headers["Retry-After"], "1")
+        self.assertIn(b"busy", b"".join(rejected.body))
+
+        # Other classes are not affected
+        login = Response(middleware, "/api/student/login", method="POST")
+        self.assertEqual(login.status, "200 OK")
+        login.body.close()
+
+        held.body.close()
+        admitted = Response(middleware, "/students/download")
+        self.assertEqual(admitted.status, "200 OK")
+        admitted.body.close()
+
+    def test_request_gives_up_after_max_wait(self):
+        middleware = AdmissionControlMiddleware(streaming_app, settings(ADMISSION_MAX_WAIT=0.2))
+        report = middleware.classes["report"]
+        report.avg_seconds = 0.01    # the queue looks short, so the request waits
+        held = Response(middleware, "/members/download-groups")
+
+        rejected = Response(middleware, "/members/download-groups")
+        self.assertEqual(rejected.status, "503 Service Unavailable")
+        self.assertEqual(report.waiting, 0)
+        held.body.close()
+
+    def test_slot_released_when_the_app_raises(self):
+        middleware = AdmissionControlMiddleware(broken_app, settings())
+        with self.assertRaises(RuntimeError):
+            Response(middleware, "/members/download-groups")
+        self.assertEqual(middleware.classes["report"].in_flight, 0)
+
+    def test_slot_released_when_the_body_raises(self):
+        middleware = AdmissionControlMiddleware(failing_body_app, settings())
+        response = Response(middleware, "/members/download-groups")
+        with self.assertRaises(RuntimeError):
+            list(response.body)
+        # The server closes the body whatever happened while sending it
+        response.body.close()
+        self.assertEqual(middleware.classes["report"].in_flight, 0)
+
+    def test_exempt_routes_bypass_the_limits(self):
+        middleware = AdmissionControlMiddleware(streaming_app, settings(ADMISSION_READ_LIMIT=1))
+        held = Response(middleware, "/members")
+        self.assertEqual(Response(middleware, "/healthz").status, "200 OK")
+        held.body.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
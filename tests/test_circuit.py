@@ -0,0 +1,107 @@
+"""
+Circuit breaker state transitions, on a fake clock:
+
+    python -m unittest discover tests
+"""
+import unittest
+from app.circuit import CircuitBreaker, CircuitOpenError
+from app.metrics import metrics
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ServiceDown(Exception):
+    pass
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker("test", failure_threshold=3, cooldown=30, clock=self.clock)
+
+    def fail(self, times: int = 1) -> None:
+        for _ in range(times):
+            with self.assertRaises(ServiceDown):
+                with self.breaker.guard():
+                    raise ServiceDown()
+
+    def succeed(self) -> None:
+        with self.breaker.guard():
+            pass
+
+    def counter(self, name: str) -> int:
+        return metrics.snapshot()["counters"].get(f"circuit.test.{name}", 0)
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.succeed()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        opened = self.counter("opened")
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.counter("opened"), opened + 1)
+        self.assertEqual(metrics.snapshot()["gauges"]["circuit.test.state"], "open")
+
+    def test_open_breaker_fails_fast_until_cooldown(self):
+        self.fail(3)
+        self.clock.now += 10
+        rejected = self.counter("rejected")
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.succeed()
+        self.assertEqual(raised.exception.retry_after, 20)
+        self.assertEqual(self.breaker.retry_after(), 20)
+        self.assertEqual(self.counter("rejected"), rejected + 1)
+
+    def test_probe_success_closes(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.assertEqual(self.breaker.retry_after(), 0)
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        # Only the probe goes through while half-open
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+        self.succeed()
+
+    def test_probe_failure_reopens_for_another_cooldown(self):
+        self.fail(3)
+        self.clock.now += 31
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.retry_after(), 30)
+        with self.assertRaises(CircuitOpenError):
+            self.succeed()
+
+    def test_errors_that_show_the_service_is_up_count_as_success(self):
+        self.fail(2)
+        with self.assertRaises(ValueError):
+            with self.breaker.guard(is_failure=lambda error: not isinstance(error, ValueError)):
+                raise ValueError("recipient refused")
+        self.assertEqual(self.breaker.failures, 0)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_interrupted_probe_does_not_stay_half_open(self):
+        self.fail(3)
+        self.clock.now += 30
+        with self.assertRaises(KeyboardInterrupt):
+            with self.breaker.guard(is_failure=lambda error: False):
+                raise KeyboardInterrupt()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+if __name__ == "__main__":
+    unittest.main()
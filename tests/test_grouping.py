@@ -0,0 +1,131 @@
+"""
+Grouping strategies, and stored groupings on the in-memory repositories:
+
+    python -m unittest discover tests
+"""
+import unittest
+from app.grouping import STRATEGIES, make_groups, get_or_create_grouping, grouping_key
+from app.repositories import create_repositories, set_repositories, student_repo
+from app.search import search_keys
+from app.utils import with_keys
+
+SURNAMES = [
+    "Okafor", "Bello", "Adeyemi", "Eze", "Musa", "Nwosu", "Ibrahim", "Obi", "Lawal", "Danjuma", "Chukwu",
+    "Ojo", "Garba", "Uche", "Fashola", "Kalu", "Yusuf",
+]
+
+
+def roster(count: int = len(SURNAMES), females: int = 6, cohort: str = "2022") -> list:
+    """`count` members with distinct surnames; the first `females` (in this order) are female."""
+    members_list = []
+    for index, surname in enumerate(SURNAMES[:count]):
+        doc = {
+            "reg_no": f"{cohort}/{index:04d}", "surname": surname, "first_name": "Ada", "other_names": None,
+            "gender": "female" if index < females else "male", "role": "student", "cohort": cohort,
+        }
+        doc.update(search_keys(doc))
+        members_list.append(with_keys(doc))
+    return members_list
+
+
+def reg_nos(groups: list) -> list:
+    return [[member["reg_no"] for member in group] for group in groups]
+
+
+class MakeGroupsTest(unittest.TestCase):
+    def test_every_member_placed_once(self):
+        members_list = roster()
+        for strategy in STRATEGIES:
+            placed = sorted(reg_no for group in reg_nos(make_groups(members_list, 4, strategy, seed=1)) for reg_no in group)
+            self.assertEqual(placed, sorted(m["reg_no"] for m in members_list), strategy)
+
+    def test_sequential_matches_surname_chunks(self):
+        members_list = roster()
+        ordered = sorted(members_list, key=lambda s: s.get("surname", "").lower())
+        expected = [ordered[i:i + 5] for i in range(0, len(ordered), 5)]
+        groups = make_groups(members_list, 5, "sequential")
+        self.assertEqual(reg_nos(groups), reg_nos(expected))
+        self.assertEqual([len(group) for group in groups], [5, 5, 5, 2])
+
+    def test_balanced_sizes(self):
+        members_list = roster()
+        for strategy in ("even", "random", "gender_balanced"):
+            for group_size in (2, 3, 4, 5, 16):
+                sizes = [len(group) for group in make_groups(members_list, group_size, strategy, seed=7)]
+                self.assertLessEqual(max(sizes) - min(sizes), 1, (strategy, group_size, sizes))
+                self.assertLessEqual(max(sizes), group_size, (strategy, group_size, sizes))
+
+    def test_gender_split(self):
+        members_list = roster(count=17, females=6)
+        groups = make_groups(members_list, 4, "gender_balanced")
+        self.assertEqual(len(groups), 5)
+        females = [sum(1 for m in group if m["gender"] == "female") for group in groups]
+        males = [len(group) - count for group, count in zip(groups, females)]
+        self.assertLessEqual(max(females) - min(females), 1, females)
+        self.assertLessEqual(max(males) - min(males), 1, males)
+        # Members stay in surname order inside a group
+        for group in groups:
+            self.assertEqual([m["surname_key"] for m in group], sorted(m["surname_key"] for m in group))
+
+    def test_random_is_reproducible(self):
+        members_list = roster()
+        first = reg_nos(make_groups(members_list, 4, "random", seed=42))
+        self.assertEqual(reg_nos(make_groups(list(reversed(members_list)), 4, "random", seed=42)), first)
+        self.assertNotEqual(reg_nos(make_groups(members_list, 4, "random", seed=43)), first)
+
+    def test_edge_cases(self):
+        self.assertEqual(make_groups([], 3, "even"), [])
+        self.assertEqual(len(make_groups(roster(count=2), 5, "even")), 1)
+        with self.assertRaises(ValueError):
+            make_groups(roster(), 3, "alphabetical")
+
+
+class StoredGroupingTest(unittest.TestCase):
+    def setUp(self):
+        set_repositories(create_repositories("memory"))
+        self.addCleanup(set_repositories, None)
+        student_repo.add_many(roster(count=10))
+
+    def test_repeat_request_reuses_the_stored_grouping(self):
+        first = get_or_create_grouping(" CSC  201 ", 3, "random")
+        self.assertEqual(first["_id"], "csc 201")
+        self.assertIsNotNone(first["seed"])
+
+        student_repo.add_many(roster(count=3, cohort="2023"))
+        again = get_or_create_grouping("csc 201", 3, "random")
+        self.assertEqual(again["created_at"], first["created_at"])
+        self.assertEqual(again["groups"], first["groups"])
+        self.assertEqual(again["member_count"], 10)
+
+        # Same seed asked for explicitly: still the stored one (the 2023 members aren't in it)
+        self.assertEqual(get_or_create_grouping("csc 201", 3, "random", seed=first["seed"])["member_count"], 10)
+
+    def test_changed_parameters_or_regenerate_recompute(self):
+        first = get_or_create_grouping("CSC 201", 3)
+        self.assertEqual(first["strategy"], "sequential")
+        self.assertEqual(len(get_or_create_grouping("CSC 201", 5)["groups"]), 2)
+        self.assertEqual(get_or_create_grouping("CSC 201", 5, "even")["strategy"], "even")
+
+        random_grouping = get_or_create_grouping("CSC 201", 5, "random", seed=1)
+        self.assertEqual(get_or_create_grouping("CSC 201", 5, "random", seed=2)["seed"], 2)
+        self.assertNotEqual(random_grouping["seed"], 2)
+
+        student_repo.add_many(roster(count=2, cohort="2023"))
+        regenerated = get_or_create_grouping("CSC 201", 5, "random", seed=2, regenerate=True)
+        self.assertEqual(regenerated["member_count"], 12)
+
+    def test_cohort_groupings_are_separate(self):
+        student_repo.add_many(roster(count=4, cohort="2023"))
+        everyone = get_or_create_grouping("CSC 201", 4)
+        cohort = get_or_create_grouping("CSC 201", 4, cohort="2023")
+        self.assertEqual(cohort["_id"], grouping_key("CSC 201", "2023"))
+        self.assertEqual((everyone["member_count"], cohort["member_count"]), (14, 4))
+        student_repo.add_many(roster(count=1, cohort="2024"))
+        self.assertEqual(get_or_create_grouping("CSC 201", 4)["member_count"], 14)
+
+    def test_no_members(self):
+        self.assertIsNone(get_or_create_grouping("CSC 201", 4, cohort="2030"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Handlers end to end on the in-memory repositories (no database needed;
+EmailSender is replaced so no mail is queued):
+
+    python -m unittest discover tests
+"""
+import unittest
+from unittest import mock
+from config import Config
+from app import create_app
+from app.cache import lecturer_directory_cache
+from app.repositories import create_repositories, set_repositories, student_repo
+from app.stats import get_member_stats, rebuild_member_stats
+
+
+class MemoryConfig(Config):
+    # Never connected to: the client is created with connect=False and the
+    # memory repositories don't use it
+    MONGO_URI = "mongodb://localhost:27017/unused"
+
+
+def registration(reg_no: str, surname: str, email: str, phone_number: str, **overrides) -> dict:
+    record = {
+        "surname": surname, "first_name": "Ada", "admission_type": "utme", "gender": "female",
+        "role": "student", "reg_no": reg_no, "email": email, "phone_number": phone_number,
+    }
+    record.update(overrides)
+    return record
+
+
+STUDENTS = [
+    registration("2022/0001", "Okafor", "adaokafor@gmail.com", "08031230001", role="exco"),
+    registration("2022/0002", "Bello", "adabello@gmail.com", "08031230002", gender="male"),
+    registration("2022/0003", "Adeyemi", "adaadeyemi@gmail.com", "08031230003"),
+]
+
+
+class HandlerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(MemoryConfig)
+
+    def setUp(self):
+        set_repositories(create_repositories("memory"))
+        self.addCleanup(set_repositories, None)
+        lecturer_directory_cache.invalidate()
+
+        self.mail = mock.Mock()
+        for module in ("app.code.student", "app.code.lecturers"):
+            patcher = mock.patch(f"{module}.EmailSender", self.mail)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = self.app.test_client()
+
+    def register(self, record: dict):
+        return self.client.post("/api/register", json=record)
+
+
+class StudentHandlersTest(HandlerTest):
+    def test_register_then_login(self):
+        response = self.register(STUDENTS[0])
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.mail.send_welcome_email.assert_called_once()
+        self.assertEqual(self.mail.send_welcome_email.call_args.kwargs["reg_no"], "2022/0001")
+
+        stored = student_repo.get_by_reg_no("2022/0001")
+        self.assertEqual((stored["cohort"], stored["role"], stored["surname_key"]), ("2022", "Exco", "okafor"))
+
+        response = self.client.post("/api/student/login", json={"reg_no": "2022/0001", "password": "000000"})
+        self.assertEqual(response.status_code, 200)
+        student = response.get_json()["student"]
+        self.assertEqual(student["reg_no"], "2022/0001")
+        self.assertNotIn("password", student)
+
+        response = self.client.post("/api/student/login", json={"reg_no": "2022/0001", "password": "123456"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_rejects_duplicates_and_invalid_records(self):
+        self.register(STUDENTS[0])
+        response = self.register(dict(STUDENTS[0], reg_no="2022/0009"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "A user with this email already exists")
+
+        response = self.register(dict(STUDENTS[1], gender="other"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["errors"][0]["field"], "gender")
+        self.assertEqual(student_repo.count(), 1)
+
+    def test_stats_follow_registrations(self):
+        for record in STUDENTS:
+            self.register(record)
+
+        summary = self.client.get("/members/stats").get_json()["summary"]
+        self.assertEqual(summary, {"total_excos": 1, "total_students": 2, "total_members": 3})
+
+        counted = get_member_stats()
+        rebuilt = rebuild_member_stats()
+        for field in ("total", "role", "gender", "admission_type"):
+            self.assertEqual(counted[field], rebuilt[field])
+        self.assertEqual(get_member_stats("2022")["gender"], {"female": 2, "male": 1})
+
+    def test_search(self):
+        for record in STUDENTS:
+            self.register(record)
+
+        results = self.client.get("/search?q=oka&scope=students").get_json()["results"]
+        self.assertEqual([r["reg_no"] for r in results], ["2022/0001"])
+
+        results = self.client.get("/search?q=2022/000&scope=students").get_json()["results"]
+        self.assertEqual(len(results), 3)
+
+        # typo tolerant
+        results = self.client.get("/search?q=okafro").get_json()["results"]
+        self.assertEqual([r["surname"] for r in results], ["Okafor"])
+
+    def test_groups_are_stored_and_read_back(self):
+        for record in STUDENTS:
+            self.register(record)
+
+        response = self.client.post("/members/groups", json={"course_title": "CSC 201", "group_size": 2})
+        self.assertEqual(response.status_code, 200)
+        created = response.get_json()
+        self.assertEqual([group["size"] for group in created["groups"]], [2, 1])
+
+        response = self.client.get("/members/groups/csc 201")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), created)
+        self.assertEqual(self.client.get("/members/groups/csc 999").status_code, 404)
+
+
+class LecturerHandlersTest(HandlerTest):
+    def test_register_lecturer_then_directory_and_search(self):
+        lecturer = {
+            "reg_no": "LEC/001", "title": "Dr", "surname": "Obi", "first_name": "Chidi",
+            "phone_number": "08031239999", "email": "chidiobi@gmail.com", "gender": "male",
+        }
+        response = self.client.post("/api/register/lecturer", json=lecturer)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.mail.send_welcome_email_lecturer.assert_called_once()
+
+        response = self.client.post("/api/lecturer/login", json={"reg_no": "LEC/001", "password": "000000"})
+        self.assertEqual(response.status_code, 200)
+
+        directory = self.client.get("/Student/view_all_lecturers").get_json()["lecturers"]
+        self.assertEqual([entry["name"] for entry in directory], ["Dr Obi Chidi"])
+        self.assertNotIn("email", directory[0])
+
+        results = self.client.get("/search?q=obi&scope=lecturers").get_json()["results"]
+        self.assertEqual([(r["type"], r["reg_no"]) for r in results], [("lecturer", "LEC/001")])
+
+
+if __name__ == "__main__":
+    unittest.main()
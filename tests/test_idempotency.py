@@ -0,0 +1,130 @@
+"""
+Idempotency-Key handling on a mock collection (needs mongomock):
+
+    python -m unittest discover tests
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from flask import Flask, Response, request
+from flask_restful import Api, Resource
+from config import Config
+from app.idempotency import idempotent
+from app.validation import request_error
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+class Echo(Resource):
+    """Counts its runs and answers according to the body's `outcome`."""
+    method_decorators = {"post": [idempotent]}
+    runs = []
+
+    def post(self):
+        Echo.runs.append(request.get_json())
+        outcome = request.get_json().get("outcome")
+        if outcome == "invalid":
+            raise request_error([{"field": "email", "error": "Invalid Gmail address"}])
+        if outcome == "unavailable":
+            return {"error": "Mail server unavailable"}, 503
+        if outcome == "crash":
+            raise RuntimeError("handler failed")
+        if outcome == "pdf":
+            return Response(b"%PDF-1.4", mimetype="application/pdf")
+        return {"message": "Registered", "run": len(Echo.runs)}, 201
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class IdempotencyTest(unittest.TestCase):
+    def setUp(self):
+        self.keys = mongomock.MongoClient().db.IdempotencyKeys
+        patcher = mock.patch("app.idempotency.idempotency_keys", self.keys)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.app = Flask(__name__)
+        Api(self.app).add_resource(Echo, "/echo")
+        self.client = self.app.test_client()
+        Echo.runs = []
+
+    def post(self, key="key-1", **body):
+        headers = {"Idempotency-Key": key} if key else {}
+        return self.client.post("/echo", json=body, headers=headers)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post(name="Ada")
+        retry = self.post(name="Ada")
+        self.assertEqual(len(Echo.runs), 1)
+        self.assertEqual((retry.status_code, retry.get_json()), (first.status_code, first.get_json()))
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertNotIn("Idempotent-Replayed", first.headers)
+
+    def test_requests_without_a_key_always_run(self):
+        self.post(key=None, name="Ada")
+        self.post(key=None, name="Ada")
+        self.assertEqual(len(Echo.runs), 2)
+        self.assertEqual(self.keys.count_documents({}), 0)
+
+    def test_keys_are_scoped_to_method_and_path(self):
+        self.post(name="Ada")
+        self.assertEqual(self.keys.find_one()["_id"], "POST /echo key-1")
+
+    def test_overlong_key_is_rejected(self):
+        response = self.post(key="k" * 256, name="Ada")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Echo.runs, [])
+
+    def test_different_body_is_unprocessable(self):
+        self.post(name="Ada")
+        response = self.post(name="Bayo")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(Echo.runs), 1)
+
+    def test_conflict_while_first_request_is_processing(self):
+        self.post(name="Ada")
+        self.keys.update_one({}, {"$set": {"state": "processing", "started_at": datetime.utcnow()}})
+        response = self.post(name="Ada")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers["Retry-After"], "5")
+        self.assertEqual(len(Echo.runs), 1)
+
+    def test_stale_claim_is_taken_over(self):
+        self.post(name="Ada")
+        stale = datetime.utcnow() - timedelta(seconds=Config.IDEMPOTENCY_PROCESSING_TIMEOUT + 1)
+        self.keys.update_one({}, {"$set": {"state": "processing", "started_at": stale}})
+        response = self.post(name="Ada")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(Echo.runs), 2)
+        self.assertEqual(self.keys.find_one()["state"], "done")
+
+    def test_server_errors_release_the_key(self):
+        self.assertEqual(self.post(outcome="unavailable").status_code, 503)
+        self.assertEqual(self.keys.count_documents({}), 0)
+        self.assertEqual(self.post(outcome="unavailable").status_code, 503)
+        self.assertEqual(len(Echo.runs), 2)
+
+    def test_exceptions_release_the_key(self):
+        with self.assertLogs(self.app.logger, "ERROR"):
+            self.assertEqual(self.post(outcome="crash").status_code, 500)
+        self.assertEqual(self.keys.count_documents({}), 0)
+
+    def test_client_errors_replay_their_full_body(self):
+        first = self.post(outcome="invalid")
+        retry = self.post(outcome="invalid")
+        self.assertEqual(len(Echo.runs), 1)
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry.get_json(), first.get_json())
+        self.assertEqual(retry.get_json()["errors"], [{"field": "email", "error": "Invalid Gmail address"}])
+
+    def test_raw_responses_are_replayed(self):
+        self.post(outcome="pdf")
+        retry = self.post(outcome="pdf")
+        self.assertEqual(len(Echo.runs), 1)
+        self.assertEqual((retry.status_code, retry.mimetype, retry.data), (200, "application/pdf", b"%PDF-1.4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
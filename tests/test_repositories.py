@@ -0,0 +1,187 @@
+"""
+Repositories on the in-memory backend (no database needed):
+
+    python -m unittest discover tests
+"""
+import unittest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.projections import EXISTS, MEMBER_LISTING
+from app.repositories import (
+    MemoryBackend, StudentRepo, LecturerRepo, AnnouncementRepo, StatsRepo, GroupingRepo, project,
+)
+from app.search import search_keys
+from app.utils import with_keys
+
+
+def student(reg_no: str, surname: str, role: str = "student", gender: str = "male", cohort: str = "2022") -> dict:
+    """A member document shaped like student_document() builds it."""
+    doc = {
+        "reg_no": reg_no, "surname": surname, "first_name": "Ada", "other_names": None,
+        "admission_type": "utme", "phone_number": f"080{reg_no[-4:]}0000", "email": f"{surname.lower()}@gmail.com",
+        "gender": gender, "role": role, "cohort": cohort, "password": "hash",
+    }
+    doc.update(search_keys(doc))
+    return with_keys(doc)
+
+
+class ProjectTest(unittest.TestCase):
+    doc = {"_id": 1, "reg_no": "2022/0001", "password": "hash"}
+
+    def test_id_only_inclusion(self):
+        self.assertEqual(project(self.doc, EXISTS), {"_id": 1})
+
+    def test_inclusion_without_id(self):
+        self.assertEqual(project(self.doc, {"_id": 0, "reg_no": 1}), {"reg_no": "2022/0001"})
+
+    def test_dotted_inclusion(self):
+        doc = {"_id": "members", "total": 3, "cohorts": {"2022": {"total": 2, "updated_at": 1}}}
+        self.assertEqual(project(doc, {"cohorts.2022.updated_at": 1}),
+                         {"_id": "members", "cohorts": {"2022": {"updated_at": 1}}})
+        self.assertEqual(project(doc, {"cohorts.2023.updated_at": 1}), {"_id": "members", "cohorts": {}})
+
+    def test_exclusion(self):
+        self.assertEqual(project(self.doc, {"password": 0}), {"_id": 1, "reg_no": "2022/0001"})
+        self.assertEqual(project(self.doc, {"_id": 0}), {"reg_no": "2022/0001", "password": "hash"})
+
+
+class StudentRepoTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = StudentRepo(MemoryBackend(StudentRepo.INDEXED))
+        self.repo.add_many([
+            student("2022/0003", "Okafor", role="exco", gender="female"),
+            student("2022/0001", "Bello"),
+            student("2023/0002", "Adeyemi", cohort="2023"),
+        ])
+
+    def test_lookups(self):
+        self.assertEqual(self.repo.get_by_reg_no("2022/0001", {"_id": 0, "surname": 1}), {"surname": "Bello"})
+        self.assertTrue(self.repo.exists("email", "okafor@gmail.com"))
+        self.assertFalse(self.repo.exists("reg_no", "2022/9999"))
+        existing = self.repo.find_existing(["bello@gmail.com"], ["2023/0002"])
+        self.assertEqual(sorted(row["reg_no"] for row in existing), ["2022/0001", "2023/0002"])
+
+    def test_listing_filters_and_order(self):
+        self.assertEqual([m["surname"] for m in self.repo.listing(by_surname=True)], ["Adeyemi", "Bello", "Okafor"])
+        self.assertEqual([m["surname"] for m in self.repo.listing(cohort="2022", by_surname=True)], ["Bello", "Okafor"])
+        self.assertEqual(self.repo.count(role="Exco"), 1)
+        self.assertEqual(self.repo.count(gender="male", cohort="2022"), 1)
+        self.assertNotIn("password", self.repo.listing(projection=MEMBER_LISTING)[0])
+
+    def test_updates(self):
+        self.assertTrue(self.repo.set_otp("2022/0001", "123456", None))
+        self.assertTrue(self.repo.set_password("2022/0001", "new", clear_otp=True))
+        stored = self.repo.get_by_reg_no("2022/0001")
+        self.assertEqual(stored["password"], "new")
+        self.assertNotIn("reset_otp", stored)
+
+        self.assertTrue(self.repo.change_role("2022/0001", "student", "exco"))
+        self.assertFalse(self.repo.change_role("2022/0001", "student", "exco"))
+        self.assertEqual(self.repo.count(role="exco"), 2)
+
+    def test_prefix_search(self):
+        found = self.repo.find_by_prefix(("surname_key", "first_name_key"), "ok")
+        self.assertEqual([m["reg_no"] for m in found], ["2022/0003"])
+        self.assertEqual(len(self.repo.find_by_prefix(("reg_no",), "2022/")), 2)
+        self.assertEqual(len(self.repo.find_by_prefix(("first_name_key",), "ada", limit=2)), 2)
+
+    def test_count_by(self):
+        counts = {(values["cohort"], values["gender"]): count
+                  for values, count in self.repo.count_by(("cohort", "gender"))}
+        self.assertEqual(counts, {("2022", "female"): 1, ("2022", "male"): 1, ("2023", "male"): 1})
+
+    def test_purge_expired_otps(self):
+        now = datetime.utcnow()
+        self.repo.set_otp("2022/0001", "111111", now - timedelta(minutes=1))
+        self.repo.set_otp("2022/0003", "333333", now + timedelta(minutes=4))
+        self.assertEqual(self.repo.purge_expired_otps(now), 1)
+        self.assertNotIn("reset_otp", self.repo.get_by_reg_no("2022/0001"))
+        self.assertEqual(self.repo.get_by_reg_no("2022/0003")["reset_otp"], "333333")
+
+    def test_recipients_resume_after_id(self):
+        ids = [m["_id"] for m in self.repo.recipients(projection={"email": 1})]
+        self.assertEqual(ids, sorted(ids))
+        resumed = [m["_id"] for m in self.repo.recipients(after_id=ids[0], projection={"email": 1})]
+        self.assertEqual(resumed, ids[1:])
+
+    def test_cohort_batches(self):
+        batch = self.repo.cohort_batch("2022", limit=1)
+        self.assertEqual(len(batch), 1)
+        self.assertNotIn("password", batch[0])
+        self.assertEqual(self.repo.delete_ids([batch[0]["_id"]]), 1)
+        self.assertEqual(self.repo.count(cohort="2022"), 1)
+
+    def test_backfill_cohorts(self):
+        legacy = student("2021/0004", "Eze")
+        del legacy["cohort"]
+        self.repo.add(legacy)
+        missing = list(self.repo.without_cohort())
+        self.assertEqual([m["reg_no"] for m in missing], ["2021/0004"])
+        self.assertEqual(self.repo.set_cohorts({missing[0]["_id"]: "2021"}), 1)
+        self.assertEqual(self.repo.count(cohort="2021"), 1)
+        self.assertEqual(list(self.repo.without_cohort()), [])
+
+
+class LecturerRepoTest(unittest.TestCase):
+    def test_purge_expired_otps(self):
+        repo = LecturerRepo(MemoryBackend(LecturerRepo.INDEXED), MemoryBackend())
+        repo.add({"reg_no": "LEC/001", "email": "obiada@gmail.com"})
+        repo.set_otp("obiada@gmail.com", "123456", datetime.utcnow() - timedelta(seconds=1))
+        self.assertEqual(repo.purge_expired_otps(datetime.utcnow()), 1)
+        self.assertEqual(repo.purge_expired_otps(datetime.utcnow()), 0)
+        self.assertNotIn("otp_expiry", repo.get_by_email("obiada@gmail.com"))
+
+    def test_directory_entries(self):
+        repo = LecturerRepo(MemoryBackend(LecturerRepo.INDEXED), MemoryBackend())
+        first, second = ObjectId(), ObjectId()
+        repo.save_directory_entries([
+            {"_id": first, "name": "Dr Obi Ada", "sort_key": "obi ada"},
+            {"_id": second, "name": "Prof Ade Bayo", "sort_key": "ade bayo"},
+        ])
+        self.assertEqual([entry["name"] for entry in repo.directory()], ["Prof Ade Bayo", "Dr Obi Ada"])
+        self.assertEqual(repo.remove_directory_entries([first]), 1)
+        self.assertEqual(repo.directory_ids(), {second})
+
+
+class StatsRepoTest(unittest.TestCase):
+    def test_increment_creates_and_adds(self):
+        repo = StatsRepo(MemoryBackend())
+        repo.increment("members", {"total": 2, "cohorts.2022.total": 2}, {"updated_at": 1})
+        before = repo.get("members")
+        repo.increment("members", {"total": 1, "cohorts.2022.total": 1, "cohorts.2023.total": 1})
+        self.assertEqual(repo.get("members"), {
+            "_id": "members", "total": 3, "updated_at": 1,
+            "cohorts": {"2022": {"total": 3}, "2023": {"total": 1}},
+        })
+        # Earlier reads are not changed under the caller
+        self.assertEqual(before["cohorts"], {"2022": {"total": 2}})
+        self.assertEqual(repo.get("members", {"cohorts.2022.total": 1}),
+                         {"_id": "members", "cohorts": {"2022": {"total": 3}}})
+
+    def test_replace(self):
+        repo = StatsRepo(MemoryBackend())
+        repo.increment("lecturers", {"total": 5})
+        repo.replace({"_id": "lecturers", "total": 2})
+        self.assertEqual(repo.get("lecturers"), {"_id": "lecturers", "total": 2})
+        self.assertIsNone(repo.get("members"))
+
+
+class GroupingRepoTest(unittest.TestCase):
+    def test_save_replaces(self):
+        repo = GroupingRepo(MemoryBackend())
+        repo.save({"_id": "csc 201", "group_size": 3})
+        repo.save({"_id": "csc 201", "group_size": 4})
+        self.assertEqual(repo.get("csc 201"), {"_id": "csc 201", "group_size": 4})
+        self.assertIsNone(repo.get("csc 201|2023"))
+
+
+class AnnouncementRepoTest(unittest.TestCase):
+    def test_text_exists(self):
+        repo = AnnouncementRepo(MemoryBackend(AnnouncementRepo.INDEXED))
+        repo.add({"name": "Dr Obi", "announcement_text": "Lectures resume Monday"})
+        self.assertTrue(repo.text_exists("Lectures resume Monday"))
+        self.assertFalse(repo.text_exists("Exams postponed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
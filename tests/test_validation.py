@@ -0,0 +1,183 @@
+"""
+Schema validation (pure functions, no database needed):
+
+    python -m unittest discover tests
+"""
+import unittest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+from app.validation import (
+    Field, Schema, STUDENT_SCHEMA, LECTURER_SCHEMA, STUDENT_LOGIN_SCHEMA,
+    REQUEUE_DEAD_LETTERS_SCHEMA, GROUPING_SCHEMA, EMAIL_DELIVERIES_SCHEMA,
+    cohort_of, parse_cohort, request_error,
+)
+
+
+def registration(**overrides) -> dict:
+    record = {
+        "surname": " okafor ", "first_name": "ada", "admission_type": "UTME",
+        "phone_number": "08031234567", "email": "Ada.Okafor@gmail.com",
+        "gender": "Female", "role": "Student", "reg_no": "2022/123456",
+    }
+    record.update(overrides)
+    return record
+
+
+class BatchContractTest(unittest.TestCase):
+    def test_valid_rows_are_normalized(self):
+        rows, mask, errors = STUDENT_SCHEMA.validate_batch([registration()])
+        self.assertEqual(mask, [True])
+        self.assertEqual(errors, [])
+        row = rows[0]
+        self.assertEqual((row["admission_type"], row["gender"], row["role"]), ("utme", "female", "student"))
+        self.assertEqual(row["reg_no"], "2022/123456")
+        self.assertIsNone(row["other_names"])
+
+    def test_mask_and_errors_line_up_with_rows(self):
+        records = [registration(), registration(gender="other", phone_number="08031234568",
+                                                email="bellobayo@gmail.com", reg_no="2022/123457"), "not a record"]
+        rows, mask, errors = STUDENT_SCHEMA.validate_batch(records)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(mask, [True, False, False])
+        self.assertEqual([e["row"] for e in errors], [1, 2])
+        self.assertEqual(errors[0]["field"], "gender")
+        self.assertEqual(errors[1], {"row": 2, "field": "surname", "error": "Surname is required"})
+
+    def test_first_error_per_row_unless_all_errors(self):
+        record = registration(surname="", gender="other")
+        _, mask, errors = STUDENT_SCHEMA.validate_batch([record])
+        self.assertEqual(mask, [False])
+        self.assertEqual([e["field"] for e in errors], ["surname"])
+
+        _, mask, errors = STUDENT_SCHEMA.validate_batch([record], all_errors=True)
+        self.assertEqual(mask, [False])
+        self.assertEqual([e["field"] for e in errors], ["surname", "gender"])
+
+    def test_only_first_failing_check_of_a_field(self):
+        _, _, errors = STUDENT_SCHEMA.validate_batch([registration(reg_no="bad")], all_errors=True)
+        self.assertEqual(errors, [{"row": 0, "field": "reg_no", "error": "Invalid registration number format"}])
+
+
+class BatchDuplicatesTest(unittest.TestCase):
+    def test_repeated_values_after_the_first_are_rejected(self):
+        records = [
+            registration(),
+            registration(reg_no="2022/123457", email="otherstudent@gmail.com"),
+            registration(reg_no="2022/123458", phone_number="08031234569", email="ADA.OKAFOR@gmail.com"),
+        ]
+        _, mask, errors = STUDENT_SCHEMA.validate_batch(records)
+        self.assertEqual(mask, [True, False, False])
+        self.assertEqual([(e["row"], e["error"]) for e in errors], [
+            (1, "Duplicate phone_number in batch"),
+            (2, "Duplicate email in batch"),
+        ])
+
+    def test_invalid_rows_do_not_claim_values(self):
+        records = [
+            registration(gender="other"),
+            registration(reg_no="2022/123457"),
+        ]
+        _, mask, errors = STUDENT_SCHEMA.validate_batch(records)
+        self.assertEqual(mask, [False, True])
+        self.assertEqual([e["field"] for e in errors], ["gender"])
+
+    def test_lecturer_reg_nos_are_unique_per_batch(self):
+        lecturer = {"reg_no": "lec/001", "surname": "Obi", "first_name": "Ada",
+                    "phone_number": "08031234567", "email": "obiada@gmail.com", "gender": "male"}
+        second = dict(lecturer, reg_no="LEC/001", phone_number="08031234568", email="obiada2@gmail.com")
+        _, mask, errors = LECTURER_SCHEMA.validate_batch([lecturer, second])
+        self.assertEqual(mask, [True, False])
+        self.assertEqual(errors[0]["error"], "Duplicate reg_no in batch")
+
+
+class RegNoTest(unittest.TestCase):
+    def test_cohort_of(self):
+        self.assertEqual(cohort_of("2023/123456"), "2023")
+        self.assertIsNone(cohort_of("2023-123456"))
+        self.assertIsNone(cohort_of("2023/1234567"))
+        self.assertIsNone(cohort_of(None))
+
+    def test_unregistered_cohort(self):
+        _, mask, errors = STUDENT_SCHEMA.validate_batch([registration(reg_no="1999/123456")])
+        self.assertEqual(mask, [False])
+        self.assertTrue(errors[0]["error"].startswith("Registration number must start with"))
+
+    def test_parse_cohort(self):
+        self.assertIsNone(parse_cohort(None))
+        self.assertIsNone(parse_cohort("  "))
+        self.assertEqual(parse_cohort(" 2023 "), "2023")
+        self.assertEqual(parse_cohort(2023), "2023")
+        with self.assertRaises(ValueError):
+            parse_cohort("2023/24")
+
+
+class RequestSchemaTest(unittest.TestCase):
+    def assertRejected(self, schema, record, *errors):
+        with self.assertRaises(BadRequest) as raised:
+            schema.validate_record(record)
+        self.assertEqual([(e["field"], e["error"]) for e in raised.exception.data["errors"]], list(errors))
+        return raised.exception
+
+    def test_error_body(self):
+        error = self.assertRejected(STUDENT_LOGIN_SCHEMA, {"reg_no": " "},
+                                    ("reg_no", "Registration number is required"),
+                                    ("password", "Password is required"))
+        self.assertEqual(error.code, 400)
+        self.assertEqual(error.description, "Registration number is required")
+        self.assertEqual(error.data["message"], "Registration number is required")
+        self.assertEqual(set(error.data), {"message", "errors"})
+
+    def test_request_error_drops_rows(self):
+        error = request_error([{"row": 3, "field": "email", "error": "Invalid Gmail address"}])
+        self.assertEqual(error.data, {"message": "Invalid Gmail address",
+                                      "errors": [{"field": "email", "error": "Invalid Gmail address"}]})
+
+    def test_normalization_and_defaults(self):
+        args = STUDENT_LOGIN_SCHEMA.validate_record({"reg_no": " 2022/abc ", "password": " secret "})
+        self.assertEqual(args, {"reg_no": "2022/ABC", "password": "secret"})
+
+        args = GROUPING_SCHEMA.validate_record({"course_title": " CSC 201 ", "group_size": "5"})
+        self.assertEqual(args, {"course_title": "CSC 201", "group_size": 5, "strategy": "sequential",
+                                "seed": None, "regenerate": False, "cohort": None})
+
+    def test_many_fields(self):
+        credentials = {"email": "obiada@gmail.com", "password": "000000"}
+        self.assertEqual(REQUEUE_DEAD_LETTERS_SCHEMA.validate_record(dict(credentials, ids=" a "))["ids"], ["a"])
+        args = REQUEUE_DEAD_LETTERS_SCHEMA.validate_record(dict(credentials, ids=["a", " ", "b"]))
+        self.assertEqual(args["ids"], ["a", "b"])
+        self.assertIsNone(REQUEUE_DEAD_LETTERS_SCHEMA.validate_record(dict(credentials, ids=[" "]))["ids"])
+
+        schema = Schema([Field("ids", many=True, missing_message="ids are required")])
+        self.assertRejected(schema, {"ids": ["", None]}, ("ids", "ids are required"))
+
+    def test_boolean_fields(self):
+        for raw, expected in (("true", True), ("False", False), ("1", True), (0, False), (True, True)):
+            self.assertIs(GROUPING_SCHEMA.validate_record(
+                {"course_title": "CSC 201", "group_size": 5, "regenerate": raw})["regenerate"], expected)
+        self.assertRejected(GROUPING_SCHEMA, {"course_title": "CSC 201", "group_size": 5, "regenerate": "maybe"},
+                            ("regenerate", "'regenerate' must be true or false"))
+
+    def test_whole_number_fields(self):
+        self.assertRejected(GROUPING_SCHEMA, {"course_title": "CSC 201", "group_size": "-2", "seed": "1.5"},
+                            ("group_size", "Group size must be a valid number"),
+                            ("seed", "Seed must be a whole number"))
+        self.assertRejected(GROUPING_SCHEMA, {"course_title": "CSC 201", "group_size": 0},
+                            ("group_size", "Group size must be greater than zero"))
+
+    def test_checks_after_normalization(self):
+        self.assertRejected(EMAIL_DELIVERIES_SCHEMA,
+                            {"email": "obiada@gmail.com", "password": "x", "status": "Lost", "limit": "ten"},
+                            ("status", "Status must be sending, retrying or sent"),
+                            ("limit", "Limit must be a number"))
+        self.assertRejected(GROUPING_SCHEMA, {"course_title": "CSC 201", "group_size": 5, "cohort": "20/22"},
+                            ("cohort", "Invalid cohort"))
+
+    def test_parse_request_merges_query_and_body(self):
+        app = Flask(__name__)
+        with app.test_request_context("/?reg_no=2022/q&password=fromquery", method="POST",
+                                      json={"password": "frombody"}):
+            self.assertEqual(STUDENT_LOGIN_SCHEMA.parse_request(), {"reg_no": "2022/Q", "password": "frombody"})
+
+
+if __name__ == "__main__":
+    unittest.main()
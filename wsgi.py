@@ -0,0 +1,70 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import sys
+from app import create_app
+from app.admission import AdmissionControlMiddleware
+from config import Config
+
+
+class RouteTimeoutMiddleware(object):
+    """
+    Give every request a time budget: PDF export routes get REPORT_TIMEOUT,
+    everything else REQUEST_TIMEOUT.
+
+    The budget can only be enforced per request on gevent workers (where a
+    greenlet can be interrupted). On sync workers the gunicorn worker
+    timeout, which is set to the largest budget, is the only limit.
+
+    The budget covers producing the response (PDFs are fully rendered before
+    the view returns); the body itself is passed through unbuffered so
+    streamed downloads aren't collected in memory here.
+    """
+
+    def __init__(self, wsgi_app, config=Config):
+        self.wsgi_app = wsgi_app
+        self.request_timeout = config.REQUEST_TIMEOUT
+        self.report_timeout = config.REPORT_TIMEOUT
+        self.report_prefixes = tuple(config.REPORT_ROUTE_PREFIXES)
+
+        try:
+            from gevent import monkey, Timeout
+            self._timeout_cls = Timeout if monkey.is_module_patched("socket") else None
+        except ImportError:
+            self._timeout_cls = None
+
+    def timeout_for(self, path: str) -> int:
+        if path.startswith(self.report_prefixes):
+            return self.report_timeout
+        return self.request_timeout
+
+    def __call__(self, environ, start_response):
+        if self._timeout_cls is None:
+            return self.wsgi_app(environ, start_response)
+
+        seconds = self.timeout_for(environ.get("PATH_INFO", ""))
+        timeout = self._timeout_cls(seconds)
+        timeout.start()
+        try:
+            return self.wsgi_app(environ, start_response)
+        except self._timeout_cls as t:
+            if t is not timeout:
+                raise
+            start_response(
+                "504 Gateway Timeout",
+                [("Content-Type", "application/json"), ("Retry-After", str(seconds))],
+                sys.exc_info()
+            )
+            return [b'{"error": "Request took too long to process"}']
+        finally:
+            timeout.close()
+
+
+app = create_app(Config)
+app.wsgi_app = RouteTimeoutMiddleware(app.wsgi_app)
+if Config.ADMISSION_CONTROL_ENABLED:
+    # Outermost, so requests turned away never reach Flask (see app/admission.py)
+    app.wsgi_app = AdmissionControlMiddleware(app.wsgi_app)
+application = app